@@ -0,0 +1,66 @@
+"""
+Decide 50k staff assignments against one target date and validation time.
+
+    set -a; . ./.env; set +a   # utils.train_journey_utils imports the database settings
+    python -m benchmarks.bench_journey_window [count] [repeat]
+
+scalar : is_user_assigned_on_journey_date per assignment, with the per-call journey lookup
+         replaced by an in-memory dict (the real function also pays a DB round trip each)
+batch  : utils.journey_window, including parsing the origin date strings
+"""
+
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+from utils import train_journey_utils
+from utils.journey_window import journey_assignment_mask, journey_details_arrays, parse_dates
+
+TARGET = date(2026, 10, 19)
+VALIDATION_TIME = datetime(2026, 10, 19, 11, 30)
+
+
+def make_assignments(count: int, trains: int = 400, seed: int = 1):
+    rng = random.Random(seed)
+    train_numbers = [str(10000 + i) for i in range(trains)]
+    journey_details = {
+        train_no: {"journey_duration_days": rng.randint(1, 4), "end_time": f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"}
+        for train_no in train_numbers
+    }
+    assignments = [
+        (rng.choice(train_numbers), (TARGET - timedelta(days=rng.randint(-3, 10))).isoformat())
+        for _ in range(count)
+    ]
+    return assignments, journey_details
+
+
+def scalar(assignments):
+    return [
+        train_journey_utils.is_user_assigned_on_journey_date(origin, TARGET.isoformat(), VALIDATION_TIME, train_no)
+        for train_no, origin in assignments
+    ]
+
+
+def batch(assignments, journey_details):
+    durations, end_seconds = journey_details_arrays([train_no for train_no, _ in assignments], journey_details)
+    origins = parse_dates(origin for _, origin in assignments)
+    return journey_assignment_mask(origins, durations, end_seconds, TARGET, VALIDATION_TIME)
+
+
+def main(count: int = 50000, repeat: int = 5):
+    assignments, journey_details = make_assignments(count)
+    train_journey_utils.get_train_journey_details = journey_details.__getitem__
+    assert scalar(assignments) == batch(assignments, journey_details).tolist()
+
+    scalar_time = min(timeit.repeat(lambda: scalar(assignments), number=1, repeat=repeat))
+    batch_time = min(timeit.repeat(lambda: batch(assignments, journey_details), number=1, repeat=repeat))
+
+    print(f"{count} assignments, best of {repeat}")
+    print(f"  scalar is_user_assigned_on_journey_date : {scalar_time * 1000:8.2f} ms")
+    print(f"  batch journey_assignment_mask           : {batch_time * 1000:8.2f} ms  ({scalar_time / batch_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
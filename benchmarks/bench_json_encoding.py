@@ -0,0 +1,42 @@
+"""
+Compare response encoding for a 500-complaint date listing.
+
+    python -m benchmarks.bench_json_encoding [count] [repeat]
+
+stdlib: jsonable_encoder + json.dumps, i.e. starlette's JSONResponse
+orjson: utils.json_response.FastJSONResponse, the app-wide default response class
+Sizes are reported raw and gzip-compressed at the levels GZipMiddleware may be configured with.
+"""
+
+import gzip
+import sys
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.complaint_fixtures import make_complaint_day, wrap
+from utils.json_response import FastJSONResponse
+
+
+def main(count: int = 500, repeat: int = 20):
+    payload = wrap(make_complaint_day(count))
+
+    stdlib_body = JSONResponse(content=jsonable_encoder(payload)).body
+    orjson_body = FastJSONResponse(content=payload).body
+
+    stdlib_time = min(timeit.repeat(lambda: JSONResponse(content=jsonable_encoder(payload)), number=1, repeat=repeat))
+    orjson_time = min(timeit.repeat(lambda: FastJSONResponse(content=payload), number=1, repeat=repeat))
+
+    print(f"{count} complaints, best of {repeat}")
+    print(f"  stdlib encode : {stdlib_time * 1000:8.2f} ms  {len(stdlib_body):>9,} bytes")
+    print(f"  orjson encode : {orjson_time * 1000:8.2f} ms  {len(orjson_body):>9,} bytes  ({stdlib_time / orjson_time:.1f}x faster)")
+    for level in (1, 5, 9):
+        gzip_time = min(timeit.repeat(lambda: gzip.compress(orjson_body, compresslevel=level), number=1, repeat=repeat))
+        gzip_size = len(gzip.compress(orjson_body, compresslevel=level))
+        print(f"  gzip level {level}  : {gzip_time * 1000:8.2f} ms  {gzip_size:>9,} bytes on the wire")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
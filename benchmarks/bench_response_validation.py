@@ -0,0 +1,62 @@
+"""
+Compare the date listing response paths on a 500-complaint day.
+
+    set -a; . ./.env; set +a   # main.py needs the usual settings to import
+    python -m benchmarks.bench_response_validation [count] [repeat]
+
+per-item : the previous endpoint loop (one RSComplainUnsecuredGetResponse per complaint),
+           then FastAPI's response_model validation + serialization and the default response
+           (shown with both the stdlib JSONResponse and the orjson default class)
+batch    : utils.response_validation.serialize_response_list, sent as pre-serialized bytes
+"""
+
+import asyncio
+import sys
+import timeit
+from typing import List
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from benchmarks.complaint_fixtures import make_complaint_day
+from main import RSComplainUnsecuredGetResponse
+from fastapi.responses import JSONResponse
+from utils.json_response import FastJSONResponse
+from utils.response_validation import serialize_response_list
+
+RESPONSE_FIELD = create_model_field("Response_list", List[RSComplainUnsecuredGetResponse], mode="serialization")
+
+
+def per_item(complaints, response_class=FastJSONResponse):
+    response_list = []
+    for complaint in complaints:
+        try:
+            response_list.append(RSComplainUnsecuredGetResponse(message="Complaint retrieved successfully", data=complaint))
+        except Exception:
+            complaint['customer_care'] = None
+            response_list.append(RSComplainUnsecuredGetResponse(message="Complaint retrieved successfully", data=complaint))
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=response_list))
+    return response_class(content=content).body
+
+
+def batch(complaints):
+    return serialize_response_list(RSComplainUnsecuredGetResponse, complaints)
+
+
+def main(count: int = 500, repeat: int = 20):
+    complaints = make_complaint_day(count)
+    assert len(per_item(complaints)) > 0 and len(batch(complaints)) > 0
+
+    stdlib_time = min(timeit.repeat(lambda: per_item(complaints, JSONResponse), number=1, repeat=repeat))
+    per_item_time = min(timeit.repeat(lambda: per_item(complaints), number=1, repeat=repeat))
+    batch_time = min(timeit.repeat(lambda: batch(complaints), number=1, repeat=repeat))
+
+    print(f"{count} complaints, best of {repeat}")
+    print(f"  per-item, stdlib JSONResponse  : {stdlib_time * 1000:8.2f} ms")
+    print(f"  per-item, FastJSONResponse     : {per_item_time * 1000:8.2f} ms")
+    print(f"  batch TypeAdapter + dump_json  : {batch_time * 1000:8.2f} ms  ({per_item_time / batch_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,86 @@
+"""
+Bulk support-contact lookups against an index of 20k staff assignments.
+
+    set -a; . ./.env; set +a   # main.py needs the usual settings to import
+    python -m benchmarks.bench_support_contact_lookup [lookups] [repeat]
+
+resolve  : TrainAssignmentIndex.lookup_many + response body serialization
+endpoint : POST /rs_microservice/v2/support-contacts/lookup in-process (request parsing,
+           auth dependency overridden, no network)
+"""
+
+import asyncio
+import random
+import sys
+import time
+import timeit
+from datetime import date, timedelta
+
+from httpx import AsyncClient, ASGITransport
+
+from main import app
+from services.user_profile_services import get_current_user
+import services.support_contact_services as support_contacts
+from utils import train_assignment_index as tai
+
+TARGET = date(2026, 10, 19)
+TRAINS = [str(12000 + i) for i in range(1500)]
+COACHES = ["A1", "A2", "B1", "B2", "B3", "M1", "S1", "S2", "S3", "GS"]
+
+
+def make_rows(staff: int = 20000, seed: int = 3):
+    rng = random.Random(seed)
+    rows = []
+    for user_id in range(1, staff + 1):
+        role = "EHK" if user_id % 5 == 0 else "CA"
+        train = rng.choice(TRAINS)
+        for days_back in range(3):
+            rows.append({
+                "id": user_id, "first_name": f"Staff{user_id}", "last_name": "", "phone": f"9{user_id:09d}",
+                "train_no": train, "origin_date": TARGET - timedelta(days=days_back), "role": role,
+                "coach": rng.choice(COACHES) if role == "CA" else "",
+            })
+    return rows
+
+
+def make_lookups(count: int, seed: int = 4):
+    rng = random.Random(seed)
+    return [
+        {"train_no": rng.choice(TRAINS), "coach": rng.choice(COACHES), "date": (TARGET - timedelta(days=rng.randint(0, 2))).isoformat()}
+        for _ in range(count)
+    ]
+
+
+async def post_lookups(payload):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as ac:
+        response = await ac.post("/rs_microservice/v2/support-contacts/lookup", json=payload)
+        assert response.status_code == 200, response.text
+        return response
+
+
+def main(count: int = 5000, repeat: int = 5):
+    rows = make_rows()
+    tai.execute_query = lambda conn, query, params=None: rows
+    tai.get_journey_details_map = lambda trains: {train: {"journey_duration_days": 2} for train in trains}
+    index = tai.TrainAssignmentIndex()
+    started = time.perf_counter()
+    index.ensure_fresh(conn=object())
+    build_time = time.perf_counter() - started
+    support_contacts.train_assignment_index = index
+    app.dependency_overrides[get_current_user] = lambda: {"username": "bench"}
+
+    payload = {"lookups": make_lookups(count)}
+    lookups = support_contacts.SupportContactLookupRequest(**payload).lookups
+
+    resolve_time = min(timeit.repeat(lambda: support_contacts.resolve_support_contacts(lookups), number=1, repeat=repeat))
+    endpoint_time = min(timeit.repeat(lambda: asyncio.run(post_lookups(payload)), number=1, repeat=repeat))
+
+    print(f"index of {len(rows)} assignment rows built in {build_time * 1000:.0f} ms")
+    print(f"{count} lookups, best of {repeat}")
+    print(f"  resolve + serialize : {resolve_time * 1000:8.2f} ms  ({count / resolve_time:,.0f} lookups/s)")
+    print(f"  endpoint            : {endpoint_time * 1000:8.2f} ms  ({count / endpoint_time:,.0f} lookups/s)")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
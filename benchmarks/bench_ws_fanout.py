@@ -0,0 +1,117 @@
+"""
+Idle-socket capacity and fan-out of the passenger status WebSocket.
+
+    python -m benchmarks.bench_ws_fanout [connections] [samples]
+
+Starts one uvicorn worker (in a thread) serving services/complaint_feed_services.py with
+token auth stubbed out (token == mobile number) and the LISTEN thread replaced, opens
+``connections`` idle client sockets from the same process, then publishes deltas the way
+the LISTEN thread does. Client and server share this process (and CPU), so the numbers are
+conservative; memory is the process RSS growth for both ends of every socket.
+"""
+
+import asyncio
+import resource
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from websockets.asyncio.client import connect
+
+import services.complaint_feed_services as feed_services
+from utils.complaint_feed import ComplaintFeed
+
+
+class NullListener:
+    def listen(self, channel, handler):
+        pass
+
+    def on_reconnect(self, hook):
+        pass
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    app = FastAPI()
+    app.include_router(feed_services.router)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run(connections: int, samples: int):
+    feed = ComplaintFeed(NullListener())
+    feed_services.complaint_feed = feed
+    feed_services.get_current_user = lambda token: {"phone": token}
+    port = free_port()
+    server = start_server(port)
+    url = f"ws://127.0.0.1:{port}/rs_microservice/v2/complaint/ws"
+    mobiles = [str(9000000000 + i) for i in range(connections)]
+
+    rss_before = rss_mb()
+    gate = asyncio.Semaphore(200)
+
+    async def open_socket(mobile):
+        async with gate:
+            return await connect(f"{url}?token={mobile}", ping_interval=None, max_queue=4)
+
+    started = time.perf_counter()
+    sockets = await asyncio.gather(*(open_socket(mobile) for mobile in mobiles))
+    while feed.subscriber_count() < connections:
+        await asyncio.sleep(0.05)
+    connect_time = time.perf_counter() - started
+    rss_after = rss_mb()
+
+    def event(mobile, complain_id):
+        return {"op": "update", "complain_id": complain_id, "mobile_number": mobile,
+                "previous_status": "pending", "complain_status": "in_progress"}
+
+    # Single-target latency with every other socket idle
+    latencies = []
+    for i in range(samples):
+        index = (i * 7919) % connections
+        sent = time.perf_counter()
+        threading.Thread(target=feed.publish, args=(event(mobiles[index], i),)).start()
+        await sockets[index].recv()
+        latencies.append((time.perf_counter() - sent) * 1000)
+
+    # Burst: one transition for every connected passenger, published from the listener side
+    started = time.perf_counter()
+    publisher = threading.Thread(target=lambda: [feed.publish(event(mobile, n)) for n, mobile in enumerate(mobiles)])
+    publisher.start()
+    await asyncio.gather(*(ws.recv() for ws in sockets))
+    burst_time = time.perf_counter() - started
+    publisher.join()
+
+    await asyncio.gather(*(ws.close() for ws in sockets))
+    server.should_exit = True
+
+    latencies.sort()
+    print(f"{connections} idle sockets on one worker")
+    print(f"  connect + subscribe : {connect_time:6.2f} s ({connections / connect_time:,.0f} conn/s)")
+    print(f"  memory              : {rss_after - rss_before:6.1f} MB ({(rss_after - rss_before) * 1024 / connections:.1f} KB per socket, both ends)")
+    print(f"  single push latency : p50 {statistics.median(latencies):.2f} ms, p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms ({samples} samples)")
+    print(f"  burst fan-out       : {connections} pushes in {burst_time * 1000:.0f} ms ({connections / burst_time:,.0f} msg/s)")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    connections = args[0] if args else 2000
+    samples = args[1] if len(args) > 1 else 200
+    asyncio.run(run(connections, samples))
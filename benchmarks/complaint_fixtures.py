@@ -0,0 +1,63 @@
+"""Synthetic complaint payloads shaped like a busy day on the date listing endpoints."""
+
+import random
+from datetime import date, datetime, timedelta
+
+COACHES = ["A1", "B2", "B3", "S4", "S7", "M1", "G2", "H1", "C1", "D3"]
+STATUSES = ["pending", "in_progress", "completed"]
+COMPLAIN_TYPES = ["cleaning", "linen", "water", "electrical", "catering", "other"]
+
+
+def make_complaint_day(count: int = 500, seed: int = 7, day: date = date(2025, 10, 16)):
+    """Return ``count`` complaint documents as the service layer produces them"""
+    rng = random.Random(seed)
+    start = datetime.combine(day, datetime.min.time())
+    complaints = []
+    for complain_id in range(100000, 100000 + count):
+        created_at = start + timedelta(seconds=rng.randint(0, 86399))
+        media = [
+            {
+                "id": complain_id * 10 + i,
+                "media_type": rng.choice(["image", "video"]),
+                "media_url": f"https://storage.googleapis.com/sanchalak-media-bucket1/rail_sathi/{complain_id}/{i}.jpg",
+                "created_at": created_at,
+                "updated_at": created_at,
+                "created_by": "passenger",
+                "updated_by": "passenger",
+            }
+            for i in range(rng.randint(0, 3))
+        ]
+        complaints.append({
+            "complain_id": complain_id,
+            "pnr_number": str(rng.randint(10 ** 9, 10 ** 10 - 1)),
+            "is_pnr_validated": "not-attempted",
+            "name": f"Passenger {complain_id}",
+            "mobile_number": str(rng.randint(6 * 10 ** 9, 10 ** 10 - 1)),
+            "complain_type": rng.choice(COMPLAIN_TYPES),
+            "complain_description": "Coach toilet not cleaned since departure, water tank empty. " * rng.randint(1, 4),
+            "complain_date": day,
+            "complain_status": rng.choice(STATUSES),
+            "train_id": rng.randint(1, 4000),
+            "train_number": str(rng.randint(12001, 22999)),
+            "train_name": "SUPERFAST EXPRESS",
+            "coach": rng.choice(COACHES),
+            "berth_no": rng.randint(1, 72),
+            "created_at": created_at,
+            "created_by": f"Passenger {complain_id}",
+            "updated_at": created_at + timedelta(minutes=rng.randint(0, 600)),
+            "updated_by": "ehk",
+            "train_depot": "NDLS",
+            "customer_care": None,
+            "rail_sathi_complain_media_files": media,
+            "support_contact": {
+                "ehk_name": "Ramesh Kumar",
+                "ehk_phone": "9876543210",
+                "ca_name": "Suresh Singh",
+                "ca_phone": "9123456780",
+            },
+        })
+    return complaints
+
+
+def wrap(complaints):
+    return [{"message": "Complaint retrieved successfully", "data": complaint} for complaint in complaints]
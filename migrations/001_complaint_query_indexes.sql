@@ -0,0 +1,39 @@
+-- 001_complaint_query_indexes.sql
+--
+-- Indexes backing the complaint read paths in services/unauth_api_services.py.
+-- The matching predicates are kept sargable in code: half-open created_at ranges
+-- instead of DATE(created_at), and no casts on the indexed complaint columns.
+-- tests/test_query_plans.py fails if a hot query falls back to a sequential scan.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block:
+--   psql "$DATABASE_URL" -f migrations/001_complaint_query_indexes.sql
+
+-- Date listings (all trains) and keyset pagination on (created_at, complain_id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS rs_complain_created_at_id_idx
+    ON rail_sathi_railsathicomplain (created_at DESC, complain_id DESC);
+
+-- Date listings scoped to a user's depot trains: c.train_number = ANY(%s)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS rs_complain_train_created_at_idx
+    ON rail_sathi_railsathicomplain (train_number, created_at DESC, complain_id DESC);
+
+-- Passenger listing: c.complain_date = %s AND c.mobile_number = %s
+CREATE INDEX CONCURRENTLY IF NOT EXISTS rs_complain_mobile_complain_date_idx
+    ON rail_sathi_railsathicomplain (mobile_number, complain_date);
+
+-- Media aggregation per complaint (LATERAL json_agg)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS rs_complainmedia_complain_id_idx
+    ON rail_sathi_railsathicomplainmedia (complain_id, id);
+
+-- Complaint -> train join on the text train key: c.train_number = t.train_no::text
+CREATE INDEX CONCURRENTLY IF NOT EXISTS trains_traindetails_train_no_text_idx
+    ON trains_traindetails ((train_no::text));
+
+-- Depot -> trains scope resolution and depot lookups by train_no
+CREATE INDEX CONCURRENTLY IF NOT EXISTS trains_traindetails_depot_idx
+    ON trains_traindetails ("Depot");
+CREATE INDEX CONCURRENTLY IF NOT EXISTS trains_traindetails_train_no_idx
+    ON trains_traindetails (train_no);
+
+-- User -> depots resolution by phone
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_onboarding_user_phone_idx
+    ON user_onboarding_user (phone);
@@ -0,0 +1,32 @@
+-- 002_complaint_change_notify.sql
+--
+-- Publishes a compact delta on channel rs_complaint_changes for every insert/update of
+-- rail_sathi_railsathicomplain. utils/complaint_feed.py LISTENs on it and fans the
+-- deltas out to the live feed subscribers (services/complaint_feed_services.py).
+-- NOTIFY payloads are capped at 8000 bytes, so free text is deliberately left out.
+--
+--   psql "$DATABASE_URL" -f migrations/002_complaint_change_notify.sql
+
+CREATE OR REPLACE FUNCTION rs_complaint_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('rs_complaint_changes', json_build_object(
+        'op', lower(TG_OP),
+        'complain_id', NEW.complain_id,
+        'train_number', NEW.train_number,
+        'coach', NEW.coach,
+        'berth_no', NEW.berth_no,
+        'complain_type', NEW.complain_type,
+        'complain_status', NEW.complain_status,
+        'mobile_number', NEW.mobile_number,
+        'complain_date', NEW.complain_date,
+        'created_at', NEW.created_at,
+        'updated_at', NEW.updated_at
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rs_complaint_notify_trg ON rail_sathi_railsathicomplain;
+CREATE TRIGGER rs_complaint_notify_trg
+    AFTER INSERT OR UPDATE ON rail_sathi_railsathicomplain
+    FOR EACH ROW EXECUTE FUNCTION rs_complaint_notify();
@@ -0,0 +1,60 @@
+-- 003_complaint_status_media_notify.sql
+--
+-- Extends the rs_complaint_changes deltas (see 002) for passenger status tracking:
+--   * complaint updates carry previous_status, so listeners can tell status transitions
+--     from other edits without a lookup;
+--   * new media rows publish an op = 'media' delta with the parent's mobile/train keys.
+--
+--   psql "$DATABASE_URL" -f migrations/003_complaint_status_media_notify.sql
+
+CREATE OR REPLACE FUNCTION rs_complaint_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('rs_complaint_changes', json_build_object(
+        'op', lower(TG_OP),
+        'complain_id', NEW.complain_id,
+        'train_number', NEW.train_number,
+        'coach', NEW.coach,
+        'berth_no', NEW.berth_no,
+        'complain_type', NEW.complain_type,
+        'complain_status', NEW.complain_status,
+        'previous_status', CASE WHEN TG_OP = 'UPDATE' THEN OLD.complain_status END,
+        'mobile_number', NEW.mobile_number,
+        'complain_date', NEW.complain_date,
+        'created_at', NEW.created_at,
+        'updated_at', NEW.updated_at
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rs_complaint_media_notify() RETURNS trigger AS $$
+DECLARE
+    parent RECORD;
+BEGIN
+    SELECT c.train_number, c.mobile_number, c.complain_status
+      INTO parent
+      FROM rail_sathi_railsathicomplain c
+     WHERE c.complain_id = NEW.complain_id;
+
+    PERFORM pg_notify('rs_complaint_changes', json_build_object(
+        'op', 'media',
+        'complain_id', NEW.complain_id,
+        'train_number', parent.train_number,
+        'mobile_number', parent.mobile_number,
+        'complain_status', parent.complain_status,
+        'media', json_build_object(
+            'id', NEW.id,
+            'media_type', NEW.media_type,
+            'media_url', NEW.media_url,
+            'created_at', NEW.created_at
+        ),
+        'updated_at', NEW.created_at
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rs_complaint_media_notify_trg ON rail_sathi_railsathicomplainmedia;
+CREATE TRIGGER rs_complaint_media_notify_trg
+    AFTER INSERT ON rail_sathi_railsathicomplainmedia
+    FOR EACH ROW EXECUTE FUNCTION rs_complaint_media_notify();
@@ -0,0 +1,32 @@
+-- 004_complaint_search.sql
+--
+-- Full-text search over complaints (services/complaint_search_services.py).
+--
+-- search_vector is a stored generated column, so Postgres keeps it current on every
+-- insert/update without a trigger, and backfilling does not fire the change-notify
+-- trigger from 002 for every historical row. The 'simple' configuration is used on
+-- purpose: descriptions mix English, Hindi and transliterated text, which an English
+-- stemmer would mangle.
+--
+-- Adding a stored generated column rewrites the table under an ACCESS EXCLUSIVE lock;
+-- run the first statement in a maintenance window. The indexes are built CONCURRENTLY,
+-- so the file cannot run inside a transaction block:
+--   psql "$DATABASE_URL" -f migrations/004_complaint_search.sql
+
+ALTER TABLE rail_sathi_railsathicomplain
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(complain_type, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(complain_description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS rs_complain_search_vector_idx
+    ON rail_sathi_railsathicomplain USING GIN (search_vector);
+
+-- PNR lookups: c.pnr_number = %s
+CREATE INDEX CONCURRENTLY IF NOT EXISTS rs_complain_pnr_number_idx
+    ON rail_sathi_railsathicomplain (pnr_number);
+
+-- Coach filter: upper(c.coach) = %s (coaches are stored as entered, the filter is case-blind)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS rs_complain_train_coach_upper_idx
+    ON rail_sathi_railsathicomplain (train_number, upper(coach), created_at DESC);
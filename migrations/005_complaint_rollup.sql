@@ -0,0 +1,71 @@
+-- 005_complaint_rollup.sql
+--
+-- Daily complaint counts by depot, train, coach prefix, complain_type and status, read by
+-- the reporting endpoint (services/complaint_report_services.py). create_complaint,
+-- update_complaint and delete_complaint apply +1/-1 deltas in their own transaction
+-- (utils/complaint_rollup.py). rs_rebuild_complaint_rollup() recomputes a date range
+-- from the complaint table, e.g. after a bulk import or a train moving depot.
+--
+--   psql "$DATABASE_URL" -f migrations/005_complaint_rollup.sql
+
+-- Leading letters of the coach ('B2' -> 'B', 'GS1' -> 'GS'); shared with the delta code
+CREATE OR REPLACE FUNCTION rs_coach_prefix(coach text) RETURNS text AS $$
+    SELECT COALESCE(substring(upper(btrim(coach)) FROM '^[A-Z]*'), '')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE TABLE IF NOT EXISTS rs_complaint_daily_rollup (
+    rollup_date      date         NOT NULL,
+    depot_code       varchar(50)  NOT NULL DEFAULT '',
+    train_number     varchar(20)  NOT NULL DEFAULT '',
+    coach_prefix     varchar(10)  NOT NULL DEFAULT '',
+    complain_type    varchar(100) NOT NULL DEFAULT '',
+    complain_status  varchar(50)  NOT NULL DEFAULT '',
+    complaint_count  integer      NOT NULL DEFAULT 0,
+    PRIMARY KEY (rollup_date, depot_code, train_number, coach_prefix, complain_type, complain_status)
+);
+
+-- Depot reports: depot_code = ANY(%s) AND rollup_date BETWEEN %s AND %s
+CREATE INDEX IF NOT EXISTS rs_complaint_daily_rollup_depot_date_idx
+    ON rs_complaint_daily_rollup (depot_code, rollup_date);
+
+-- Rollup dimensions of each complaint; the delta code reads the same view per row
+CREATE OR REPLACE VIEW rs_complaint_rollup_keys AS
+SELECT c.complain_id,
+       c.created_at,
+       c.created_at::date AS rollup_date,
+       COALESCE(t."Depot", '') AS depot_code,
+       COALESCE(c.train_number, '') AS train_number,
+       rs_coach_prefix(c.coach) AS coach_prefix,
+       COALESCE(c.complain_type, '') AS complain_type,
+       COALESCE(c.complain_status, '') AS complain_status
+FROM rail_sathi_railsathicomplain c
+LEFT JOIN LATERAL (
+    SELECT td."Depot"
+    FROM trains_traindetails td
+    WHERE td.train_no::text = c.train_number
+    LIMIT 1
+) t ON TRUE;
+
+CREATE OR REPLACE FUNCTION rs_rebuild_complaint_rollup(p_from date, p_to date) RETURNS integer AS $$
+DECLARE
+    inserted integer;
+BEGIN
+    DELETE FROM rs_complaint_daily_rollup WHERE rollup_date BETWEEN p_from AND p_to;
+
+    INSERT INTO rs_complaint_daily_rollup
+        (rollup_date, depot_code, train_number, coach_prefix, complain_type, complain_status, complaint_count)
+    SELECT k.rollup_date, k.depot_code, k.train_number, k.coach_prefix, k.complain_type, k.complain_status, COUNT(*)
+    FROM rs_complaint_rollup_keys k
+    WHERE k.created_at >= p_from AND k.created_at < p_to + 1
+    GROUP BY 1, 2, 3, 4, 5, 6;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill everything already in the table
+SELECT rs_rebuild_complaint_rollup(
+    COALESCE((SELECT MIN(created_at)::date FROM rail_sathi_railsathicomplain), CURRENT_DATE),
+    CURRENT_DATE
+);
@@ -0,0 +1,358 @@
+-- 006_complaint_partitioning.sql
+--
+-- Monthly range partitioning for rail_sathi_railsathicomplain (on created_at) and
+-- rail_sathi_railsathicomplainmedia (on its complaint's created_at), so date listings prune
+-- to one partition, a complaint's media sits in the same month as the complaint, and old
+-- months can be archived and detached (utils/complaint_archival.py).
+--
+-- What changes:
+--   * both tables are swapped for partitioned tables of the same name and columns;
+--     the originals stay behind as *_legacy until the copy has been verified;
+--   * media gains complaint_created_at, a copy of the parent complaint's created_at and the
+--     media partition key. Writers must set it on insert (the API inserts with
+--     INSERT ... SELECT c.created_at); a trigger keeps it in step when a complaint's
+--     created_at changes;
+--   * primary keys become (complain_id, created_at) / (id, complaint_created_at), since
+--     Postgres requires the partition key in every unique constraint;
+--   * complain_id / media id stay globally unique through the rs_complaint_key and
+--     rs_complaint_media_key registries, kept in step by triggers. Every foreign key that
+--     pointed at either table (media -> complaint included) is recreated, with its original
+--     options, against the matching registry. Registry rows outlive archival, so archived
+--     ids are never reused;
+--   * rs_ensure_complaint_partitions(from, to) creates month partitions for both tables;
+--     rows outside the created months land in the DEFAULT partitions and are moved into a
+--     month partition when it is created later.
+--
+-- Run in a maintenance window (the swap holds ACCESS EXCLUSIVE locks while copying):
+--   psql "$DATABASE_URL" -1 -f migrations/006_complaint_partitioning.sql
+-- then, once the row counts match:
+--   DROP TABLE rail_sathi_railsathicomplainmedia_legacy, rail_sathi_railsathicomplain_legacy;
+
+LOCK TABLE rail_sathi_railsathicomplain, rail_sathi_railsathicomplainmedia IN ACCESS EXCLUSIVE MODE;
+
+-- Foreign keys into either table cannot target the partitioned replacements (their unique
+-- keys include created_at). Remember them, drop them, and recreate them further down
+-- against the id registries. Table names are captured before the rename, so a key on the
+-- media table is recreated on the new media table.
+CREATE TEMP TABLE rs_inbound_fks ON COMMIT DROP AS
+SELECT conrelid::regclass::text AS table_name,
+       conname,
+       confrelid::regclass::text AS referenced_table,
+       pg_get_constraintdef(oid) AS definition
+FROM pg_constraint
+WHERE contype = 'f'
+  AND confrelid IN ('rail_sathi_railsathicomplain'::regclass, 'rail_sathi_railsathicomplainmedia'::regclass);
+
+DO $$
+DECLARE
+    fk RECORD;
+BEGIN
+    FOR fk IN SELECT * FROM rs_inbound_fks LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.table_name, fk.conname);
+    END LOOP;
+END;
+$$;
+
+-- The partition keys must be NOT NULL
+UPDATE rail_sathi_railsathicomplain SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL;
+
+DO $$
+BEGIN
+    EXECUTE format(
+        'ALTER TABLE rail_sathi_railsathicomplainmedia ADD COLUMN IF NOT EXISTS complaint_created_at %s',
+        (SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+          WHERE attrelid = 'rail_sathi_railsathicomplain'::regclass AND attname = 'created_at')
+    );
+END;
+$$;
+UPDATE rail_sathi_railsathicomplainmedia m
+   SET complaint_created_at = c.created_at
+  FROM rail_sathi_railsathicomplain c
+ WHERE c.complain_id = m.complain_id;
+-- Media without a complaint keeps its own timestamp
+UPDATE rail_sathi_railsathicomplainmedia
+   SET complaint_created_at = COALESCE(created_at, updated_at, now())
+ WHERE complaint_created_at IS NULL;
+
+ALTER TABLE rail_sathi_railsathicomplain RENAME TO rail_sathi_railsathicomplain_legacy;
+ALTER TABLE rail_sathi_railsathicomplainmedia RENAME TO rail_sathi_railsathicomplainmedia_legacy;
+
+CREATE TABLE rail_sathi_railsathicomplain (
+    LIKE rail_sathi_railsathicomplain_legacy INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED
+) PARTITION BY RANGE (created_at);
+ALTER TABLE rail_sathi_railsathicomplain ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE rail_sathi_railsathicomplain ADD PRIMARY KEY (complain_id, created_at);
+
+CREATE TABLE rail_sathi_railsathicomplainmedia (
+    LIKE rail_sathi_railsathicomplainmedia_legacy INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED
+) PARTITION BY RANGE (complaint_created_at);
+ALTER TABLE rail_sathi_railsathicomplainmedia ALTER COLUMN complaint_created_at SET NOT NULL;
+ALTER TABLE rail_sathi_railsathicomplainmedia ADD PRIMARY KEY (id, complaint_created_at);
+
+CREATE TABLE IF NOT EXISTS rail_sathi_railsathicomplain_default
+    PARTITION OF rail_sathi_railsathicomplain DEFAULT;
+CREATE TABLE IF NOT EXISTS rail_sathi_railsathicomplainmedia_default
+    PARTITION OF rail_sathi_railsathicomplainmedia DEFAULT;
+
+-- Postgres refuses to create a month partition while DEFAULT holds rows of that month, so
+-- such a month is created with DEFAULT detached: the rows are moved into the new partition
+-- and DEFAULT is attached again (both steps lock the parent briefly).
+CREATE OR REPLACE FUNCTION rs_ensure_complaint_partitions(p_from date, p_to date) RETURNS integer AS $$
+DECLARE
+    month_start date := date_trunc('month', p_from)::date;
+    month_end date;
+    created integer := 0;
+    spec RECORD;
+    parent text;
+    partition text;
+    default_partition text;
+    columns text;
+    stranded boolean;
+BEGIN
+    WHILE month_start <= p_to LOOP
+        month_end := (month_start + interval '1 month')::date;
+        FOR spec IN
+            SELECT * FROM (VALUES ('rail_sathi_railsathicomplain', 'created_at'),
+                                  ('rail_sathi_railsathicomplainmedia', 'complaint_created_at')) AS t(parent, key_column)
+        LOOP
+            parent := spec.parent;
+            partition := format('%s_y%sm%s', parent, to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+            CONTINUE WHEN to_regclass(partition) IS NOT NULL;
+
+            default_partition := parent || '_default';
+            EXECUTE format(
+                'SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                default_partition, spec.key_column, month_start, spec.key_column, month_end
+            ) INTO stranded;
+
+            IF stranded THEN
+                EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, default_partition);
+            END IF;
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                partition, parent, month_start, month_end
+            );
+            IF stranded THEN
+                SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+                  INTO columns
+                  FROM information_schema.columns
+                 WHERE table_schema = current_schema() AND table_name = parent AND is_generated = 'NEVER';
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING %s) '
+                    'INSERT INTO %I (%s) OVERRIDING SYSTEM VALUE SELECT %s FROM moved',
+                    default_partition, spec.key_column, month_start, spec.key_column, month_end,
+                    columns, partition, columns, columns
+                );
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', parent, default_partition);
+            END IF;
+            created := created + 1;
+        END LOOP;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rs_ensure_complaint_partitions(
+    LEAST(
+        COALESCE((SELECT MIN(created_at)::date FROM rail_sathi_railsathicomplain_legacy), CURRENT_DATE),
+        COALESCE((SELECT MIN(complaint_created_at)::date FROM rail_sathi_railsathicomplainmedia_legacy), CURRENT_DATE)
+    ),
+    (CURRENT_DATE + interval '3 months')::date
+);
+
+-- Copy every column Postgres lets us write (search_vector is generated)
+DO $$
+DECLARE
+    source text;
+    target text;
+    columns text;
+BEGIN
+    FOREACH target IN ARRAY ARRAY['rail_sathi_railsathicomplain', 'rail_sathi_railsathicomplainmedia'] LOOP
+        source := target || '_legacy';
+        SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+          INTO columns
+          FROM information_schema.columns
+         WHERE table_schema = current_schema() AND table_name = target AND is_generated = 'NEVER';
+        EXECUTE format('INSERT INTO %I (%s) OVERRIDING SYSTEM VALUE SELECT %s FROM %I', target, columns, columns, source);
+    END LOOP;
+END;
+$$;
+
+-- Keep ids increasing: identity columns got fresh sequences, serial ones move ownership
+DO $$
+DECLARE
+    spec RECORD;
+    seq text;
+BEGIN
+    FOR spec IN
+        SELECT * FROM (VALUES ('rail_sathi_railsathicomplain', 'complain_id'),
+                              ('rail_sathi_railsathicomplainmedia', 'id')) AS t(table_name, column_name)
+    LOOP
+        seq := pg_get_serial_sequence(spec.table_name, spec.column_name);
+        IF seq IS NULL THEN
+            seq := pg_get_serial_sequence(spec.table_name || '_legacy', spec.column_name);
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', seq, spec.table_name, spec.column_name);
+        END IF;
+        EXECUTE format(
+            'SELECT setval(%L, COALESCE((SELECT MAX(%I) FROM %I), 0) + 1, false)',
+            seq, spec.column_name, spec.table_name
+        );
+    END LOOP;
+END;
+$$;
+
+-- Id registries: the primary keys give complain_id / media id the global uniqueness the
+-- partitioned tables cannot enforce, and are what foreign keys into either table reference
+CREATE TABLE IF NOT EXISTS rs_complaint_key (complain_id bigint PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS rs_complaint_media_key (id bigint PRIMARY KEY);
+INSERT INTO rs_complaint_key (complain_id) SELECT complain_id FROM rail_sathi_railsathicomplain;
+INSERT INTO rs_complaint_media_key (id) SELECT id FROM rail_sathi_railsathicomplainmedia;
+
+-- Trigger arguments: parent table, registry table, id column (same name in both).
+-- An UPDATE that moves a row to another month runs as DELETE + INSERT; by the time these
+-- AFTER triggers fire the row is already in its new partition, so the DELETE keeps the
+-- registry row and the INSERT finds exactly one copy of the id.
+CREATE OR REPLACE FUNCTION rs_partitioned_key_sync() RETURNS trigger AS $$
+DECLARE
+    parent text := TG_ARGV[0];
+    registry text := TG_ARGV[1];
+    key_column text := TG_ARGV[2];
+    old_key bigint;
+    new_key bigint;
+    registered integer;
+    copies integer;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_key := (to_jsonb(OLD) ->> key_column)::bigint;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_key := (to_jsonb(NEW) ->> key_column)::bigint;
+    END IF;
+    IF old_key IS NOT DISTINCT FROM new_key THEN
+        RETURN NULL;
+    END IF;
+
+    IF new_key IS NOT NULL THEN
+        EXECUTE format('INSERT INTO %I (%I) VALUES ($1) ON CONFLICT DO NOTHING', registry, key_column)
+            USING new_key;
+        GET DIAGNOSTICS registered = ROW_COUNT;
+        IF registered = 0 THEN
+            EXECUTE format('SELECT COUNT(*) FROM %I WHERE %I = $1', parent, key_column) INTO copies USING new_key;
+            IF copies > 1 THEN
+                RAISE EXCEPTION 'duplicate key value: %.% = %', parent, key_column, new_key
+                    USING ERRCODE = 'unique_violation';
+            END IF;
+        END IF;
+    END IF;
+
+    IF old_key IS NOT NULL THEN
+        EXECUTE format(
+            'DELETE FROM %I r WHERE r.%I = $1 AND NOT EXISTS (SELECT 1 FROM %I t WHERE t.%I = $1)',
+            registry, key_column, parent, key_column
+        ) USING old_key;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER rs_complaint_key_trg
+    AFTER INSERT OR UPDATE OF complain_id OR DELETE ON rail_sathi_railsathicomplain
+    FOR EACH ROW EXECUTE FUNCTION rs_partitioned_key_sync('rail_sathi_railsathicomplain', 'rs_complaint_key', 'complain_id');
+CREATE TRIGGER rs_complaint_media_key_trg
+    AFTER INSERT OR UPDATE OF id OR DELETE ON rail_sathi_railsathicomplainmedia
+    FOR EACH ROW EXECUTE FUNCTION rs_partitioned_key_sync('rail_sathi_railsathicomplainmedia', 'rs_complaint_media_key', 'id');
+
+-- Media follows its complaint when the complaint's created_at changes (the UPDATE moves the
+-- media rows into the complaint's new month)
+CREATE OR REPLACE FUNCTION rs_complaint_media_follow() RETURNS trigger AS $$
+BEGIN
+    UPDATE rail_sathi_railsathicomplainmedia
+       SET complaint_created_at = NEW.created_at
+     WHERE complain_id = NEW.complain_id AND complaint_created_at = OLD.created_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER rs_complaint_media_follow_trg
+    AFTER UPDATE OF created_at ON rail_sathi_railsathicomplain
+    FOR EACH ROW WHEN (NEW.created_at IS DISTINCT FROM OLD.created_at)
+    EXECUTE FUNCTION rs_complaint_media_follow();
+
+-- Recreate the inbound foreign keys (same name, columns and ON DELETE / deferrability)
+DO $$
+DECLARE
+    fk RECORD;
+    registry text;
+BEGIN
+    FOR fk IN SELECT * FROM rs_inbound_fks LOOP
+        registry := CASE WHEN fk.referenced_table = 'rail_sathi_railsathicomplain'
+                         THEN 'rs_complaint_key' ELSE 'rs_complaint_media_key' END;
+        EXECUTE format(
+            'ALTER TABLE %s ADD CONSTRAINT %I %s',
+            fk.table_name, fk.conname,
+            regexp_replace(fk.definition, 'REFERENCES [^(]+\(', format('REFERENCES %I(', registry))
+        );
+    END LOOP;
+END;
+$$;
+
+-- Indexes from 001/004, now per partition; lookups by id probe each partition's index,
+-- which archival keeps to the retention window
+CREATE INDEX IF NOT EXISTS rs_complain_p_id_idx
+    ON rail_sathi_railsathicomplain (complain_id);
+CREATE INDEX IF NOT EXISTS rs_complain_p_created_at_id_idx
+    ON rail_sathi_railsathicomplain (created_at DESC, complain_id DESC);
+CREATE INDEX IF NOT EXISTS rs_complain_p_train_created_at_idx
+    ON rail_sathi_railsathicomplain (train_number, created_at DESC, complain_id DESC);
+CREATE INDEX IF NOT EXISTS rs_complain_p_mobile_complain_date_idx
+    ON rail_sathi_railsathicomplain (mobile_number, complain_date);
+CREATE INDEX IF NOT EXISTS rs_complain_p_pnr_number_idx
+    ON rail_sathi_railsathicomplain (pnr_number);
+CREATE INDEX IF NOT EXISTS rs_complain_p_search_vector_idx
+    ON rail_sathi_railsathicomplain USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS rs_complain_p_train_coach_upper_idx
+    ON rail_sathi_railsathicomplain (train_number, upper(coach), created_at DESC);
+CREATE INDEX IF NOT EXISTS rs_complainmedia_p_complain_id_idx
+    ON rail_sathi_railsathicomplainmedia (complain_id, id);
+
+-- Triggers from 002/003 stayed on the legacy tables
+DROP TRIGGER IF EXISTS rs_complaint_notify_trg ON rail_sathi_railsathicomplain_legacy;
+DROP TRIGGER IF EXISTS rs_complaint_media_notify_trg ON rail_sathi_railsathicomplainmedia_legacy;
+CREATE TRIGGER rs_complaint_notify_trg
+    AFTER INSERT OR UPDATE ON rail_sathi_railsathicomplain
+    FOR EACH ROW EXECUTE FUNCTION rs_complaint_notify();
+CREATE TRIGGER rs_complaint_media_notify_trg
+    AFTER INSERT ON rail_sathi_railsathicomplainmedia
+    FOR EACH ROW EXECUTE FUNCTION rs_complaint_media_notify();
+
+-- The rollup view (005) is bound to the legacy table; rebind it by name
+CREATE OR REPLACE VIEW rs_complaint_rollup_keys AS
+SELECT c.complain_id,
+       c.created_at,
+       c.created_at::date AS rollup_date,
+       COALESCE(t."Depot", '') AS depot_code,
+       COALESCE(c.train_number, '') AS train_number,
+       rs_coach_prefix(c.coach) AS coach_prefix,
+       COALESCE(c.complain_type, '') AS complain_type,
+       COALESCE(c.complain_status, '') AS complain_status
+FROM rail_sathi_railsathicomplain c
+LEFT JOIN LATERAL (
+    SELECT td."Depot"
+    FROM trains_traindetails td
+    WHERE td.train_no::text = c.train_number
+    LIMIT 1
+) t ON TRUE;
+
+-- Archived months (written by utils/complaint_archival.py)
+CREATE TABLE IF NOT EXISTS rs_complaint_archive (
+    partition_month  date         PRIMARY KEY,
+    file_path        text         NOT NULL,
+    complaint_count  integer      NOT NULL,
+    media_count      integer      NOT NULL,
+    min_complain_id  bigint,
+    max_complain_id  bigint,
+    archived_at      timestamptz  NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS rs_complaint_archive_id_range_idx
+    ON rs_complaint_archive (min_complain_id, max_complain_id);
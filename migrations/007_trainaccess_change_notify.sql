@@ -0,0 +1,43 @@
+-- 007_trainaccess_change_notify.sql
+--
+-- Publishes {"user_id": ...} on channel rs_trainaccess_changes whenever a user's train
+-- assignments change, or a user's contact details / status change. The per-process
+-- support-contact index (utils/train_assignment_index.py) re-reads just those users
+-- instead of rescanning trains_trainaccess on every complaint listing.
+--
+--   psql "$DATABASE_URL" -f migrations/007_trainaccess_change_notify.sql
+
+CREATE OR REPLACE FUNCTION rs_trainaccess_notify() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('rs_trainaccess_changes', json_build_object('user_id', OLD.user_id)::text);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.user_id IS DISTINCT FROM OLD.user_id) THEN
+        PERFORM pg_notify('rs_trainaccess_changes', json_build_object('user_id', NEW.user_id)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rs_trainaccess_notify_trg ON trains_trainaccess;
+CREATE TRIGGER rs_trainaccess_notify_trg
+    AFTER INSERT OR UPDATE OR DELETE ON trains_trainaccess
+    FOR EACH ROW EXECUTE FUNCTION rs_trainaccess_notify();
+
+-- Name, phone and status are part of the indexed contact
+CREATE OR REPLACE FUNCTION rs_trainaccess_user_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('rs_trainaccess_changes', json_build_object('user_id', NEW.id)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rs_trainaccess_user_notify_trg ON user_onboarding_user;
+CREATE TRIGGER rs_trainaccess_user_notify_trg
+    AFTER UPDATE OF phone, first_name, last_name, user_status ON user_onboarding_user
+    FOR EACH ROW
+    WHEN (OLD.phone IS DISTINCT FROM NEW.phone
+          OR OLD.first_name IS DISTINCT FROM NEW.first_name
+          OR OLD.last_name IS DISTINCT FROM NEW.last_name
+          OR OLD.user_status IS DISTINCT FROM NEW.user_status)
+    EXECUTE FUNCTION rs_trainaccess_user_notify();
@@ -0,0 +1,24 @@
+-- 008_traindetails_change_notify.sql
+--
+-- Publishes {"train_no": ...} on channel rs_traindetails_changes when a train's journey
+-- metadata changes, so the process-wide journey cache (utils/train_journey_utils.py)
+-- re-reads just that train instead of waiting for its TTL.
+--
+--   psql "$DATABASE_URL" -f migrations/008_traindetails_change_notify.sql
+
+CREATE OR REPLACE FUNCTION rs_traindetails_notify() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('rs_traindetails_changes', json_build_object('train_no', OLD.train_no)::text);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.train_no IS DISTINCT FROM OLD.train_no) THEN
+        PERFORM pg_notify('rs_traindetails_changes', json_build_object('train_no', NEW.train_no)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rs_traindetails_notify_trg ON trains_traindetails;
+CREATE TRIGGER rs_traindetails_notify_trg
+    AFTER INSERT OR DELETE OR UPDATE OF train_no, journey_duration_days, end_time ON trains_traindetails
+    FOR EACH ROW EXECUTE FUNCTION rs_traindetails_notify();
@@ -0,0 +1,117 @@
+-- 009_trainaccess_assignment.sql
+--
+-- Relational copy of the trains_trainaccess.train_details JSON blobs: one row per
+-- (access row, train, origin date, role, coach). Assigned-staff resolution
+-- (utils/email_utils.py, utils/train_assignment_index.py) queries it by
+-- (train_no, origin_date) instead of fetching and parsing every enabled user's blob.
+--
+-- train_no is canonical (leading zeros stripped), coach is trimmed upper case ('' for
+-- assignments without coaches) and coach_count is the number of coaches in the original
+-- assignment entry (a CA owns a coach only when it is their single coach).
+--
+-- A trigger keeps the table in sync with trains_trainaccess; rs_rebuild_trainaccess_assignments()
+-- recomputes everything (used for the backfill below and after bulk imports).
+--
+--   psql "$DATABASE_URL" -f migrations/009_trainaccess_assignment.sql
+
+CREATE TABLE IF NOT EXISTS trains_trainaccess_assignment (
+    access_id    integer      NOT NULL,
+    user_id      integer      NOT NULL,
+    train_no     varchar(20)  NOT NULL,
+    origin_date  date         NOT NULL,
+    role         varchar(20)  NOT NULL DEFAULT '',
+    coach        varchar(20)  NOT NULL DEFAULT '',
+    coach_count  smallint     NOT NULL DEFAULT 0,
+    PRIMARY KEY (access_id, train_no, origin_date, role, coach)
+);
+
+-- Staff of a train around a date: train_no = %s AND origin_date BETWEEN %s AND %s
+CREATE INDEX IF NOT EXISTS trains_trainaccess_assignment_train_date_idx
+    ON trains_trainaccess_assignment (train_no, origin_date);
+-- Per-user refresh of the in-process index
+CREATE INDEX IF NOT EXISTS trains_trainaccess_assignment_user_idx
+    ON trains_trainaccess_assignment (user_id);
+
+CREATE OR REPLACE FUNCTION rs_sync_trainaccess_assignments(p_access_id integer, p_user_id integer, p_details text)
+RETURNS integer AS $$
+DECLARE
+    details jsonb;
+    inserted integer;
+BEGIN
+    DELETE FROM trains_trainaccess_assignment WHERE access_id = p_access_id;
+    IF p_details IS NULL OR p_user_id IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    BEGIN
+        details := p_details::jsonb;
+    EXCEPTION WHEN others THEN
+        RAISE WARNING 'trains_trainaccess % has unreadable train_details, skipped', p_access_id;
+        RETURN 0;
+    END;
+    IF jsonb_typeof(details) <> 'object' THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO trains_trainaccess_assignment (access_id, user_id, train_no, origin_date, role, coach, coach_count)
+    SELECT p_access_id,
+           p_user_id,
+           COALESCE(NULLIF(ltrim(btrim(train.key), '0'), ''), '0'),
+           to_date(entry.value->>'origin_date', 'YYYY-MM-DD'),
+           COALESCE(entry.value->>'ut', ''),
+           COALESCE(upper(btrim(coach.coach)), ''),
+           CASE WHEN jsonb_typeof(entry.value->'coach_numbers') = 'array'
+                THEN jsonb_array_length(entry.value->'coach_numbers') ELSE 0 END
+    FROM jsonb_each(details) train
+    CROSS JOIN LATERAL jsonb_array_elements(
+        CASE WHEN jsonb_typeof(train.value) = 'array' THEN train.value ELSE '[]'::jsonb END
+    ) entry
+    LEFT JOIN LATERAL jsonb_array_elements_text(
+        CASE WHEN jsonb_typeof(entry.value->'coach_numbers') = 'array'
+             THEN entry.value->'coach_numbers' ELSE '[]'::jsonb END
+    ) coach(coach) ON TRUE
+    WHERE jsonb_typeof(entry.value) = 'object'
+      AND entry.value->>'origin_date' ~ '^\d{4}-\d{2}-\d{2}$'
+    ON CONFLICT DO NOTHING;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+EXCEPTION WHEN datetime_field_overflow OR invalid_datetime_format THEN
+    RAISE WARNING 'trains_trainaccess % has an invalid origin_date, skipped', p_access_id;
+    DELETE FROM trains_trainaccess_assignment WHERE access_id = p_access_id;
+    RETURN 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rs_trainaccess_assignment_trg() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM trains_trainaccess_assignment WHERE access_id = OLD.id;
+    ELSE
+        PERFORM rs_sync_trainaccess_assignments(NEW.id, NEW.user_id, NEW.train_details::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fires before rs_trainaccess_notify_trg (triggers run in name order); the notification is
+-- delivered at commit either way, when the shadow rows are visible
+DROP TRIGGER IF EXISTS rs_trainaccess_assignment_sync_trg ON trains_trainaccess;
+CREATE TRIGGER rs_trainaccess_assignment_sync_trg
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, train_details ON trains_trainaccess
+    FOR EACH ROW EXECUTE FUNCTION rs_trainaccess_assignment_trg();
+
+CREATE OR REPLACE FUNCTION rs_rebuild_trainaccess_assignments() RETURNS integer AS $$
+DECLARE
+    access RECORD;
+    total integer := 0;
+BEGIN
+    TRUNCATE trains_trainaccess_assignment;
+    FOR access IN SELECT id, user_id, train_details::text AS train_details FROM trains_trainaccess LOOP
+        total := total + rs_sync_trainaccess_assignments(access.id, access.user_id, access.train_details);
+    END LOOP;
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rs_rebuild_trainaccess_assignments();
@@ -0,0 +1,39 @@
+-- 010_support_contact_snapshot.sql
+--
+-- Support contacts and notification recipients precomputed once staffing is final, i.e.
+-- after charting (trains_traindetails.charting_time / charting_day), by
+-- utils/support_contact_snapshot.py. One row per (service date, train, coach) for every day
+-- a charted run is on the move:
+--   ehk_* / ca_*   the same contacts the complaint listings attach (ca_* only for exact-match coaches)
+--   recipients     [{"user_id": ..., "origin_date": "YYYY-MM-DD"}, ...] staff assigned to the
+--                  coach whose run can cover the service date; the last-day end-time cutoff is
+--                  applied when a notification is sent
+-- train_no is canonical (leading zeros stripped) and coach trimmed upper case, as in
+-- trains_trainaccess_assignment (migrations/009).
+--
+-- rs_support_contact_snapshot_run records which (train, origin date) runs were computed so
+-- the job does each run once.
+--
+--   psql "$DATABASE_URL" -f migrations/010_support_contact_snapshot.sql
+
+CREATE TABLE IF NOT EXISTS rs_support_contact_snapshot (
+    service_date  date         NOT NULL,
+    train_no      varchar(20)  NOT NULL,
+    coach         varchar(20)  NOT NULL,
+    ehk_name      text         NOT NULL DEFAULT '',
+    ehk_phone     varchar(20)  NOT NULL DEFAULT '',
+    ca_name       text         NOT NULL DEFAULT '',
+    ca_phone      varchar(20)  NOT NULL DEFAULT '',
+    recipients    jsonb        NOT NULL DEFAULT '[]',
+    computed_at   timestamptz  NOT NULL DEFAULT now(),
+    PRIMARY KEY (service_date, train_no, coach)
+);
+
+CREATE TABLE IF NOT EXISTS rs_support_contact_snapshot_run (
+    train_no      varchar(20)  NOT NULL,
+    origin_date   date         NOT NULL,
+    charted_at    timestamp    NOT NULL,
+    coach_count   integer      NOT NULL DEFAULT 0,
+    computed_at   timestamptz  NOT NULL DEFAULT now(),
+    PRIMARY KEY (train_no, origin_date)
+);
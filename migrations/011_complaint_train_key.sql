@@ -0,0 +1,44 @@
+-- 011_complaint_train_key.sql
+--
+-- One spelling per train number. Complaints carried '12333' as well as '012333', so every
+-- lookup probed up to three variants and the '0'-prefixed rows never matched
+-- trains_traindetails.train_no::text. rs_train_key() is the SQL twin of
+-- utils/train_keys.train_key(): trimmed, leading zeros stripped from numeric values.
+--
+-- Existing complaints are rewritten once (change notifications are suppressed for the
+-- backfill), the daily rollup is rebuilt because those rows now resolve to their depot, and
+-- a BEFORE trigger keeps writers other than this service on the canonical spelling.
+--
+-- Run in a single transaction:
+--   psql "$DATABASE_URL" -1 -f migrations/011_complaint_train_key.sql
+
+CREATE OR REPLACE FUNCTION rs_train_key(train_no text) RETURNS text AS $$
+    SELECT CASE WHEN btrim(train_no) ~ '^[0-9]+$'
+                THEN COALESCE(NULLIF(ltrim(btrim(train_no), '0'), ''), '0')
+                ELSE btrim(train_no) END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION rs_complaint_train_key() RETURNS trigger AS $$
+BEGIN
+    NEW.train_number := rs_train_key(NEW.train_number);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE rail_sathi_railsathicomplain DISABLE TRIGGER rs_complaint_notify_trg;
+
+UPDATE rail_sathi_railsathicomplain
+SET train_number = rs_train_key(train_number)
+WHERE train_number IS DISTINCT FROM rs_train_key(train_number);
+
+ALTER TABLE rail_sathi_railsathicomplain ENABLE TRIGGER rs_complaint_notify_trg;
+
+DROP TRIGGER IF EXISTS rs_complaint_train_key_trg ON rail_sathi_railsathicomplain;
+CREATE TRIGGER rs_complaint_train_key_trg
+    BEFORE INSERT OR UPDATE OF train_number ON rail_sathi_railsathicomplain
+    FOR EACH ROW EXECUTE FUNCTION rs_complaint_train_key();
+
+SELECT rs_rebuild_complaint_rollup(
+    COALESCE((SELECT MIN(created_at)::date FROM rail_sathi_railsathicomplain), CURRENT_DATE),
+    CURRENT_DATE
+);
@@ -1,5 +1,5 @@
 import uuid
-from fastapi import APIRouter, FastAPI, HTTPException, UploadFile, File, Form, Depends ,Request,Security, APIRouter
+from fastapi import APIRouter, FastAPI, HTTPException, UploadFile, File, Form, Depends ,Request,Security, APIRouter, Query, Response
 from typing import List, Optional
 from pydantic import BaseModel, Field, EmailStr
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,10 +10,17 @@ import asyncio
 import threading
 import logging
 from services.unauth_api_services import (
-    create_complaint, get_complaint_by_id, get_complaints_by_date_username_depot,
+    create_complaint, get_complaint_by_id, get_archived_complaint, get_complaints_by_date_username_depot,
     update_complaint, delete_complaint, delete_complaint_media,
-    upload_file_thread, get_complaints_by_date_and_mobile_for_passengers, get_complaints_by_date_and_mobile
+    upload_file_thread, get_complaints_by_date_and_mobile_for_passengers, get_complaints_by_date_and_mobile,
+    encode_complaint_cursor, decode_complaint_cursor, COMPLAINT_PAGE_MAX_LIMIT,
+    get_complaint_version, get_complaint_listing_version, document_matches_version, get_passenger_complaints_version
 )
+from utils.json_response import json_bytes_response
+from utils.response_validation import serialize_response_list
+from utils.complaint_cache import invalidate_complaint
+from utils.http_caching import version_validators, is_not_modified, not_modified_response, set_validators
+from utils.train_keys import train_key
 
 import re, logging
 from passlib.context import CryptContext
@@ -47,15 +54,32 @@ logger = logging.getLogger("main")
 @router.get("/complaint/get/{complain_id}", response_model=RailSathiComplainResponse)
 async def get_complaint(
     complain_id: int,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user)):
     """Get complaint by ID
 
+    Supports conditional GETs via ``If-None-Match``/``If-Modified-Since`` (304 when unchanged).
+
     **created by - Asad Khan (Authentication only)**
 
     **created on - 12 sep 2025**
     """
     try:
+        version = get_complaint_version(complain_id)
+        if version:
+            etag, last_modified = version_validators(version)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            set_validators(response, etag, last_modified)
+
         complaint = get_complaint_by_id(complain_id)
+        if complaint and version and not document_matches_version(complaint, version):
+            # Cached before a write this worker did not see; serve what the validators describe
+            invalidate_complaint(complain_id)
+            complaint = get_complaint_by_id(complain_id)
+        if not complaint and not version:
+            complaint = get_archived_complaint(complain_id)
         logger.info(f"Complaint fetched: {complaint}")
 
         if not complaint:
@@ -79,10 +103,18 @@ async def get_complaint(
 @router.get("/complaint/get/date/{date_str}", response_model=List[RailSathiComplainResponse])
 async def get_complaints_by_date_endpoint(
     date_str: str,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    mobile_number: Optional[str] = None):
+    mobile_number: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=COMPLAINT_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None):
     """Get complaints by date and username
 
+    Pass ``limit`` to page through results; the ``X-Next-Cursor`` response header is the
+    ``cursor`` for the next page. Send the ``ETag`` back as ``If-None-Match`` to get a 304
+    while nothing changed.
+
     **created by - Asad Khan (Authentication only)**
 
     **created on - 12 sep 2025**
@@ -115,27 +147,39 @@ async def get_complaints_by_date_endpoint(
         # ✅ Convert to standard YYYY-MM-DD format
         normalized_date = complaint_date.strftime("%Y-%m-%d")
 
+        try:
+            after = decode_complaint_cursor(cursor) if cursor else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
         if mobile_number:
-            print("if case")
-            complaints = get_complaints_by_date_and_mobile_for_passengers(complaint_date, mobile_number)
+            version = get_passenger_complaints_version(complaint_date, mobile_number)
         else:
-            complaints = get_complaints_by_date_and_mobile(complaint_date)
+            version = get_complaint_listing_version(complaint_date)
+        if version:
+            etag, last_modified = version_validators(version)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            set_validators(response, etag, last_modified)
+
+        if mobile_number:
+            complaints = get_complaints_by_date_and_mobile_for_passengers(complaint_date, mobile_number, limit=limit, after=after)
+        else:
+            complaints = get_complaints_by_date_and_mobile(complaint_date, limit=limit, after=after)
 
         logging.info(f"complaint: {complaints}")
 
         if not complaints or len(complaints) == 0:
+            if cursor:
+                return []
             raise HTTPException(status_code=404, detail="You haven't raised any complaints on {complaint_date}".format(complaint_date=normalized_date))
 
-        # Wrap each complaint in the expected response format
-        response_list = []
-        for complaint in complaints:
-            response_list.append(RailSathiComplainResponse(
-                message="Complaint retrieved successfully",
-                data=complaint
-            ))
-        
+        if limit and len(complaints) == limit:
+            response.headers["X-Next-Cursor"] = encode_complaint_cursor(complaints[-1])
+
         logger.info(f"Fetching complaints for date={complaint_date}")
-        return response_list
+        # One validation pass over the whole page, sent as-is (no response_model re-validation)
+        return json_bytes_response(serialize_response_list(RailSathiComplainResponse, complaints), response)
         
     except HTTPException:
         raise
@@ -192,6 +236,10 @@ async def create_complaint_endpoint_threaded(
 
         if not current_user or "username" not in current_user:
             raise HTTPException(status_code=401, detail="User not authenticated")
+        # One spelling per train for the complaint row and the trains_traindetails lookups below
+        if train_number:
+            train_number = train_key(train_number)
+
         # Prepare complaint data
         complaint_data = {
             "pnr_number": pnr_number,
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from database import get_db_connection
+from services.user_profile_services import get_current_user
+from utils.complaint_feed import complaint_feed
+from utils.complaint_scope import resolve_user_train_scope
+from utils.json_response import dumps
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/rs_microservice/v2", tags=["Complaint Feed"])
+
+FEED_HEARTBEAT_SECONDS = int(os.getenv("COMPLAINT_FEED_HEARTBEAT_SECONDS", 15))
+
+# Application close codes (4000-4999) for the passenger status socket
+WS_CLOSE_UNAUTHORIZED = 4401
+WS_CLOSE_NO_MOBILE = 4403
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Render one event in text/event-stream framing"""
+    lines = [f"event: {event.get('type', 'complaint')}"]
+    if event.get("complain_id") is not None:
+        lines.append(f"id: {event['complain_id']}:{event.get('updated_at', '')}")
+    lines.append(f"data: {dumps(event).decode('utf-8')}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _resolve_feed_trains(username: str):
+    conn = get_db_connection()
+    try:
+        return resolve_user_train_scope(conn, username=username)
+    finally:
+        conn.close()
+
+
+@router.get("/complaint/feed")
+async def complaint_feed_endpoint(
+    request: Request,
+    current_user: dict = Depends(get_current_user)):
+    """Live complaint feed (server-sent events) for the caller's depot trains
+
+    Load the date listing once, then apply the ``complaint`` deltas (insert/update of
+    a complaint) pushed here. A ``resync`` event means deltas may have been missed and
+    the listing should be reloaded.
+
+    **created on - 19 oct 2026**
+    """
+    username = str(current_user.get("username"))
+    train_numbers = await run_in_threadpool(_resolve_feed_trains, username)
+    if not train_numbers:
+        raise HTTPException(status_code=404, detail="No depot trains found for this user")
+
+    subscription = complaint_feed.subscribe(("train", train_number) for train_number in train_numbers)
+    logger.info(f"Complaint feed opened for {username} over {len(train_numbers)} train numbers")
+
+    async def event_stream():
+        try:
+            yield f"retry: {FEED_HEARTBEAT_SECONDS * 1000}\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            complaint_feed.unsubscribe(subscription)
+            logger.info(f"Complaint feed closed for {username}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def passenger_update(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Reduce a complaint delta to what a tracking passenger needs, or None to skip it"""
+    if event.get("type") == "resync":
+        return {"type": "resync"}
+    op = event.get("op")
+    if op == "media":
+        return {
+            "type": "media",
+            "complain_id": event.get("complain_id"),
+            "complain_status": event.get("complain_status"),
+            "media": event.get("media"),
+        }
+    if op == "insert" or (op == "update" and event.get("previous_status") != event.get("complain_status")):
+        return {
+            "type": "status",
+            "complain_id": event.get("complain_id"),
+            "complain_status": event.get("complain_status"),
+            "previous_status": event.get("previous_status"),
+            "updated_at": event.get("updated_at"),
+        }
+    return None
+
+
+@router.websocket("/complaint/ws")
+async def complaint_status_ws(websocket: WebSocket, token: str = Query(...)):
+    """Passenger complaint tracking socket
+
+    Connect with ``?token=<access token>``. Pushes ``status`` messages when one of the
+    caller's complaints is created or changes complain_status, ``media`` messages when
+    media is attached, and ``resync`` when updates may have been missed (refetch then).
+
+    **created on - 19 oct 2026**
+    """
+    try:
+        current_user = await run_in_threadpool(get_current_user, token)
+    except HTTPException:
+        await websocket.close(code=WS_CLOSE_UNAUTHORIZED)
+        return
+
+    mobile_number = current_user.get("phone")
+    if not mobile_number:
+        await websocket.close(code=WS_CLOSE_NO_MOBILE)
+        return
+
+    await websocket.accept()
+    subscription = complaint_feed.subscribe([("mobile", str(mobile_number).strip())])
+    receive_task = asyncio.create_task(websocket.receive())
+    event_task = asyncio.create_task(subscription.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({receive_task, event_task}, return_when=asyncio.FIRST_COMPLETED)
+            if receive_task in done:
+                # Client messages carry nothing; only watch for the disconnect
+                if receive_task.result()["type"] == "websocket.disconnect":
+                    break
+                receive_task = asyncio.create_task(websocket.receive())
+            if event_task in done:
+                update = passenger_update(event_task.result())
+                if update is not None:
+                    await websocket.send_text(dumps(update).decode("utf-8"))
+                event_task = asyncio.create_task(subscription.get())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive_task.cancel()
+        event_task.cancel()
+        complaint_feed.unsubscribe(subscription)
@@ -0,0 +1,74 @@
+import logging
+import os
+from datetime import date
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+
+from database import get_db_connection, execute_query
+from services.user_profile_services import get_current_user
+from utils.complaint_rollup import REPORT_GROUPS, build_rollup_report_query
+from utils.complaint_scope import get_user_depots
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/rs_microservice/v2", tags=["Complaint Reports"])
+
+REPORT_MAX_DAYS = int(os.getenv("COMPLAINT_REPORT_MAX_DAYS", 366))
+
+
+def get_complaint_report(username: str, date_from: date, date_to: date, group_by: List[str]) -> Optional[List[Dict]]:
+    """Aggregate rollup rows for the user's depots; None when the user has no depots"""
+    conn = get_db_connection()
+    try:
+        depot_codes = get_user_depots(conn, username=username)
+        if not depot_codes:
+            return None
+        query, params = build_rollup_report_query(depot_codes, date_from, date_to, group_by)
+        return execute_query(conn, query, tuple(params)) or []
+    finally:
+        conn.close()
+
+
+@router.get("/reports/complaints")
+async def complaint_report_endpoint(
+    date_from: date,
+    date_to: Optional[date] = None,
+    group_by: str = Query("depot", description=f"Comma separated: {', '.join(REPORT_GROUPS)}"),
+    current_user: dict = Depends(get_current_user)):
+    """Complaint counts for the caller's depots, read from the daily rollup table
+
+    ``group_by`` picks the breakdown, e.g. ``depot,complain_type`` or ``date,status``.
+
+    **created on - 19 oct 2026**
+    """
+    date_to = date_to or date.today()
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to.")
+    if (date_to - date_from).days + 1 > REPORT_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Report range may span at most {REPORT_MAX_DAYS} days.")
+
+    groups = list(dict.fromkeys(group.strip() for group in group_by.split(",") if group.strip()))
+    unknown = [group for group in groups if group not in REPORT_GROUPS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by: {', '.join(unknown)}")
+
+    username = str(current_user.get("username"))
+    try:
+        rows = await run_in_threadpool(get_complaint_report, username, date_from, date_to, groups)
+    except Exception as e:
+        logger.error(f"Error building complaint report for {username}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if rows is None:
+        raise HTTPException(status_code=404, detail="No depots found for this user")
+
+    return {
+        "message": "Complaint report generated successfully",
+        "date_from": date_from,
+        "date_to": date_to,
+        "group_by": groups,
+        "total": sum(row["complaint_count"] for row in rows),
+        "rows": rows,
+    }
@@ -0,0 +1,167 @@
+import base64
+import json
+import logging
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2.errors
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+
+from database import get_db_connection, execute_query
+from services.unauth_api_services import (
+    apply_complaint_keyset, encode_complaint_cursor, decode_complaint_cursor, day_bounds
+)
+from services.user_profile_services import get_current_user
+from utils.complaint_scope import resolve_user_train_scope
+from utils.train_keys import train_key
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/rs_microservice/v2", tags=["Complaint Search"])
+
+SEARCH_DEFAULT_DAYS = int(os.getenv("COMPLAINT_SEARCH_DEFAULT_DAYS", 30))
+SEARCH_MAX_DAYS = int(os.getenv("COMPLAINT_SEARCH_MAX_DAYS", 92))
+SEARCH_MAX_LIMIT = 200
+SEARCH_STATEMENT_TIMEOUT_MS = int(os.getenv("COMPLAINT_SEARCH_STATEMENT_TIMEOUT_MS", 3000))
+
+# Hits are compact; fetch the full document via /complaint/get/{complain_id}
+SEARCH_SELECT = """
+    SELECT c.complain_id, c.pnr_number, c.train_number, c.train_name, c.coach, c.berth_no,
+           c.complain_type, c.complain_status, c.complain_date, c.created_at, c.updated_at,
+           left(c.complain_description, 200) AS description_snippet,
+           {rank_expression} AS rank
+    FROM rail_sathi_railsathicomplain c
+    WHERE {where_clause}
+"""
+
+
+def encode_search_cursor(hit: Dict) -> str:
+    raw = json.dumps([hit.get('rank'), hit.get('complain_id')], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a ranked search cursor into (rank, complain_id); raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, complain_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return float(rank), int(complain_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def build_search_query(
+    train_numbers: List[str],
+    date_from: date,
+    date_to: date,
+    text: Optional[str] = None,
+    pnr_number: Optional[str] = None,
+    train_number: Optional[str] = None,
+    coach: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Tuple[str, List]:
+    """
+    Build the search SQL. Every search is bounded by a created_at range and the caller's
+    train scope; with ``text`` hits are ranked by ts_rank_cd and paged on (rank, complain_id),
+    otherwise they are newest first and paged like the date listings.
+    """
+    where = ["c.created_at >= %s", "c.created_at < %s", "c.train_number = ANY(%s)"]
+    params: List = [day_bounds(date_from)[0], day_bounds(date_to)[1], list(train_numbers)]
+    if pnr_number:
+        where.append("c.pnr_number = %s")
+        params.append(pnr_number.strip())
+    if train_number:
+        where.append("c.train_number = %s")
+        params.append(train_key(train_number))
+    if coach:
+        where.append("upper(c.coach) = %s")  # coaches are stored as entered
+        params.append(coach.strip().upper())
+
+    if not text:
+        after = decode_complaint_cursor(cursor) if cursor else None
+        where_clause, params = apply_complaint_keyset(" AND ".join(where), params, after)
+        query = SEARCH_SELECT.format(rank_expression="NULL::real", where_clause=where_clause)
+        return f"{query} ORDER BY c.created_at DESC, c.complain_id DESC LIMIT %s", params + [limit]
+
+    ts_query = "websearch_to_tsquery('simple', %s)"
+    where.append(f"c.search_vector @@ {ts_query}")
+    params.append(text)
+    query = SEARCH_SELECT.format(
+        rank_expression=f"ts_rank_cd(c.search_vector, {ts_query})",
+        where_clause=" AND ".join(where)
+    )
+    params = [text] + params  # rank_expression placeholder comes first in the SQL
+    query = f"SELECT * FROM ({query}) hits"
+    if cursor:
+        rank, complain_id = decode_search_cursor(cursor)
+        query += " WHERE (hits.rank, hits.complain_id) < (%s::real, %s)"
+        params += [rank, complain_id]
+    return f"{query} ORDER BY hits.rank DESC, hits.complain_id DESC LIMIT %s", params + [limit]
+
+
+def search_complaints(username: str, date_from: date, date_to: date, limit: int, cursor: Optional[str] = None,
+                      **filters) -> List[Dict]:
+    """Run a bounded complaint search within the user's depot trains"""
+    conn = get_db_connection()
+    try:
+        train_numbers = resolve_user_train_scope(conn, username=username)
+        if not train_numbers:
+            return []
+        query, params = build_search_query(train_numbers, date_from, date_to, limit=limit, cursor=cursor, **filters)
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL statement_timeout = %s", (SEARCH_STATEMENT_TIMEOUT_MS,))
+        return execute_query(conn, query, tuple(params)) or []
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@router.get("/complaint/search")
+async def search_complaints_endpoint(
+    response: Response,
+    q: Optional[str] = Query(None, min_length=2, max_length=200, description="Words or \"quoted phrases\" in type/description"),
+    pnr_number: Optional[str] = None,
+    train_number: Optional[str] = None,
+    coach: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(50, ge=1, le=SEARCH_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)):
+    """Search complaints of the caller's depot trains
+
+    Full-text ``q`` results are ranked by relevance; without ``q`` the filters return the
+    newest complaints first. The range defaults to the last 30 days and may span at most
+    92 days. The ``X-Next-Cursor`` response header is the ``cursor`` for the next page.
+
+    **created on - 19 oct 2026**
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=SEARCH_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to.")
+    if (date_to - date_from).days + 1 > SEARCH_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Search range may span at most {SEARCH_MAX_DAYS} days.")
+
+    username = str(current_user.get("username"))
+    try:
+        hits = await run_in_threadpool(
+            search_complaints, username, date_from, date_to, limit, cursor,
+            text=q, pnr_number=pnr_number, train_number=train_number, coach=coach
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    except psycopg2.errors.QueryCanceled:
+        logger.warning(f"Complaint search timed out for {username}: q={q!r} {date_from}..{date_to}")
+        raise HTTPException(status_code=503, detail="Search took too long. Narrow the date range or add filters.")
+    except Exception as e:
+        logger.error(f"Error searching complaints for {username}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if len(hits) == limit:
+        last = hits[-1]
+        response.headers["X-Next-Cursor"] = encode_search_cursor(last) if q else encode_complaint_cursor(last)
+    return hits
@@ -0,0 +1,79 @@
+import logging
+import os
+from datetime import date
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+
+from services.user_profile_services import get_current_user
+from utils.json_response import json_bytes_response, dumps
+from utils.train_assignment_index import train_assignment_index, EXACT_MATCH_COACH_PREFIXES
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/rs_microservice/v2", tags=["Support Contacts"])
+
+SUPPORT_CONTACT_LOOKUP_MAX = int(os.getenv("SUPPORT_CONTACT_LOOKUP_MAX", 5000))
+
+
+class SupportContactLookup(BaseModel):
+    train_no: str = Field(..., min_length=1, max_length=20)
+    coach: str = Field(..., min_length=1, max_length=20)
+    date: date
+
+
+class SupportContactLookupRequest(BaseModel):
+    lookups: List[SupportContactLookup] = Field(..., min_length=1)
+
+
+def support_contact_data(contact: Dict[str, str], coach: str) -> Dict[str, str]:
+    """SupportContactData shape: EHK always, CA only for exact-match coaches (A, B, M, G, H, C)"""
+    data = {'ehk_name': contact['ehk_name'], 'ehk_phone': contact['ehk_phone']}
+    if coach.strip().upper().startswith(EXACT_MATCH_COACH_PREFIXES):
+        data['ca_name'] = contact['ca_name']
+        data['ca_phone'] = contact['ca_phone']
+    return data
+
+
+def resolve_support_contacts(lookups: List[SupportContactLookup]) -> bytes:
+    """Resolve every lookup against the assignment index and serialize the response body"""
+    train_assignment_index.ensure_fresh()
+    contacts = train_assignment_index.lookup_many((lookup.train_no, lookup.coach, lookup.date) for lookup in lookups)
+    return dumps({
+        "message": "Support contacts resolved successfully",
+        "results": [
+            {
+                "train_no": lookup.train_no,
+                "coach": lookup.coach,
+                "date": lookup.date,
+                "support_contact": support_contact_data(contact, lookup.coach),
+            }
+            for lookup, contact in zip(lookups, contacts)
+        ],
+    })
+
+
+@router.post("/support-contacts/lookup")
+async def support_contact_lookup_endpoint(
+    payload: SupportContactLookupRequest,
+    current_user: dict = Depends(get_current_user)):
+    """EHK/CA support contacts for a batch of train/coach/date lookups
+
+    Results come back in request order, each with the same ``support_contact`` shape as the
+    complaint listings (CA fields only for coaches starting with A, B, M, G, H or C).
+    At most ``SUPPORT_CONTACT_LOOKUP_MAX`` lookups per request (configurable, default 5000).
+
+    **created on - 19 oct 2026**
+    """
+    if len(payload.lookups) > SUPPORT_CONTACT_LOOKUP_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {SUPPORT_CONTACT_LOOKUP_MAX} lookups per request.")
+
+    try:
+        body = await run_in_threadpool(resolve_support_contacts, payload.lookups)
+    except Exception as e:
+        logger.error(f"Error resolving {len(payload.lookups)} support contact lookups: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    return json_bytes_response(body)
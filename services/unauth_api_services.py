@@ -1,11 +1,14 @@
 import os
 import io
+import json
+import base64
 import logging
 import uuid
 import threading
 import re
-from datetime import datetime, date
-from typing import List, Dict, Optional, Any
+import time
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional, Any, Tuple
 from google.cloud import storage
 from PIL import Image
 from moviepy.editor import VideoFileClip
@@ -16,7 +19,13 @@ from dotenv import load_dotenv
 from fastapi import FastAPI, Form, File, UploadFile, HTTPException
 import asyncio
 import requests
-from utils.train_journey_utils import is_user_assigned_on_journey_date
+from utils.complaint_cache import get_cached_complaint, set_cached_complaint, invalidate_complaint
+from utils.complaint_scope import resolve_user_train_scope
+from utils.train_keys import train_key
+from utils.complaint_archival import rehydrate_complaint
+from utils.complaint_rollup import (
+    rollup_complaint_created, rollup_key_before_change, rollup_complaint_updated, rollup_complaint_deleted
+)
 import sys
 
 os.makedirs("logs", exist_ok=True)
@@ -120,6 +129,18 @@ def process_media_file_upload(file_bytes, filename, content_type, product_name,
         logger.exception("RailSathi Media upload failed")
         raise e
 
+
+# Media is partitioned by its complaint's month (migrations/006), so every insert carries
+# the complaint's created_at as complaint_created_at
+MEDIA_INSERT_QUERY = """
+    INSERT INTO rail_sathi_railsathicomplainmedia
+    (complain_id, media_type, media_url, created_by, created_at, updated_at, complaint_created_at)
+    SELECT %s, %s, %s, %s, %s, %s, c.created_at
+    FROM rail_sathi_railsathicomplain c
+    WHERE c.complain_id = %s
+"""
+
+
 def upload_file_thread(file_obj, complain_id, user):
     """Upload file in a separate thread with improved error handling"""
     try:
@@ -172,15 +193,13 @@ def upload_file_thread(file_obj, complain_id, user):
             # Insert media record into database
             conn = get_db_connection()
             try:
-                query = """
-                    INSERT INTO rail_sathi_railsathicomplainmedia 
-                    (complain_id, media_type, media_url, created_by, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """
                 now = datetime.now()
                 cursor = conn.cursor()
-                cursor.execute(query, (complain_id, media_type, uploaded_url, user, now, now))
+                cursor.execute(MEDIA_INSERT_QUERY, (complain_id, media_type, uploaded_url, user, now, now, complain_id))
+                if not cursor.rowcount:
+                    logger.warning(f"Media not saved: complaint {complain_id} does not exist")
                 conn.commit()
+                invalidate_complaint(complain_id)
                 logger.info(f"Media record created successfully for complaint {complain_id}")
             except Exception as db_error:
                 logger.error(f"Database error while saving media record: {db_error}")
@@ -239,15 +258,13 @@ async def upload_file_async(file_obj: UploadFile, complain_id: int, user: str):
             # Insert media record into database
             conn = get_db_connection()
             try:
-                query = """
-                    INSERT INTO rail_sathi_railsathicomplainmedia 
-                    (complain_id, media_type, media_url, created_by, created_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """
                 now = datetime.now()
                 cursor = conn.cursor()
-                cursor.execute(query, (complain_id, media_type, uploaded_url, user, now, now))
+                cursor.execute(MEDIA_INSERT_QUERY, (complain_id, media_type, uploaded_url, user, now, now, complain_id))
+                if not cursor.rowcount:
+                    logger.warning(f"Media not saved: complaint {complain_id} does not exist")
                 conn.commit()
+                invalidate_complaint(complain_id)
                 logger.info(f"Media record created successfully for complaint {complain_id}")
                 return True
             except Exception as db_error:
@@ -310,28 +327,27 @@ def test_gcs_connection():
 #     finally:
 #         conn.close()
 
-def get_complaints_by_date_and_mobile_for_passengers(complain_date: date, mobile_number: str):
+def get_complaints_by_date_and_mobile_for_passengers(
+    complain_date: date,
+    mobile_number: str,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None
+):
     """
-    Fetch complaints for passengers using complain_date and mobile number
+    Fetch complaints for passengers using complain_date and mobile number.
+    Pass ``limit`` and the decoded cursor as ``after`` for keyset pagination
+    (see encode_complaint_cursor / decode_complaint_cursor).
     """
     conn = get_db_connection()
     try:
         print("New function called")
         logger.info(f"Fetching passenger complaints for date={complain_date}, mobile={mobile_number}")
 
-        query = """
-            SELECT c.complain_id, c.pnr_number, c.is_pnr_validated, c.name, c.mobile_number,
-                   c.complain_type, c.complain_description, c.complain_date, c.complain_status,
-                   c.train_id, c.train_number, c.train_name, c.coach, c.berth_no,
-                   c.submission_status, c.created_at, c.created_by, c.updated_at, c.updated_by
-            FROM rail_sathi_railsathicomplain c
-            WHERE c.complain_date = %s
-              AND c.mobile_number::varchar = %s
-            ORDER BY c.created_at DESC
-        """
-
-        params = [complain_date, mobile_number]
-        return execute_query(conn, query, params)
+        where_clause, params = apply_complaint_keyset(
+            *passenger_complaints_clause(complain_date, mobile_number),
+            after
+        )
+        return fetch_complaint_documents(conn, where_clause, params, limit=limit)
 
     except Exception as e:
         logger.error(f"Error fetching passenger complaints by date and mobile: {str(e)}")
@@ -346,6 +362,10 @@ def create_complaint(complaint_data):
         # Validate and process train data
         # complaint_data = validate_and_process_train_data(complaint_data)
 
+        # Train numbers are stored in their canonical spelling (utils/train_keys.py)
+        if complaint_data.get('train_number'):
+            complaint_data['train_number'] = train_key(complaint_data['train_number'])
+
         # Handle date_of_journey - use current date if not provided or invalid
         date_of_journey_str = complaint_data.get('date_of_journey')
         if date_of_journey_str:
@@ -406,6 +426,8 @@ def create_complaint(complaint_data):
         else:
             complain_id = None
 
+        if complain_id is not None:
+            rollup_complaint_created(cursor, complain_id)
         conn.commit()
         
         # Get the created complaint
@@ -464,135 +486,338 @@ def create_complaint(complaint_data):
     finally:
         conn.close()
 
+# Complaint document = complaint row + train details + media files aggregated as a
+# JSON array, assembled by Postgres in a single round trip for one or many complaints.
+# Media is partitioned by its complaint's created_at (complaint_created_at, migrations/006),
+# so bounding on it prunes the lookup to the one media partition of the complaint's month.
+COMPLAINT_DOCUMENT_SELECT = """
+    SELECT c.*, t.train_no, t.train_name AS train_detail_name, t."Depot" AS train_depot,
+           COALESCE(m.media_files, '[]'::json) AS rail_sathi_complain_media_files
+    FROM rail_sathi_railsathicomplain c
+    LEFT JOIN trains_traindetails t ON c.train_number = t.train_no::text
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                   'id', cm.id,
+                   'media_type', cm.media_type,
+                   'media_url', cm.media_url,
+                   'created_at', cm.created_at,
+                   'updated_at', cm.updated_at,
+                   'created_by', cm.created_by,
+                   'updated_by', cm.updated_by
+               ) ORDER BY cm.id) AS media_files
+        FROM rail_sathi_railsathicomplainmedia cm
+        WHERE cm.complain_id = c.complain_id
+          AND cm.complaint_created_at = c.created_at
+    ) m ON TRUE
+"""
+
+
+def _finalize_complaint_document(complaint: Dict) -> Dict:
+    """Normalize a complaint document row into the shape the API models expect"""
+    complaint['rail_sathi_complain_media_files'] = complaint.get('rail_sathi_complain_media_files') or []
+    complaint['train_name'] = complaint.pop('train_detail_name', None) or complaint.get('train_name')
+    complaint.pop('search_vector', None)  # internal full-text column (migrations/004)
+    return complaint
+
+
+def build_complaint_documents_query(
+    where_clause: str,
+    params,
+    order_by: str = "c.created_at DESC, c.complain_id DESC",
+    limit: Optional[int] = None
+) -> Tuple[str, List]:
+    """Assemble the complaint document SQL and its parameters (also used by the EXPLAIN tests)"""
+    params = list(params)
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT %s"
+        params.append(limit)
+
+    query = f"""
+        {COMPLAINT_DOCUMENT_SELECT}
+        WHERE {where_clause}
+        ORDER BY {order_by}
+        {limit_clause}
+    """
+    return query, params
+
+
+# Listing predicates are kept sargable: half-open timestamp ranges instead of
+# DATE(created_at), and no casts on indexed columns (see migrations/001_*.sql).
+def day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """Return the half-open [start, end) datetime range covering a calendar day"""
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def created_on_clause(created_date: date, train_numbers: Optional[List[str]] = None) -> Tuple[str, List]:
+    """Predicate for complaints created on a day, optionally restricted to train numbers"""
+    start, end = day_bounds(created_date)
+    where_clause = "c.created_at >= %s AND c.created_at < %s"
+    params = [start, end]
+    if train_numbers is not None:
+        where_clause += " AND c.train_number = ANY(%s)"
+        params.append(list(train_numbers))
+    return where_clause, params
+
+
+def passenger_complaints_clause(complain_date: date, mobile_number: str) -> Tuple[str, List]:
+    """Predicate for a passenger's complaints on a complain_date"""
+    return "c.complain_date = %s AND c.mobile_number = %s", [complain_date, str(mobile_number)]
+
+
+def fetch_complaint_documents(
+    conn,
+    where_clause: str,
+    params,
+    order_by: str = "c.created_at DESC, c.complain_id DESC",
+    limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    Fetch complaint documents (complaint + train + media) matching a WHERE clause.
+
+    Args:
+        conn: Database connection
+        where_clause: Trusted SQL predicate over alias ``c`` with %s placeholders
+        params: Values for the placeholders
+        order_by: Trusted ORDER BY expression
+        limit: Optional maximum number of complaints to return
+
+    Returns:
+        List of complaint dicts with ``rail_sathi_complain_media_files`` populated
+    """
+    query, params = build_complaint_documents_query(where_clause, params, order_by, limit)
+    complaints = execute_query(conn, query, params)
+    return [_finalize_complaint_document(complaint) for complaint in (complaints or [])]
+
+
+# Keyset pagination over (created_at DESC, complain_id DESC)
+COMPLAINT_PAGE_MAX_LIMIT = 500
+
+
+def encode_complaint_cursor(complaint: Dict) -> str:
+    """Build the opaque cursor pointing just after the given (last returned) complaint"""
+    created_at = complaint.get('created_at')
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, complaint.get('complain_id')], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_complaint_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode an opaque cursor into (created_at, complain_id); raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, complain_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(created_at), int(complain_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def apply_complaint_keyset(where_clause: str, params: List, after: Optional[Tuple[datetime, int]]) -> Tuple[str, List]:
+    """Extend a listing predicate so it only matches rows after a decoded cursor position"""
+    if not after:
+        return where_clause, params
+    created_at, complain_id = after
+    return (
+        f"({where_clause}) AND (c.created_at, c.complain_id) < (%s, %s)",
+        list(params) + [created_at, complain_id]
+    )
+
+
+def get_complaint_documents_by_ids(conn, complaint_ids: List[int]) -> Dict[int, Dict]:
+    """Fetch complaint documents for the given IDs, keyed by complain_id"""
+    if not complaint_ids:
+        return {}
+    documents = fetch_complaint_documents(conn, "c.complain_id = ANY(%s)", (list(complaint_ids),))
+    return {document['complain_id']: document for document in documents}
+
+
 def get_complaint_by_id(complain_id: int):
-    """Get complaint by ID with media files"""
+    """Get complaint by ID with media files (read-through cached, see utils/complaint_cache)"""
+    cached = get_cached_complaint(complain_id)
+    if cached is not None:
+        return cached
+
     conn = get_db_connection()
     try:
-        # Get complaint - using string comparison by casting train_no to text
-        query = """
-            SELECT c.*, t.train_no, t.train_name, t."Depot" as train_depot
-            FROM rail_sathi_railsathicomplain c
-            LEFT JOIN trains_traindetails t ON c.train_number = t.train_no::text
-            WHERE c.complain_id = %s
-        """
-        complaint = execute_query_one(conn, query, (complain_id,))
-        print(f"Complaint fetched by id before updating: {complaint}")
-        
+        complaint = get_complaint_documents_by_ids(conn, [complain_id]).get(complain_id)
         if not complaint:
             return None
-        
-        # Get media files
-        media_query = """
-            SELECT id, media_type, media_url, created_at, updated_at, created_by, updated_by
-            FROM rail_sathi_railsathicomplainmedia
-            WHERE complain_id = %s
-        """
-        media_files = execute_query(conn, media_query, (complain_id,))
-        
-        # Format response
-        complaint['rail_sathi_complain_media_files'] = media_files or []
-        return complaint
+        return set_cached_complaint(complain_id, complaint)
     finally:
         conn.close()
 
 
-#def get_complaints_by_date(complain_date: date, mobile_number: str):
-def get_complaints_by_date_username_depot(complain_create_date: date, username: str): #for authenticated users
-    """Get complaints by date, username and depot (AUTHENTICATED USERS)"""
-    conn = get_db_connection()
+def get_archived_complaint(complain_id: int):
+    """
+    Rehydrate a complaint whose month was archived and detached (utils/complaint_archival).
+
+    Read-only: archived complaints are deliberately not served by get_complaint_by_id, which
+    the update/delete paths use as an existence check.
+    """
     try:
-        user_depots_query = """
-            SELECT d.depot_code
-            FROM user_onboarding_user u
-            INNER JOIN user_onboarding_user_depots ud ON u.id = ud.user_id
-            INNER JOIN station_depot d ON ud.depot_id = d.depot_id
-            WHERE u.username = %s
-        """
+        conn = get_db_connection()
+    except Exception as e:
+        logger.warning(f"Archive lookup skipped for complaint {complain_id}: {str(e)}")
+        return None
+    try:
+        return rehydrate_complaint(conn, complain_id)
+    except Exception as e:
+        logger.warning(f"Archive lookup failed for complaint {complain_id}: {str(e)}")
+        return None
+    finally:
+        conn.close()
 
-        user_depots_result = execute_query(conn, user_depots_query, (username,))
 
-        if not user_depots_result:
-            logger.info(f"No depots found for username: {username}")
-            return []
-        
-        depot_codes = [depot["depot_code"] for depot in user_depots_result]
-        logger.info(f"User {username} has access to depots: {depot_codes}")
+# Version fingerprint of a set of complaints and their media. Deletions show up in the
+# counts/sums, inserts in the max ids and edits in the updated_at maxima.
+COMPLAINT_VERSION_QUERY = """
+    SELECT COUNT(*) AS complaint_count,
+           COALESCE(SUM(c.complain_id), 0) AS complain_id_sum,
+           MAX(c.updated_at) AS complaints_updated_at,
+           COALESCE(SUM(m.media_count), 0) AS media_count,
+           COALESCE(SUM(m.media_id_sum), 0) AS media_id_sum,
+           MAX(m.media_updated_at) AS media_updated_at,
+           GREATEST(MAX(c.updated_at), MAX(m.media_updated_at)) AS last_modified
+    FROM rail_sathi_railsathicomplain c
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS media_count,
+               SUM(cm.id) AS media_id_sum,
+               MAX(cm.updated_at) AS media_updated_at
+        FROM rail_sathi_railsathicomplainmedia cm
+        WHERE cm.complain_id = c.complain_id
+          AND cm.complaint_created_at = c.created_at
+    ) m ON TRUE
+    WHERE {where_clause}
+"""
+
+# Support contacts come from trains_trainaccess, which carries no version; listings that
+# embed them change ETag at least once per window.
+SUPPORT_CONTACT_ETAG_WINDOW = int(os.getenv("SUPPORT_CONTACT_ETAG_WINDOW", 300))
+
+
+def _fetch_complaint_set_version(conn, where_clause: str, params) -> Optional[Dict]:
+    version = execute_query_one(conn, COMPLAINT_VERSION_QUERY.format(where_clause=where_clause), tuple(params))
+    if not version or not version.get('complaint_count'):
+        return None
+    return dict(version)
+
+
+def get_complaint_version(complain_id: int) -> Optional[Dict]:
+    """
+    Cheap version lookup for conditional GETs of one complaint.
 
-        train_numbers_query = """
-            SELECT DISTINCT train_no
-            FROM trains_traindetails
-            WHERE "Depot" = ANY(%s)
-        """
-        train_numbers_result = execute_query(conn, train_numbers_query, (depot_codes,))
+    Returns None when the complaint does not exist or the lookup fails, in which case the
+    caller serves the full document as usual.
+    """
+    try:
+        conn = get_db_connection()
+    except Exception as e:
+        logger.warning(f"Version lookup skipped for complaint {complain_id}: {str(e)}")
+        return None
+    try:
+        return _fetch_complaint_set_version(conn, "c.complain_id = %s", [complain_id])
+    except Exception as e:
+        logger.warning(f"Version lookup failed for complaint {complain_id}: {str(e)}")
+        return None
+    finally:
+        conn.close()
 
-        if not train_numbers_result:
-            logger.info(f"No trains found for depots: {depot_codes}")
-            return []
 
-        train_numbers = [str(train["train_no"]) for train in train_numbers_result]
+def _as_instant(value) -> Optional[datetime]:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
 
-        # Fixed query - using train_id instead of train.id for the foreign key
-        query = """
-            SELECT c.complain_id, c.pnr_number, c.is_pnr_validated, c.name, c.mobile_number,
-                   c.complain_type, c.complain_description, c.complain_date, c.complain_status,
-                   c.train_id, c.train_number, c.train_name, c.coach, c.berth_no,
-                   c.submission_status, c.created_at, c.created_by, c.updated_at, c.updated_by,
-                   t.train_name as train_detail_name, t."Depot" as train_depot
-            FROM rail_sathi_railsathicomplain c
-            LEFT JOIN trains_traindetails t ON c.train_id = t.id
-            WHERE DATE(c.created_at) = %s AND CAST(c.train_number AS TEXT) = ANY(%s)
-        """
-        #complaints = execute_query(conn, query, (complain_date, mobile_number))
-        complaints = execute_query(conn, query, (complain_create_date, train_numbers))
+
+def document_matches_version(complaint: Dict, version: Dict) -> bool:
+    """
+    True when a (possibly cached) complaint document is the state get_complaint_version saw.
+
+    The cache is per worker and writes made elsewhere (other workers, the Django app) do not
+    invalidate it, so callers that label a document with version validators check it first
+    and reload a document that does not match.
+    """
+    try:
+        media = complaint.get('rail_sathi_complain_media_files') or []
+        media_updated_at = [_as_instant(m['updated_at']) for m in media if m.get('updated_at')]
+        return (
+            _as_instant(complaint.get('updated_at')) == _as_instant(version.get('complaints_updated_at'))
+            and len(media) == int(version.get('media_count') or 0)
+            and sum(int(m['id']) for m in media) == int(version.get('media_id_sum') or 0)
+            and max(media_updated_at, default=None) == _as_instant(version.get('media_updated_at'))
+        )
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def get_complaint_listing_version(complain_create_date: date, mobile_number: Optional[str] = None) -> Optional[Dict]:
+    """Version of the get_complaints_by_date_and_mobile result set (whole day, all pages)"""
+    try:
+        conn = get_db_connection()
+    except Exception as e:
+        logger.warning(f"Version lookup skipped for complaints on {complain_create_date}: {str(e)}")
+        return None
+    try:
+        if mobile_number:
+            train_numbers = resolve_user_train_scope(conn, mobile_number=mobile_number)
+            if not train_numbers:
+                return None
+            where_clause, params = created_on_clause(complain_create_date, train_numbers)
+        else:
+            where_clause, params = created_on_clause(complain_create_date)
+        version = _fetch_complaint_set_version(conn, where_clause, params)
+        if version:
+            # Embedded support contacts carry no timestamp, so this listing offers an ETag only
+            version.pop('last_modified', None)
+            version['support_contact_window'] = int(time.time() // SUPPORT_CONTACT_ETAG_WINDOW)
+        return version
+    except Exception as e:
+        logger.warning(f"Version lookup failed for complaints on {complain_create_date}: {str(e)}")
+        return None
+    finally:
+        conn.close()
+
+
+def get_passenger_complaints_version(complain_date: date, mobile_number: str) -> Optional[Dict]:
+    """Version of the get_complaints_by_date_and_mobile_for_passengers result set"""
+    try:
+        conn = get_db_connection()
+    except Exception as e:
+        logger.warning(f"Version lookup skipped for passenger {mobile_number}: {str(e)}")
+        return None
+    try:
+        return _fetch_complaint_set_version(conn, *passenger_complaints_clause(complain_date, mobile_number))
+    except Exception as e:
+        logger.warning(f"Version lookup failed for passenger {mobile_number}: {str(e)}")
+        return None
+    finally:
+        conn.close()
+
+
+#def get_complaints_by_date(complain_date: date, mobile_number: str):
+def get_complaints_by_date_username_depot(complain_create_date: date, username: str): #for authenticated users
+    """Get complaints by date, username and depot (AUTHENTICATED USERS)"""
+    conn = get_db_connection()
+    try:
+        train_numbers = resolve_user_train_scope(conn, username=username)
+        if not train_numbers:
+            logger.info(f"No depot trains in scope for username: {username}")
+            return []
+
+        complaints = fetch_complaint_documents(
+            conn,
+            *created_on_clause(complain_create_date, train_numbers)
+        )
         if not complaints:
             return []
         
-        # Get media files for each complaint
         for complaint in complaints:
-            # Use the correct field name - complain_id should be the key
-            complaint_id = complaint.get('complain_id')
-            if complaint_id:
-                media_query = """
-                    SELECT id, media_type, media_url, created_at, updated_at, created_by, updated_by
-                    FROM rail_sathi_railsathicomplainmedia
-                    WHERE complain_id = %s
-                """
-                
-                try:
-                    media_conn = get_db_connection()
-                    media_files = execute_query(media_conn, media_query, (complaint_id,))
-                    complaint['rail_sathi_complain_media_files'] = media_files if media_files else []
-                except Exception as media_error:
-                    logger.error(f"Error fetching media for complaint {complaint_id}: {str(media_error)}")
-                    complaint['rail_sathi_complain_media_files'] = []
-                finally:
-                    media_conn.close()
-            else:
-                complaint['rail_sathi_complain_media_files'] = []
-            
             # Add missing customer_care field that's required by RailSathiComplainResponse
-            complaint['customer_care'] = None 
-            train_number = complaint.get('train_number')
-            if train_number:
-                get_depot_query = f"""
-                    SELECT "Depot", train_name FROM trains_traindetails 
-                    WHERE train_no = %s LIMIT 1
-                """
-                try:
-                    train_conn = get_db_connection()
-                    train_result = execute_query(train_conn, get_depot_query, (train_number,))
-                    if train_result:
-                        complaint['train_depot'] = train_result[0].get("Depot", "")
-                        complaint['train_name'] = train_result[0].get("train_name", "")
-                    else:
-                        complaint['train_depot'] = ''
-                        complaint['train_name'] = ''
-                except Exception as e:
-                    logger.error(f"[Depot Lookup] Error: {str(e)}")
-                    complaint['train_depot'] = ''
-                    complaint['train_name'] = ''
-                finally:
-                    train_conn.close()# or set appropriate default value
+            complaint['customer_care'] = None
+            complaint['train_depot'] = complaint.get('train_depot') or ''
+            complaint['train_name'] = complaint.get('train_name') or ''
 
         return complaints
     except Exception as e:
@@ -611,8 +836,9 @@ import json
 # Assuming these are imported from your existing modules
 # from database import get_db_connection, execute_query
 
-# Coach prefixes that require exact coach matching
-EXACT_MATCH_COACH_PREFIXES = ('A', 'B', 'M', 'G', 'H', 'C')
+# Coach prefixes that require exact coach matching (shared with the assignment index)
+from utils.train_assignment_index import train_assignment_index, EXACT_MATCH_COACH_PREFIXES
+from utils.support_contact_snapshot import snapshot_contacts
 
 
 def get_support_contacts_for_complaints(
@@ -633,297 +859,61 @@ def get_support_contacts_for_complaints(
         train_coach_pairs: Set of (train_number, coach) tuples from actual complaints
 
     Returns:
-        Dictionary with (train_number, coach) as key and dict with support contact details:
+        Dictionary with (canonical train_number, upper-case coach) as key and dict with support contact details:
         {'ehk_name': str, 'ehk_phone': str, 'ca_name': str, 'ca_phone': str}
     """
     cache = {}
-    
+
     if not train_coach_pairs:
         return cache
-    
-    # Extract unique train numbers from complaints (normalize them)
-    complaint_trains = set()
-    for train_no, coach in train_coach_pairs:
-        if train_no:
-            complaint_trains.add(train_no)
-            clean = train_no.lstrip('0') or '0'
-            complaint_trains.add(clean)
-    
-    if not complaint_trains:
-        return cache
-    
-    logger.info(f"Finding support contacts for {len(train_coach_pairs)} train+coach pairs, {len(complaint_trains)} unique trains")
-    
-    try:
-        # ============================================================
-        # STEP 1: Fetch journey details ONLY for trains in complaints
-        # ============================================================
-        train_numbers_int = []
-        for t in complaint_trains:
-            try:
-                clean = t.lstrip('0') or '0'
-                if clean.isdigit():
-                    train_numbers_int.append(int(clean))
-            except:
-                pass
-        
-        train_numbers_int = list(set(train_numbers_int))
-        
-        if not train_numbers_int:
-            logger.info("No valid train numbers to query")
-            return cache
-        
-        train_journey_cache = {}
-        train_details_query = """
-            SELECT train_no, journey_duration_days, end_time
-            FROM trains_traindetails
-            WHERE train_no = ANY(%s)
-        """
-        
-        train_details_result = execute_query(conn, train_details_query, (train_numbers_int,))
-        
-        if train_details_result:
-            for row in train_details_result:
-                train_no = str(row.get('train_no', ''))
-                journey_duration = row.get('journey_duration_days') or 1
-                end_time = row.get('end_time')
-                
-                if end_time and hasattr(end_time, 'strftime'):
-                    end_time = end_time.strftime("%H:%M:%S")
-                else:
-                    end_time = "23:59:59"
-                
-                train_journey_cache[train_no] = {
-                    "journey_duration_days": journey_duration,
-                    "end_time": end_time
-                }
-        
-        logger.info(f"Loaded journey details for {len(train_journey_cache)} trains")
-        
-        # ============================================================
-        # STEP 2: Fetch users with train access
-        # ============================================================
-        assigned_users_query = """
-            SELECT u.phone, u.first_name, u.last_name, u.id, ta.train_details
-            FROM user_onboarding_user u
-            JOIN trains_trainaccess ta ON ta.user_id = u.id
-            WHERE ta.train_details IS NOT NULL
-            AND ta.train_details != '{}'
-            AND ta.train_details != 'null'
-            AND u.user_status = 'enabled'
-            AND u.phone IS NOT NULL
-            AND u.phone != ''
-        """
-        
-        assigned_users_raw = execute_query(conn, assigned_users_query)
-        
-        if not assigned_users_raw:
-            logger.info("No coach-assigned users found")
-            return cache
-        
-        logger.info(f"Processing {len(assigned_users_raw)} users with train access")
-        
-        # ============================================================
-        # STEP 3: Process assignments
-        # ============================================================
-        query_date_str = query_date.strftime('%Y-%m-%d')
-        validation_time = datetime.combine(query_date, datetime.max.time())
-        
-        # Pre-compute complaint train set for fast lookup
-        complaint_trains_normalized = set()
-        for t in complaint_trains:
-            complaint_trains_normalized.add(t)
-            complaint_trains_normalized.add(t.lstrip('0') or '0')
-        
-        # Separate caches:
-        # 1. exact_coach_cache: for coaches starting with A, B, M, G, H, C
-        # 2. ehk_train_cache: for EHK users by train (no coach match needed)
-        exact_coach_cache = {}  # key: (train_no, coach) -> {'phone': str, 'name': str}
-        ehk_train_cache = {}    # key: train_no -> ({'phone': str, 'name': str}, date)
-        
-        users_processed = 0
-        
-        for user in assigned_users_raw:
-            try:
-                train_details_str = user.get('train_details', '{}')
-
-                if isinstance(train_details_str, str):
-                    train_details = json.loads(train_details_str)
-                else:
-                    train_details = train_details_str
 
-                phone = user.get('phone', '')
-                if not phone:
-                    continue
-
-                # Construct full name from first_name and last_name
-                first_name = user.get('first_name', '').strip()
-                last_name = user.get('last_name', '').strip()
-                full_name = f"{first_name} {last_name}".strip() if first_name or last_name else ''
-
-                user_contact_info = {
-                    'phone': phone,
-                    'name': full_name
-                }
+    try:
+        # Until this process has built its assignment index, take the contacts stored at
+        # charting time (migrations/010) and only build the index for pairs without one
+        snapshot = {}
+        if not train_assignment_index.loaded:
+            snapshot = snapshot_contacts(conn, query_date, (pair for pair in train_coach_pairs if all(pair)))
 
-                users_processed += 1
-                
-                # Only process trains that are in our complaints
-                for train_no, access_list in train_details.items():
-                    train_no_str = str(train_no).strip()
-                    clean_train = train_no_str.lstrip('0') or '0'
-                    
-                    # SKIP if this train is not in our complaints
-                    if train_no_str not in complaint_trains_normalized and clean_train not in complaint_trains_normalized:
-                        continue
-                    
-                    # Get journey details from cache
-                    journey_info = train_journey_cache.get(clean_train, {
-                        "journey_duration_days": 1,
-                        "end_time": "23:59:59"
-                    })
-                    
-                    for access in access_list:
-                        origin_date_str = access.get('origin_date', '')
-                        if not origin_date_str:
-                            continue
-                        
-                        # Get user type (ut)
-                        user_type = access.get('ut', '')
-                        
-                        # Quick date range check
-                        try:
-                            origin_date = datetime.strptime(origin_date_str, "%Y-%m-%d").date()
-                            journey_days = journey_info["journey_duration_days"]
-                            last_date = origin_date + timedelta(days=journey_days - 1)
-                            
-                            # Skip if query_date is outside possible range
-                            if query_date < origin_date or query_date > last_date:
-                                continue
-                            
-                            # REMOVE THIS ENTIRE BLOCK - No time validation
-                            # is_assigned = True
-                            # if query_date == last_date:
-                            #     try:
-                            #         end_time = datetime.strptime(journey_info["end_time"], "%H:%M:%S").time()
-                            #         if validation_time.time() >= end_time:
-                            #             is_assigned = False
-                            #     except:
-                            #         pass
-                            # 
-                            # if not is_assigned:
-                            #     continue
-                            
-                            # Just check coach/user type directly
-                            coach_numbers = access.get("coach_numbers", [])
-
-                            # Store in exact_coach_cache ONLY if user is assigned to exactly ONE coach AND user_type is CA
-                            # This ensures CA users are dedicated to a single coach and have the correct user type
-                            if len(coach_numbers) == 1 and user_type == 'CA':
-                                coach_upper = str(coach_numbers[0]).strip().upper()
-
-                                # Add to exact coach cache
-                                key1 = (train_no_str, coach_upper)
-                                key2 = (clean_train, coach_upper)
-
-                                if key1 not in exact_coach_cache:
-                                    exact_coach_cache[key1] = user_contact_info
-                                if key2 not in exact_coach_cache:
-                                    exact_coach_cache[key2] = user_contact_info
-
-                            # If user is EHK, also store in ehk_train_cache for non-exact matching
-                            if user_type == 'EHK':
-                                current_entry = ehk_train_cache.get(train_no_str)
-                                if current_entry is None or origin_date > current_entry[1]:
-                                    ehk_train_cache[train_no_str] = (user_contact_info, origin_date)
-
-                                current_entry_clean = ehk_train_cache.get(clean_train)
-                                if current_entry_clean is None or origin_date > current_entry_clean[1]:
-                                    ehk_train_cache[clean_train] = (user_contact_info, origin_date)
-                            
-                        except (ValueError, TypeError):
-                            continue
-                            
-            except (json.JSONDecodeError, TypeError):
-                continue
-        
-        logger.info(f"Processed {users_processed} users")
-        logger.info(f"Exact coach cache: {len(exact_coach_cache)} entries")
-        logger.info(f"EHK train cache: {len(ehk_train_cache)} entries")
-        
-        # ADD THIS: Log specific keys we care about
-        logger.info(f"exact_coach_cache keys for train 12333: {[k for k in exact_coach_cache.keys() if '12333' in str(k)]}")
-        logger.info(f"exact_coach_cache[('12333', 'A1')] = {exact_coach_cache.get(('12333', 'A1'), 'NOT FOUND')}")
-        
-        
-        # ============================================================
-        # STEP 4: Build final cache based on coach prefix rules
-        # ============================================================
         for train_no, coach in train_coach_pairs:
             if not train_no or not coach:
                 continue
 
-            coach_upper = coach.strip().upper()
-            train_no_str = str(train_no).strip()
-            clean_train = train_no_str.lstrip('0') or '0'
+            key = (train_key(train_no), coach.strip().upper())
 
-            # Initialize support contact info with all fields
-            support_contact_info = {
-                'ehk_name': '',
-                'ehk_phone': '',
-                'ca_name': '',
-                'ca_phone': ''
-            }
-
-            # ALWAYS fetch EHK details for ALL coaches
-            ehk_entry = ehk_train_cache.get(train_no_str) or ehk_train_cache.get(clean_train)
-            if ehk_entry:
-                ehk_contact_data = ehk_entry[0]
-                support_contact_info['ehk_name'] = ehk_contact_data.get('name', '')
-                support_contact_info['ehk_phone'] = ehk_contact_data.get('phone', '')
-                logger.debug(f"EHK contact found for train={train_no_str}, coach={coach_upper}")
-            else:
-                logger.warning(f"No EHK contact found for train={train_no_str}, coach={coach_upper}")
-
-            # For exact match coaches (A, B, M, G, H, C), ALSO fetch CA details
-            if coach_upper.startswith(EXACT_MATCH_COACH_PREFIXES):
-                key1 = (train_no_str, coach_upper)
-                key2 = (clean_train, coach_upper)
-
-                ca_contact_data = exact_coach_cache.get(key1) or exact_coach_cache.get(key2)
-                if ca_contact_data:
-                    support_contact_info['ca_name'] = ca_contact_data.get('name', '')
-                    support_contact_info['ca_phone'] = ca_contact_data.get('phone', '')
-                    logger.debug(f"CA contact found for train={train_no_str}, coach={coach_upper}")
-                else:
-                    logger.debug(f"No CA contact found for train={train_no_str}, coach={coach_upper}")
+            # EHK for all coaches; CA as well for exact match coaches (A, B, M, G, H, C)
+            support_contact_info = snapshot.get(key)
+            if support_contact_info is None:
+                # Assignments come from the per-process index instead of scanning trains_trainaccess
+                train_assignment_index.ensure_fresh(conn)
+                support_contact_info = train_assignment_index.lookup(*key, query_date)
+            if not support_contact_info['ehk_phone']:
+                logger.debug(f"No EHK contact found for train={key[0]}, coach={key[1]}")
 
-            # Store in final cache with all normalized train number variations
-            cache[(train_no_str, coach_upper)] = support_contact_info
-            cache[(clean_train, coach_upper)] = support_contact_info
-            if not train_no_str.startswith('0'):
-                cache[('0' + train_no_str, coach_upper)] = support_contact_info
-        
-        logger.info(f"Final support_contact cache: {len(cache)} entries")
-        logger.info(f"Final cache[('12333', 'A1')] = {cache.get(('12333', 'A1'), 'NOT FOUND')}")
-        if logger.isEnabledFor(logging.DEBUG):
-            sample_keys = list(cache.keys())[:10]
-            logger.debug(f"Sample cache keys: {sample_keys}")
+            cache[key] = support_contact_info
 
-        # Log some sample matches for debugging
         matched_ehk_count = sum(1 for v in cache.values() if v.get('ehk_phone'))
         matched_ca_count = sum(1 for v in cache.values() if v.get('ca_phone'))
         logger.info(f"Complaints with EHK contact: {matched_ehk_count}/{len(cache)}, with CA contact: {matched_ca_count}/{len(cache)}")
-        
+
         return cache
-        
+
     except Exception as e:
         logger.error(f"Error in get_support_contacts_for_complaints: {str(e)}")
         return cache
 
 
-def get_complaints_by_date_and_mobile(complain_create_date: date, mobile_number: Optional[str] = None):
-    """Get complaints by date and optionally filtered by user's depot trains"""
+def get_complaints_by_date_and_mobile(
+    complain_create_date: date,
+    mobile_number: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None
+):
+    """
+    Get complaints by date and optionally filtered by user's depot trains.
+
+    With ``limit`` (and ``after``, the decoded cursor of the previous page) only one keyset
+    page is fetched, and support-contact enrichment runs for that page only.
+    """
     conn = get_db_connection()
     try:
         # ============================================================
@@ -932,72 +922,19 @@ def get_complaints_by_date_and_mobile(complain_create_date: date, mobile_number:
         if mobile_number:
             logger.info(f"Fetching complaints for mobile: {mobile_number}, date: {complain_create_date}")
             
-            user_depots_query = """
-                SELECT d.depot_code, d.depot_name
-                FROM user_onboarding_user u
-                INNER JOIN user_onboarding_user_depots ud ON u.id = ud.user_id
-                INNER JOIN station_depot d ON ud.depot_id = d.depot_id
-                WHERE u.phone = %s
-            """
-            user_depots_result = execute_query(conn, user_depots_query, (mobile_number,))
-            
-            if not user_depots_result:
-                logger.info(f"No depots found for mobile number: {mobile_number}")
+            train_numbers = resolve_user_train_scope(conn, mobile_number=mobile_number)
+            if not train_numbers:
+                logger.info(f"No depot trains in scope for mobile number: {mobile_number}")
                 return []
-            
-            depot_codes = [depot['depot_code'] for depot in user_depots_result]
-            
-            train_numbers_query = """
-                SELECT DISTINCT train_no
-                FROM trains_traindetails
-                WHERE "Depot" = ANY(%s)
-            """
-            train_numbers_result = execute_query(conn, train_numbers_query, (depot_codes,))
-            
-            if not train_numbers_result:
-                logger.info(f"No trains found for depots")
-                return []
-            
-            train_numbers = []
-            for train in train_numbers_result:
-                train_no = str(train['train_no'])
-                train_numbers.append(train_no)
-                train_numbers.append('0' + train_no)
-                if train_no.startswith('0'):
-                    train_numbers.append(train_no.lstrip('0') or '0')
-            
-            unique_train_numbers = list(set(train_numbers))
-            
-            query = """
-                SELECT c.complain_id, c.pnr_number, c.is_pnr_validated, c.name, c.mobile_number,
-                       c.complain_type, c.complain_description, c.complain_date, c.complain_status,
-                       c.train_id, c.train_number, c.train_name, c.coach, c.berth_no,
-                       c.submission_status, c.created_at, c.created_by, c.updated_at, c.updated_by,
-                       t.train_name as train_detail_name, t."Depot" as train_depot
-                FROM rail_sathi_railsathicomplain c
-                LEFT JOIN trains_traindetails t ON CAST(t.train_no AS VARCHAR) = c.train_number
-                WHERE DATE(c.created_at) = %s
-                  AND c.train_number = ANY(%s)
-                ORDER BY c.created_at DESC
-            """
-            params = [complain_create_date, unique_train_numbers]
+
+            where_clause, params = created_on_clause(complain_create_date, train_numbers)
         else:
             logger.info(f"Fetching all complaints for date: {complain_create_date}")
             
-            query = """
-                SELECT c.complain_id, c.pnr_number, c.is_pnr_validated, c.name, c.mobile_number,
-                       c.complain_type, c.complain_description, c.complain_date, c.complain_status,
-                       c.train_id, c.train_number, c.train_name, c.coach, c.berth_no,
-                       c.submission_status, c.created_at, c.created_by, c.updated_at, c.updated_by,
-                       t.train_name as train_detail_name, t."Depot" as train_depot
-                FROM rail_sathi_railsathicomplain c
-                LEFT JOIN trains_traindetails t ON CAST(t.train_no AS VARCHAR) = c.train_number
-                WHERE DATE(c.created_at) = %s
-                ORDER BY c.created_at DESC
-            """
-            params = [complain_create_date]
+            where_clause, params = created_on_clause(complain_create_date)
         
-        complaints = execute_query(conn, query, params)
+        where_clause, params = apply_complaint_keyset(where_clause, params, after)
+        complaints = fetch_complaint_documents(conn, where_clause, params, limit=limit)
 
         if not complaints:
             logger.info(f"No complaints found")
@@ -1010,12 +947,10 @@ def get_complaints_by_date_and_mobile(complain_create_date: date, mobile_number:
         # ============================================================
         train_coach_pairs: Set[Tuple[str, str]] = set()
         for complaint in complaints:
-            train_number = str(complaint.get('train_number', '')).strip()
+            train_number = train_key(complaint.get('train_number'))
             coach = str(complaint.get('coach', '')).strip().upper()
             if train_number and coach:
                 train_coach_pairs.add((train_number, coach))
-                clean_train = train_number.lstrip('0') or '0'
-                train_coach_pairs.add((clean_train, coach))
         
         logger.info(f"Unique train+coach pairs in complaints: {len(train_coach_pairs)}")
         
@@ -1029,41 +964,14 @@ def get_complaints_by_date_and_mobile(complain_create_date: date, mobile_number:
         for train_no, coach in train_coach_pairs:
             logger.info(f"STEP4: Looking up train_no={train_no!r}, coach={coach!r}")
         # ============================================================
-        # STEP 4: Batch fetch media files
-        # ============================================================
-        complaint_ids = [c.get('complain_id') for c in complaints if c.get('complain_id')]
-        
-        media_cache = {}
-        if complaint_ids:
-            media_query = """
-                SELECT complain_id, id, media_type, media_url, created_at, updated_at, created_by, updated_by
-                FROM rail_sathi_railsathicomplainmedia
-                WHERE complain_id = ANY(%s)
-            """
-            try:
-                media_files = execute_query(conn, media_query, (complaint_ids,))
-                if media_files:
-                    for media in media_files:
-                        cid = media.get('complain_id')
-                        if cid not in media_cache:
-                            media_cache[cid] = []
-                        media_cache[cid].append(media)
-            except Exception as media_error:
-                logger.error(f"Error fetching media: {str(media_error)}")
-        
-        # ============================================================
-        # STEP 5: Process each complaint
+        # STEP 4: Process each complaint (media already aggregated)
         # ============================================================
         for complaint in complaints:
-            complaint_id = complaint.get('complain_id')
-            
-            complaint['rail_sathi_complain_media_files'] = media_cache.get(complaint_id, [])
             complaint['customer_care'] = None
             complaint['train_depot'] = complaint.get('train_depot', '')
-            complaint['train_name'] = complaint.get('train_detail_name') or complaint.get('train_name', '')
             
             # Support contact lookup with better matching
-            train_number = str(complaint.get('train_number', '')).strip()
+            train_number = train_key(complaint.get('train_number'))
             coach = str(complaint.get('coach', '')).strip().upper()
 
             # Check if coach requires exact matching (for CA fields)
@@ -1081,20 +989,7 @@ def get_complaints_by_date_and_mobile(complain_create_date: date, mobile_number:
                 support_contact['ca_phone'] = ''
 
             if train_number and coach:
-                # Try original train number first
-                cache_key = (train_number, coach)
-                contact_info = support_contact_cache.get(cache_key)
-
-                # Try with leading zero
-                if not contact_info:
-                    cache_key_with_zero = ('0' + train_number, coach)
-                    contact_info = support_contact_cache.get(cache_key_with_zero)
-
-                # Try cleaned train number (remove leading zeros)
-                if not contact_info:
-                    clean_train = train_number.lstrip('0') or '0'
-                    cache_key_clean = (clean_train, coach)
-                    contact_info = support_contact_cache.get(cache_key_clean)
+                contact_info = support_contact_cache.get((train_number, coach))
 
                 # If contact info found, use it
                 if contact_info:
@@ -1125,6 +1020,9 @@ def update_complaint(complain_id: int, update_data: dict):
     try:
         # Validate and process train data
         # update_data = validate_and_process_train_data(update_data)
+
+        if update_data.get('train_number'):
+            update_data['train_number'] = train_key(update_data['train_number'])
         
         # Parse complain_date if it's a string
         if 'complain_date' in update_data and isinstance(update_data['complain_date'], str):
@@ -1164,8 +1062,11 @@ def update_complaint(complain_id: int, update_data: dict):
         """
         
         cursor = conn.cursor()
+        old_rollup_key = rollup_key_before_change(cursor, complain_id)
         cursor.execute(query, tuple(values))
+        rollup_complaint_updated(cursor, complain_id, old_rollup_key)
         conn.commit()
+        invalidate_complaint(complain_id)
         
         # ✅ Get updated complaint data for email
         updated_complaint = get_complaint_by_id(complain_id)
@@ -1249,12 +1150,16 @@ def delete_complaint(complain_id: int):
     try:
         # First delete media files
         cursor = conn.cursor()
+        old_rollup_key = rollup_key_before_change(cursor, complain_id)
         cursor.execute("DELETE FROM rail_sathi_railsathicomplainmedia WHERE complain_id = %s", (complain_id,))
         
         # Then delete complaint
         cursor.execute("DELETE FROM rail_sathi_railsathicomplain WHERE complain_id = %s", (complain_id,))
         deleted_count = cursor.rowcount
+        if deleted_count:
+            rollup_complaint_deleted(cursor, old_rollup_key)
         conn.commit()
+        invalidate_complaint(complain_id)
         
         return deleted_count
     finally:
@@ -1276,7 +1181,15 @@ def delete_complaint_media(complain_id: int, media_ids: List[int]):
         cursor = conn.cursor()
         cursor.execute(query, (complain_id, media_ids))
         deleted_count = cursor.rowcount
+        if deleted_count:
+            # Removing media leaves no timestamp behind; touch the complaint so Last-Modified advances.
+            # Same clock as every other writer (Python-side), so versions never go backwards.
+            cursor.execute(
+                "UPDATE rail_sathi_railsathicomplain SET updated_at = %s WHERE complain_id = %s",
+                (datetime.now(), complain_id)
+            )
         conn.commit()
+        invalidate_complaint(complain_id)
         
         return deleted_count
     finally:
@@ -0,0 +1,237 @@
+"""Unit Test Cases For complaint partition archival and rehydration."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import gzip
+import json
+from datetime import date, datetime
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+
+from main import app
+from utils import complaint_archival
+
+
+def make_documents(ids):
+    return [
+        {
+            "complain_id": complain_id,
+            "complain_type": "cleaning",
+            "created_at": datetime(2023, 1, 5, 10, 30),
+            "rail_sathi_complain_media_files": [{"id": complain_id * 10, "media_url": f"https://x/{complain_id}.jpg"}],
+        }
+        for complain_id in ids
+    ]
+
+
+class FakeCatalogCursor:
+    def __init__(self, paths):
+        self.paths = paths
+        self.params = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.params = params
+
+    def fetchall(self):
+        return [{"file_path": path} for path in self.paths]
+
+
+class FakeConn:
+    def __init__(self, paths):
+        self.cursors = []
+        self.paths = paths
+
+    def cursor(self, *args, **kwargs):
+        cursor = FakeCatalogCursor(self.paths)
+        self.cursors.append(cursor)
+        return cursor
+
+
+@pytest.fixture(autouse=True)
+def clear_archive_caches():
+    complaint_archival._archived_documents.clear()
+    complaint_archival._archive_indexes.clear()
+    yield
+
+
+def test_add_months_and_retention_cutoff():
+    assert complaint_archival.add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert complaint_archival.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert complaint_archival.retention_cutoff(date(2026, 10, 19), 24) == date(2024, 10, 1)
+    assert complaint_archival.partition_name("rail_sathi_railsathicomplain", date(2024, 3, 1)) == \
+        "rail_sathi_railsathicomplain_y2024m03"
+
+
+def test_write_archive_chunks_and_reads_single_document(tmp_path):
+    path, index_path = complaint_archival.archive_paths(date(2023, 1, 1), str(tmp_path))
+    stats = complaint_archival.write_archive(path, index_path, make_documents(range(1, 26)), chunk_size=10)
+
+    assert stats == {"count": 25, "min_id": 1, "max_id": 25}
+    index = json.load(open(index_path))
+    assert [entry[:2] for entry in index] == [[1, 10], [11, 20], [21, 25]]
+    assert not os.path.exists(f"{path}.tmp")
+
+    # Every chunk is a standalone gzip member; the whole file still reads as one stream
+    with gzip.open(path, "rt") as f:
+        assert [json.loads(line)["complain_id"] for line in f] == list(range(1, 26))
+
+    document = complaint_archival.read_archived_document(path, 17)
+    assert document["complain_id"] == 17
+    assert document["created_at"] == "2023-01-05T10:30:00"
+    assert document["rail_sathi_complain_media_files"][0]["id"] == 170
+    assert complaint_archival.read_archived_document(path, 26) is None
+
+
+def test_write_archive_rejects_unordered_documents(tmp_path):
+    path, index_path = complaint_archival.archive_paths(date(2023, 1, 1), str(tmp_path))
+    with pytest.raises(ValueError):
+        complaint_archival.write_archive(path, index_path, make_documents([3, 1]))
+    assert not os.path.exists(path)
+
+
+def test_rehydrate_complaint_uses_catalog_and_caches(tmp_path):
+    path, index_path = complaint_archival.archive_paths(date(2023, 1, 1), str(tmp_path))
+    complaint_archival.write_archive(path, index_path, make_documents([5, 8, 13]))
+    missing = str(tmp_path / "complaints_y2023m02.jsonl.gz")
+
+    conn = FakeConn([missing, path])
+    assert complaint_archival.rehydrate_complaint(conn, 8)["complain_id"] == 8
+    assert conn.cursors[0].params == (8,)
+
+    # Second lookup is served from memory
+    assert complaint_archival.rehydrate_complaint(conn, 8)["complain_id"] == 8
+    assert len(conn.cursors) == 1
+
+    assert complaint_archival.rehydrate_complaint(FakeConn([]), 9) is None
+
+
+def test_rehydrate_complaint_resolves_catalog_paths_against_archive_dir(tmp_path, monkeypatch):
+    path, index_path = complaint_archival.archive_paths(date(2023, 1, 1), str(tmp_path))
+    complaint_archival.write_archive(path, index_path, make_documents([5]))
+    conn = FakeConn([os.path.basename(path)])
+
+    monkeypatch.setattr(complaint_archival, "ARCHIVE_DIR", "")
+    assert complaint_archival.rehydrate_complaint(conn, 5) is None
+
+    monkeypatch.setattr(complaint_archival, "ARCHIVE_DIR", str(tmp_path))
+    assert complaint_archival.rehydrate_complaint(conn, 5)["complain_id"] == 5
+
+
+@pytest.mark.parametrize("archive_dir", ["", "archive/complaints"])
+def test_archive_job_requires_absolute_archive_dir(monkeypatch, archive_dir):
+    monkeypatch.setattr(complaint_archival, "ARCHIVE_DIR", archive_dir)
+    conn = FakeConn([])
+
+    with pytest.raises(ValueError):
+        complaint_archival.archive_old_partitions(conn, dry_run=True)
+    with pytest.raises(ValueError):
+        complaint_archival.archive_month(conn, date(2023, 1, 1))
+    assert conn.cursors == []
+
+
+@pytest.mark.asyncio
+async def test_get_complaint_falls_back_to_archive(monkeypatch):
+    monkeypatch.setattr("main.get_complaint_version", lambda complain_id: None)
+    monkeypatch.setattr("main.get_complaint_by_id", lambda complain_id: None)
+    archived_ids = []
+
+    def fake_archived(complain_id):
+        archived_ids.append(complain_id)
+        return None
+
+    monkeypatch.setattr("main.get_archived_complaint", fake_archived)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/rs_microservice/complaint/get/42")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert archived_ids == [42]
+
+
+class RecordingCursor(FakeCatalogCursor):
+    def __init__(self, statements, counts):
+        super().__init__([])
+        self.statements = statements
+        self.counts = counts
+
+    def execute(self, query, params=None):
+        self.statements.append(" ".join(query.split()))
+        self.params = params if params is not None else self.params
+
+    def fetchone(self):
+        return {"count": self.counts.pop(0)}
+
+
+class RecordingConn(FakeConn):
+    """Answers the media partition count and the misplaced media count, in that order"""
+
+    def __init__(self, statements, counts):
+        super().__init__([])
+        self.statements = statements
+        self.counts = list(counts)
+
+    def cursor(self, *args, **kwargs):
+        cursor = RecordingCursor(self.statements, self.counts)
+        self.cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        self.statements.append("COMMIT")
+
+
+def test_archive_month_locks_partitions_before_export(tmp_path, monkeypatch):
+    statements = []
+
+    def fake_export(conn, month):
+        statements.append("EXPORT")
+        return make_documents([1, 2])
+
+    monkeypatch.setattr(complaint_archival, "_export_documents", fake_export)
+    conn = RecordingConn(statements, [2, 0])
+    result = complaint_archival.archive_month(conn, date(2023, 1, 1), str(tmp_path))
+
+    assert result["count"] == 2
+    # The catalog stores the file relative to the archive root
+    assert conn.cursors[-1].params[1] == "complaints_y2023m01.jsonl.gz"
+    assert statements[0] == ('LOCK TABLE "rail_sathi_railsathicomplain_y2023m01", '
+                             '"rail_sathi_railsathicomplainmedia_y2023m01" IN SHARE MODE')
+    assert statements[1] == "EXPORT"
+    assert any("DETACH PARTITION" in statement for statement in statements)
+    assert statements[-1] == "COMMIT"
+
+
+def test_archive_month_keeps_media_uploaded_after_its_complaint_month(tmp_path, monkeypatch):
+    # A January complaint whose photo came in February: the media row carries the
+    # complaint's created_at, so it sits in (and is archived with) the January partition
+    documents = make_documents([7])
+    documents[0]["rail_sathi_complain_media_files"][0]["created_at"] = datetime(2023, 2, 2, 9, 0)
+    monkeypatch.setattr(complaint_archival, "_export_documents", lambda conn, month: documents)
+    statements = []
+
+    result = complaint_archival.archive_month(RecordingConn(statements, [1, 0]), date(2023, 1, 1), str(tmp_path))
+
+    assert result["media_count"] == 1
+    archived = complaint_archival.read_archived_document(result["file_path"], 7)
+    assert archived["rail_sathi_complain_media_files"][0]["created_at"] == "2023-02-02T09:00:00"
+
+
+@pytest.mark.parametrize("counts", [[0, 1], [2, 0]], ids=["media-in-other-month", "media-of-other-month"])
+def test_archive_month_refuses_misplaced_media(tmp_path, monkeypatch, counts):
+    monkeypatch.setattr(complaint_archival, "_export_documents", lambda conn, month: make_documents([7]))
+    statements = []
+
+    with pytest.raises(ValueError):
+        complaint_archival.archive_month(RecordingConn(statements, counts), date(2023, 1, 1), str(tmp_path))
+
+    assert not any("DETACH PARTITION" in statement for statement in statements)
+    assert "COMMIT" not in statements
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,98 @@
+"""Unit Test Cases For the complaint read-through cache."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import pytest
+import services.unauth_api_services as unauth
+from utils import complaint_cache
+
+
+class CountingConn:
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    complaint_cache.clear_complaint_cache()
+    yield
+    complaint_cache.clear_complaint_cache()
+
+
+def install_fake_db(monkeypatch, calls):
+    def fake_query(conn, query, params=None):
+        calls.append(query)
+        complain_id = params[0][0]
+        return [{
+            "complain_id": complain_id,
+            "complain_status": "pending",
+            "train_name": "Express",
+            "train_detail_name": None,
+            "rail_sathi_complain_media_files": [{"id": 7, "media_type": "image", "media_url": "/a.jpg"}],
+        }]
+
+    monkeypatch.setattr(unauth, "get_db_connection", lambda: CountingConn())
+    monkeypatch.setattr(unauth, "execute_query", fake_query)
+
+
+def test_get_complaint_by_id_is_read_through(monkeypatch):
+    calls = []
+    install_fake_db(monkeypatch, calls)
+
+    first = unauth.get_complaint_by_id(42)
+    second = unauth.get_complaint_by_id(42)
+
+    assert first == second
+    assert first["rail_sathi_complain_media_files"][0]["id"] == 7
+    assert first["train_name"] == "Express"
+    assert len(calls) == 1  # single document query, only on the first call
+
+
+def test_cached_copy_is_isolated_from_caller_mutation(monkeypatch):
+    install_fake_db(monkeypatch, [])
+
+    complaint = unauth.get_complaint_by_id(42)
+    complaint["customer_care"] = "9123183988"
+    complaint["rail_sathi_complain_media_files"].clear()
+
+    again = unauth.get_complaint_by_id(42)
+    assert "customer_care" not in again
+    assert len(again["rail_sathi_complain_media_files"]) == 1
+
+
+def test_invalidate_forces_reload(monkeypatch):
+    calls = []
+    install_fake_db(monkeypatch, calls)
+
+    unauth.get_complaint_by_id(42)
+    complaint_cache.invalidate_complaint(42)
+    unauth.get_complaint_by_id(42)
+
+    assert len(calls) == 2
+
+
+def test_hit_and_miss_return_same_types(monkeypatch):
+    from datetime import datetime, time as dtime
+    from decimal import Decimal
+
+    def fake_query(conn, query, params=None):
+        return [{
+            "complain_id": 42,
+            "train_detail_name": "Express",
+            "complain_time": dtime(10, 30),
+            "created_at": datetime(2025, 1, 2, 10, 30),
+            "rating": Decimal("4.5"),
+            "rail_sathi_complain_media_files": [],
+        }]
+
+    monkeypatch.setattr(unauth, "get_db_connection", lambda: CountingConn())
+    monkeypatch.setattr(unauth, "execute_query", fake_query)
+
+    miss = unauth.get_complaint_by_id(42)
+    hit = unauth.get_complaint_by_id(42)
+    assert miss == hit
+    assert {k: type(v) for k, v in miss.items()} == {k: type(v) for k, v in hit.items()}
+    assert miss["complain_time"] == "10:30:00"
+    # The Redis tier stores plain JSON of the same document
+    assert complaint_cache.json.loads(complaint_cache.json.dumps(miss)) == hit
@@ -0,0 +1,139 @@
+"""Unit Test Cases For the LISTEN/NOTIFY complaint feed fan-out."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import asyncio
+import json
+import threading
+import pytest
+from utils.complaint_feed import ComplaintFeed
+from services.complaint_feed_services import format_sse
+
+
+class FakeListener:
+    def __init__(self):
+        self.channels = []
+
+    def listen(self, channel, handler):
+        self.channels.append(channel)
+
+    def on_reconnect(self, hook):
+        self.hook = hook
+
+
+@pytest.mark.asyncio
+async def test_feed_delivers_by_train_from_listener_thread():
+    feed = ComplaintFeed(FakeListener())
+    ndls = feed.subscribe([("train", "12345"), ("train", "012345")])
+    other = feed.subscribe([("train", "22222")])
+
+    event = {"op": "insert", "complain_id": 7, "train_number": "12345", "complain_status": "pending"}
+    worker = threading.Thread(target=feed.publish, args=(event,))
+    worker.start()
+    worker.join()
+
+    received = await asyncio.wait_for(ndls.get(), timeout=1)
+    assert received["complain_id"] == 7
+    assert received["type"] == "complaint"
+    assert other.queue.empty()
+    assert feed.listener.channels == ["rs_complaint_changes"]
+
+
+@pytest.mark.asyncio
+async def test_feed_overflow_and_reconnect_request_resync():
+    feed = ComplaintFeed(FakeListener())
+    subscription = feed.subscribe([("mobile", "9999999999")])
+    subscription.queue = asyncio.Queue(maxsize=2)
+
+    for complain_id in range(3):
+        feed.publish({"complain_id": complain_id, "mobile_number": "9999999999"})
+    await asyncio.sleep(0)
+    assert (await subscription.get())["type"] == "resync"
+    assert subscription.queue.empty()
+
+    feed.listener.hook()
+    await asyncio.sleep(0)
+    assert (await subscription.get())["type"] == "resync"
+
+    feed.unsubscribe(subscription)
+    assert feed.subscriber_count() == 0
+    assert feed.publish({"complain_id": 9, "mobile_number": "9999999999"}) == 0
+
+
+def test_format_sse():
+    frame = format_sse({"type": "complaint", "complain_id": 5, "updated_at": "2025-10-16T10:00:00", "train_number": "12345"})
+    lines = frame.split("\n")
+    assert lines[0] == "event: complaint"
+    assert lines[1] == "id: 5:2025-10-16T10:00:00"
+    assert json.loads(lines[2][len("data: "):])["train_number"] == "12345"
+    assert frame.endswith("\n\n")
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.accepted = False
+        self.closed_with = None
+        self.sent = []
+        self.incoming = asyncio.Queue()
+
+    async def accept(self):
+        self.accepted = True
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def test_passenger_update_filters_non_status_edits():
+    from services.complaint_feed_services import passenger_update
+    assert passenger_update({"op": "update", "complain_id": 1, "previous_status": "pending", "complain_status": "pending"}) is None
+    assert passenger_update({"op": "update", "complain_id": 1, "previous_status": "pending", "complain_status": "completed"})["type"] == "status"
+    assert passenger_update({"op": "media", "complain_id": 1, "media": {"id": 3}})["media"] == {"id": 3}
+    assert passenger_update({"type": "resync"}) == {"type": "resync"}
+
+
+@pytest.mark.asyncio
+async def test_status_socket_pushes_transitions(monkeypatch):
+    import services.complaint_feed_services as feed_services
+    feed = ComplaintFeed(FakeListener())
+    monkeypatch.setattr(feed_services, "complaint_feed", feed)
+    monkeypatch.setattr(feed_services, "get_current_user", lambda token: {"phone": "9999999999"})
+
+    websocket = FakeWebSocket()
+    handler = asyncio.create_task(feed_services.complaint_status_ws(websocket, token="t"))
+    while feed.subscriber_count() == 0:
+        await asyncio.sleep(0.01)
+
+    feed.publish({"op": "update", "complain_id": 4, "mobile_number": "9999999999", "previous_status": "pending", "complain_status": "pending"})
+    feed.publish({"op": "update", "complain_id": 4, "mobile_number": "9999999999", "previous_status": "pending", "complain_status": "completed"})
+    feed.publish({"op": "update", "complain_id": 5, "mobile_number": "8888888888", "previous_status": "pending", "complain_status": "completed"})
+    while not websocket.sent:
+        await asyncio.sleep(0.01)
+
+    await websocket.incoming.put({"type": "websocket.disconnect"})
+    await asyncio.wait_for(handler, timeout=1)
+
+    assert websocket.accepted
+    assert websocket.sent == [{"type": "status", "complain_id": 4, "complain_status": "completed", "previous_status": "pending", "updated_at": None}]
+    assert feed.subscriber_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_status_socket_rejects_bad_token(monkeypatch):
+    import services.complaint_feed_services as feed_services
+    from fastapi import HTTPException
+
+    def reject(token):
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    monkeypatch.setattr(feed_services, "get_current_user", reject)
+
+    websocket = FakeWebSocket()
+    await feed_services.complaint_status_ws(websocket, token="bad")
+    assert websocket.closed_with == feed_services.WS_CLOSE_UNAUTHORIZED
+    assert not websocket.accepted
@@ -0,0 +1,97 @@
+"""Unit Test Cases For the incremental complaint rollup and the report endpoint."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+from datetime import date
+import pytest
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+
+from main import app
+from services.user_profile_services import get_current_user
+import services.complaint_report_services as reports
+from utils import complaint_rollup
+
+PENDING = (date(2025, 10, 1), "NDLS", "12345", "B", "cleaning", "pending")
+COMPLETED = PENDING[:5] + ("completed",)
+
+
+class FakeCursor:
+    def __init__(self, keys, fail_on=None):
+        self.keys = list(keys)
+        self.fail_on = fail_on
+        self.deltas = []
+        self.statements = []
+        self._row = None
+
+    def execute(self, query, params=None):
+        self.statements.append(query.strip().split()[0])
+        if self.fail_on and self.fail_on in query:
+            raise RuntimeError("relation does not exist")
+        if "rs_complaint_rollup_keys" in query:
+            self._row = self.keys.pop(0)
+        elif "INSERT INTO rs_complaint_daily_rollup" in query:
+            self.deltas.append((params[:6], params[6]))
+
+    def fetchone(self):
+        return self._row
+
+
+def test_created_complaint_counts_once():
+    cursor = FakeCursor([PENDING])
+    complaint_rollup.rollup_complaint_created(cursor, 1)
+    assert cursor.deltas == [(PENDING, 1)]
+
+
+def test_status_change_moves_between_cells():
+    cursor = FakeCursor([PENDING, COMPLETED])
+    old_key = complaint_rollup.rollup_key_before_change(cursor, 1)
+    complaint_rollup.rollup_complaint_updated(cursor, 1, old_key)
+    assert cursor.deltas == [(PENDING, -1), (COMPLETED, 1)]
+
+
+def test_unchanged_dimensions_apply_no_delta():
+    cursor = FakeCursor([PENDING, PENDING])
+    complaint_rollup.rollup_complaint_updated(cursor, 1, complaint_rollup.rollup_key_before_change(cursor, 1))
+    assert cursor.deltas == []
+
+
+def test_rollup_failure_does_not_fail_the_write():
+    cursor = FakeCursor([PENDING], fail_on="INSERT INTO rs_complaint_daily_rollup")
+    complaint_rollup.rollup_complaint_created(cursor, 1)
+    assert cursor.statements[-1] == "ROLLBACK"
+
+
+def test_report_query_rejects_unknown_dimension():
+    query, params = complaint_rollup.build_rollup_report_query(["NDLS"], date(2025, 7, 1), date(2025, 9, 28), ["depot", "status"])
+    assert "GROUP BY 1, 2" in query and "complain_status AS status" in query
+    assert params == [["NDLS"], date(2025, 7, 1), date(2025, 9, 28)]
+    with pytest.raises(ValueError):
+        complaint_rollup.build_rollup_report_query(["NDLS"], date(2025, 7, 1), date(2025, 9, 28), ["1; DROP TABLE x"])
+
+
+async def report_request(params):
+    app.dependency_overrides[get_current_user] = lambda: {"username": "war_room"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            return await ac.get("/rs_microservice/v2/reports/complaints", params=params)
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.asyncio
+async def test_report_endpoint(monkeypatch):
+    calls = []
+    def fake_report(username, date_from, date_to, groups):
+        calls.append(groups)
+        return [{"depot": "NDLS", "complain_type": "cleaning", "complaint_count": 7},
+                {"depot": "NDLS", "complain_type": "linen", "complaint_count": 3}]
+    monkeypatch.setattr(reports, "get_complaint_report", fake_report)
+    res = await report_request({"date_from": "2025-07-01", "date_to": "2025-09-28", "group_by": "depot,complain_type"})
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()["total"] == 10
+    assert calls == [["depot", "complain_type"]]
+
+    res = await report_request({"date_from": "2025-07-01", "group_by": "depot,berth"})
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
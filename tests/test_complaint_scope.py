@@ -0,0 +1,61 @@
+"""Unit Test Cases For the cached user -> depot -> train scope resolver."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import pytest
+from utils import complaint_scope
+from utils.train_keys import train_key
+
+
+@pytest.fixture(autouse=True)
+def clear_scope_cache():
+    complaint_scope._user_depot_cache.clear()
+    complaint_scope.invalidate_depot_trains()
+    yield
+    complaint_scope._user_depot_cache.clear()
+    complaint_scope.invalidate_depot_trains()
+
+
+def install_fake_db(monkeypatch, calls):
+    def fake_query(conn, query, params=None):
+        calls.append(query)
+        if "user_onboarding_user" in query:
+            return [{"depot_code": "NDLS"}, {"depot_code": "BCT"}]
+        return [
+            {"depot_code": "NDLS", "train_no": 12345},
+            {"depot_code": "BCT", "train_no": 2951},
+        ]
+
+    monkeypatch.setattr(complaint_scope, "execute_query", fake_query)
+
+
+def test_train_key_is_canonical_and_interned():
+    assert train_key(12345) == train_key("012345") == train_key(" 12345 ") == "12345"
+    assert train_key("0000") == "0"
+    assert train_key("") == train_key(None) == ""
+    assert train_key("SPL01") == "SPL01"
+    assert train_key("02951") is train_key(2951)
+
+
+def test_scope_is_cached_across_calls(monkeypatch):
+    calls = []
+    install_fake_db(monkeypatch, calls)
+
+    first = complaint_scope.resolve_user_train_scope(None, mobile_number="9999999999")
+    second = complaint_scope.resolve_user_train_scope(None, mobile_number="9999999999")
+
+    assert first == second
+    assert first == ["12345", "2951"]
+    assert len(calls) == 2  # depots + trains, only on the first call
+
+
+def test_depot_invalidation_reloads_trains(monkeypatch):
+    calls = []
+    install_fake_db(monkeypatch, calls)
+
+    complaint_scope.resolve_user_train_scope(None, username="ehk_user")
+    complaint_scope.invalidate_depot_trains("BCT")
+    complaint_scope.resolve_user_train_scope(None, username="ehk_user")
+
+    assert len(calls) == 3  # depot set still cached, only the train set is reloaded
@@ -0,0 +1,65 @@
+"""Unit Test Cases For the complaint search endpoint."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+from datetime import date
+import pytest
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+
+from main import app
+from services.user_profile_services import get_current_user
+import services.complaint_search_services as search
+
+
+def test_ranked_query_binds_text_before_filters():
+    query, params = search.build_search_query(["12345"], date(2025, 10, 1), date(2025, 10, 2), text="water leak", coach="b2", limit=20)
+    assert "ts_rank_cd(c.search_vector, websearch_to_tsquery('simple', %s))" in query
+    assert "ORDER BY hits.rank DESC, hits.complain_id DESC LIMIT %s" in query
+    assert query.count("%s") == len(params)
+    assert params[0] == "water leak" and params[-2] == "water leak"
+    assert "B2" in params and params[-1] == 20
+    assert "upper(c.coach) = %s" in query
+
+
+def test_ranked_cursor_round_trip():
+    cursor = search.encode_search_cursor({"rank": 0.25, "complain_id": 17})
+    assert search.decode_search_cursor(cursor) == (0.25, 17)
+    query, params = search.build_search_query(["12345"], date(2025, 10, 1), date(2025, 10, 1), text="fan", cursor=cursor)
+    assert "(hits.rank, hits.complain_id) < (%s::real, %s)" in query
+    assert params[-3:] == [0.25, 17, 50]
+    with pytest.raises(ValueError):
+        search.decode_search_cursor("garbage")
+
+
+def test_filter_only_query_is_newest_first():
+    query, params = search.build_search_query(["12345"], date(2025, 10, 1), date(2025, 10, 1), pnr_number=" 1234567890 ", train_number="02951")
+    assert "search_vector" not in query
+    assert "ORDER BY c.created_at DESC, c.complain_id DESC" in query
+    assert "1234567890" in params and "2951" in params
+
+
+async def search_request(params):
+    app.dependency_overrides[get_current_user] = lambda: {"username": "ehk_user"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            return await ac.get("/rs_microservice/v2/complaint/search", params=params)
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_pages(monkeypatch):
+    hits = [{"complain_id": 9, "rank": 0.5}, {"complain_id": 8, "rank": 0.4}]
+    monkeypatch.setattr(search, "search_complaints", lambda *args, **kwargs: hits)
+    res = await search_request({"q": "toilet", "limit": 2, "date_from": "2025-10-01", "date_to": "2025-10-10"})
+    assert res.status_code == status.HTTP_200_OK
+    assert [hit["complain_id"] for hit in res.json()] == [9, 8]
+    assert search.decode_search_cursor(res.headers["X-Next-Cursor"]) == (0.4, 8)
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint_rejects_unbounded_range():
+    res = await search_request({"q": "toilet", "date_from": "2025-01-01", "date_to": "2025-10-01"})
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
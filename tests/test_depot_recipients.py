@@ -0,0 +1,58 @@
+"""Unit Test Cases For the cached per-depot notification recipients."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import pytest
+from utils import depot_recipients
+
+
+@pytest.fixture(autouse=True)
+def clear_recipient_cache():
+    depot_recipients.invalidate_depot_recipients()
+    yield
+    depot_recipients.invalidate_depot_recipients()
+
+
+def install_fake_db(monkeypatch, calls):
+    def fake_query(conn, query, params=None):
+        calls.append(params)
+        return [
+            {"id": 1, "email": "admin@example.com", "role_name": "railway officer"},
+            {"id": 2, "email": "wr@example.com", "role_name": "war room user railsathi"},
+            {"id": 3, "email": "s2@example.com", "role_name": "s2 admin"},
+            {"id": 4, "email": "wr2@example.com", "role_name": "war room user"},
+        ]
+
+    monkeypatch.setattr(depot_recipients, "execute_query", fake_query)
+
+
+def test_recipients_grouped_by_role_in_one_query(monkeypatch):
+    calls = []
+    install_fake_db(monkeypatch, calls)
+
+    groups = depot_recipients.get_depot_recipients("NDLS", conn=object())
+
+    assert [user["id"] for user in groups["war_room"]] == [2, 4]
+    assert [user["id"] for user in groups["s2_admin"]] == [3]
+    assert [user["id"] for user in groups["railway_admin"]] == [1]
+    assert len(calls) == 1 and calls[0][1] == "NDLS"
+    assert set(calls[0][0]) == set(depot_recipients.RECIPIENT_ROLES)
+
+
+def test_recipients_cached_per_depot(monkeypatch):
+    calls = []
+    install_fake_db(monkeypatch, calls)
+
+    first = depot_recipients.get_depot_recipients("NDLS", conn=object())
+    first["war_room"].clear()  # callers get their own lists
+    second = depot_recipients.get_depot_recipients("NDLS", conn=object())
+    assert len(second["war_room"]) == 2
+    assert len(calls) == 1
+
+    depot_recipients.get_depot_recipients("BCT", conn=object())
+    depot_recipients.invalidate_depot_recipients("NDLS")
+    depot_recipients.get_depot_recipients("NDLS", conn=object())
+    assert [params[1] for params in calls] == ["NDLS", "BCT", "NDLS"]
+
+    assert depot_recipients.get_depot_recipients("") == {"war_room": [], "s2_admin": [], "railway_admin": []}
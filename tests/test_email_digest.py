@@ -0,0 +1,55 @@
+"""Unit Test Cases For the per-depot complaint email digest."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+from utils.email_digest import EmailDigest
+
+
+class FakeSender:
+    def __init__(self):
+        self.messages = []
+
+    def send(self, message):
+        self.messages.append(message)
+        return True
+
+
+def test_digest_enabled_per_depot():
+    assert EmailDigest(depots={"NDLS"}).enabled_for("NDLS")
+    assert not EmailDigest(depots={"NDLS"}).enabled_for("BCT")
+    assert EmailDigest(depots={"*"}).enabled_for("BCT")
+    assert not EmailDigest(depots={"*"}).enabled_for("")
+
+
+def test_burst_merged_per_recipient_set():
+    sender = FakeSender()
+    digest = EmailDigest(depots={"NDLS"}, window_seconds=3600, sender=sender)
+    war_room = ["wr@example.com", "s2@example.com"]
+    for complain_id in (101, 102, 103):
+        digest.add("NDLS", war_room, f"Complaint {complain_id}", f"Complaint ID : {complain_id}", complain_id)
+    # Same people in another order are the same recipient set; other staff get their own mail
+    digest.add("NDLS", list(reversed(war_room)), "Complaint 104", "Complaint ID : 104", 104)
+    digest.add("NDLS", war_room + ["ca@example.com"], "Complaint 105", "Complaint ID : 105", 105)
+    assert sender.messages == []
+
+    digest.flush_all()
+
+    assert len(sender.messages) == 2
+    single, burst = sorted(sender.messages, key=lambda message: "Depot" in message["Subject"])
+    assert burst["Subject"].endswith("4 New Passenger Complaints Submitted - Depot: NDLS")
+    assert burst["To"] == "wr@example.com" and burst["Cc"] == "s2@example.com"
+    body = burst.get_content()
+    assert "Complaint IDs: 101, 102, 103, 104" in body
+    assert all(f"Complaint ID : {complain_id}" in body for complain_id in (101, 102, 103, 104))
+    # A window holding one complaint goes out as the usual mail
+    assert single["Subject"] == "Complaint 105"
+    assert single["Cc"] == "s2@example.com, ca@example.com"
+
+
+def test_window_timer_flushes():
+    sender = FakeSender()
+    digest = EmailDigest(depots={"*"}, window_seconds=0.05, sender=sender)
+    digest.add("BCT", ["wr@example.com"], "Complaint 7", "body", 7)
+    digest._buckets[("BCT", frozenset(["wr@example.com"]))]["timer"].join(2)
+    assert [message["Subject"] for message in sender.messages] == ["Complaint 7"]
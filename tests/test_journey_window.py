@@ -0,0 +1,83 @@
+"""Unit Test Cases For the batch journey-window assignment engine."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from utils import train_journey_utils
+from utils.journey_window import (
+    end_time_seconds, journey_assignment_mask, journey_details_arrays, parse_dates
+)
+
+
+def test_parse_dates_marks_bad_values_nat():
+    parsed = parse_dates(["2026-10-19", "19/10/2026", "", None])
+    assert parsed[0] == np.datetime64("2026-10-19")
+    assert np.isnat(parsed[1:]).all()
+
+
+def test_mask_covers_journey_window_and_last_day_cutoff():
+    origins = parse_dates(["2026-10-17", "2026-10-18", "2026-10-19", "2026-10-20", "bad"])
+    mask = journey_assignment_mask(origins, 3, end_time_seconds(["06:30:00"])[0], date(2026, 10, 19),
+                                   datetime(2026, 10, 19, 7, 0))
+    # Left on the 17th: the 19th is the last day and 07:00 is after arrival
+    assert mask.tolist() == [False, True, True, False, False]
+
+    before_arrival = journey_assignment_mask(origins, 3, 6 * 3600 + 1800, "2026-10-19", datetime(2026, 10, 19, 6, 0))
+    assert before_arrival.tolist() == [True, True, True, False, False]
+
+
+def test_per_assignment_trains():
+    durations, end_seconds = journey_details_arrays(
+        ["12345", "22222", "99999"],
+        {"12345": {"journey_duration_days": 2, "end_time": "10:00:00"}, "22222": {"journey_duration_days": 0}}
+    )
+    assert durations.tolist() == [2, 1, 1]
+    assert end_seconds.tolist() == [36000, 86399, 86399]
+
+
+def test_matches_scalar_check(monkeypatch):
+    details = {"journey_duration_days": 3, "end_time": "14:15:00"}
+    monkeypatch.setattr(train_journey_utils, "get_train_journey_details", lambda train_no: details)
+
+    rng = random.Random(7)
+    target = date(2026, 10, 19)
+    origins = [(target - timedelta(days=rng.randint(-2, 5))).isoformat() for _ in range(200)]
+    for validation_time in (datetime(2026, 10, 19, 9, 0), datetime(2026, 10, 19, 18, 0)):
+        expected = [
+            train_journey_utils.is_user_assigned_on_journey_date(origin, target.isoformat(), validation_time, "12345")
+            for origin in origins
+        ]
+        durations, end_seconds = journey_details_arrays(["12345"], {"12345": details})
+        mask = journey_assignment_mask(parse_dates(origins), durations[0], end_seconds[0], target, validation_time)
+        assert mask.tolist() == expected
+
+
+def test_journey_cache_preloads_once_and_refreshes_changed_trains(monkeypatch):
+    fetches = []
+    table = {"12345": {"journey_duration_days": 2, "end_time": "10:00:00"}}
+
+    def fake_fetch(where_clause="", params=None):
+        fetches.append(params)
+        if params:
+            return {key: table[key] for key in ("12345",) if int(key) in params[0]}
+        return dict(table)
+
+    monkeypatch.setattr(train_journey_utils, "_fetch_journey_details", fake_fetch)
+    monkeypatch.setattr(train_journey_utils, "_journey_listening", True)
+    train_journey_utils.invalidate_train_journey_details()
+
+    details = [train_journey_utils.get_train_journey_details(train_no) for train_no in ("12345", "012345", "99999")]
+    assert [d["journey_duration_days"] for d in details] == [2, 2, 1]
+    assert fetches == [None]
+
+    table["12345"] = {"journey_duration_days": 3, "end_time": "10:00:00"}
+    train_journey_utils.invalidate_train_journey_details("012345")
+    assert train_journey_utils.get_journey_details_map(["12345"])["12345"]["journey_duration_days"] == 3
+    assert fetches == [None, ([12345],)]
+    train_journey_utils.invalidate_train_journey_details()
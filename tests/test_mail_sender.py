@@ -0,0 +1,99 @@
+"""Unit Test Cases For the persistent SMTP mail sender."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import threading
+
+import pytest
+from aiosmtplib import SMTPServerDisconnected
+
+from utils import mail_sender as ms
+
+
+class FakeSMTP:
+    instances = []
+    fail_next_send = 0
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.is_connected = False
+        self.sent = []
+        self.logins = 0
+        FakeSMTP.instances.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def login(self, username, password):
+        self.logins += 1
+
+    async def send_message(self, message):
+        if FakeSMTP.fail_next_send:
+            FakeSMTP.fail_next_send -= 1
+            self.is_connected = False
+            raise SMTPServerDisconnected("Connection lost")
+        self.sent.append(message["Subject"])
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    FakeSMTP.fail_next_send = 0
+    monkeypatch.setattr(ms, "SMTP", FakeSMTP)
+    monkeypatch.setattr(ms.random, "uniform", lambda low, high: 0)
+    return FakeSMTP
+
+
+def test_messages_reuse_one_authenticated_session(fake_smtp):
+    sender = ms.MailSender(pool_size=1)
+    try:
+        for number in range(5):
+            assert sender.send(ms.build_message(f"subject {number}", "body", ["a@example.com"], ["b@example.com"]))
+    finally:
+        sender.stop()
+
+    assert len(fake_smtp.instances) == 1
+    assert fake_smtp.instances[0].sent == [f"subject {number}" for number in range(5)]
+    assert sender.stats["sent"] == 5 and sender.stats["connects"] == 1
+    assert not sender.running
+
+
+def test_reconnects_after_server_disconnect(fake_smtp):
+    fake_smtp.fail_next_send = 1
+    sender = ms.MailSender(pool_size=1)
+    try:
+        sender.send(ms.build_message("retried", "body", ["a@example.com"]))
+    finally:
+        sender.stop()
+
+    assert [smtp.sent for smtp in fake_smtp.instances] == [[], ["retried"]]
+    assert sender.stats["sent"] == 1 and sender.stats["failed"] == 0
+
+
+def test_full_queue_drops_without_blocking(fake_smtp, monkeypatch):
+    release = threading.Event()
+    original = FakeSMTP.send_message
+
+    async def slow_send(self, message):
+        import asyncio
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        await original(self, message)
+
+    monkeypatch.setattr(FakeSMTP, "send_message", slow_send)
+    sender = ms.MailSender(pool_size=1, queue_size=2)
+    try:
+        results = [sender.send(ms.build_message(f"s{n}", "body", ["a@example.com"])) for n in range(3)]
+        assert results == [True, True, False]
+        assert sender.stats["dropped"] == 1
+        release.set()
+    finally:
+        sender.stop()
+    assert sender.stats["sent"] == 2
@@ -0,0 +1,155 @@
+"""Unit Test Cases For the push / in-app notification dispatcher."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import threading
+
+import requests
+
+from utils import notification_dispatcher as nd
+from utils import notification_utils
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return {"status": self.status_code}
+
+
+class FakeSession:
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.posts = []
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None):
+        with self.lock:
+            self.posts.append((url, json))
+            status = self.statuses.pop(0) if self.statuses else 200
+        if status == "timeout":
+            raise requests.Timeout("read timed out")
+        return FakeResponse(status)
+
+
+def test_retries_transient_failures_with_jitter(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(nd.time, "sleep", sleeps.append)
+    session = FakeSession(["timeout", 503, 200, 400])
+    dispatcher = nd.NotificationDispatcher(workers=1, max_attempts=3, retry_base=0.5, session=session)
+
+    assert dispatcher.submit("http://svc/notification/push/", {"n": 1}, label="first")
+    assert dispatcher.submit("http://svc/notification/push/", {"n": 2}, label="rejected")
+    dispatcher.stop()
+
+    # Timeout and 503 retried, then sent; a 400 is not retried
+    assert [payload["n"] for _, payload in session.posts] == [1, 1, 1, 2]
+    assert len(sleeps) == 2 and 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+    metrics = dispatcher.metrics()
+    assert (metrics["sent"], metrics["failed"], metrics["retries"]) == (1, 1, 2)
+    assert metrics["queue_depth"] == 0
+
+
+def test_bounded_queue_drops_when_full():
+    release = threading.Event()
+
+    class BlockingSession(FakeSession):
+        def post(self, url, json=None, timeout=None):
+            release.wait(5)
+            return super().post(url, json, timeout)
+
+    session = BlockingSession()
+    dispatcher = nd.NotificationDispatcher(workers=1, queue_size=2, session=session)
+    results = [dispatcher.submit("http://svc/push/", {"n": n}) for n in range(6)]
+    release.set()
+    dispatcher.stop()
+
+    # One job in the worker's hands and two queued; the rest are dropped
+    assert results.count(True) in (2, 3) and results[:2] == [True, True]
+    assert dispatcher.metrics()["dropped"] == results.count(False)
+    assert len(session.posts) == results.count(True)
+
+
+def test_large_token_lists_are_chunked():
+    session = FakeSession()
+    dispatcher = nd.NotificationDispatcher(workers=3, session=session, token_batch=2)
+    push = "http://svc/notification/push/"
+
+    assert dispatcher.enqueue(push, {"tokens": ["a", "b", "c", "d", "e"], "title": "Complaint 1"})
+    assert dispatcher.enqueue(push, {"tokens": ["f"], "title": "Complaint 2"})
+    dispatcher.stop()
+
+    complaint_1 = sorted(p["tokens"] for _, p in session.posts if p["title"] == "Complaint 1")
+    assert complaint_1 == [["a", "b"], ["c", "d"], ["e"]]
+    assert [p["tokens"] for _, p in session.posts if p["title"] == "Complaint 2"] == [["f"]]
+    assert dispatcher.metrics()["sent"] == 4
+
+
+def test_enqueue_reports_dropped_chunks():
+    release = nd.threading.Event()
+
+    class BlockingSession(FakeSession):
+        def post(self, url, json=None, timeout=None):
+            release.wait(5)
+            return super().post(url, json, timeout)
+
+    dispatcher = nd.NotificationDispatcher(workers=1, queue_size=1, session=BlockingSession(), token_batch=1)
+    assert not dispatcher.enqueue("http://svc/push/", {"tokens": ["a", "b", "c", "d"]})
+    release.set()
+    dispatcher.stop()
+    assert dispatcher.metrics()["dropped"] >= 1
+
+
+def test_identical_waiting_notifications_are_coalesced():
+    started, release = threading.Event(), threading.Event()
+
+    class BlockingSession(FakeSession):
+        def post(self, url, json=None, timeout=None):
+            started.set()
+            release.wait(5)
+            return super().post(url, json, timeout)
+
+    session = BlockingSession()
+    dispatcher = nd.NotificationDispatcher(workers=1, session=session, token_batch=3)
+    push = "http://svc/notification/push/"
+
+    # The worker is busy with the first POST, so the rest wait in the queue
+    assert dispatcher.enqueue(push, {"tokens": ["x"], "title": "Complaint 1"})
+    assert started.wait(5)
+    assert dispatcher.enqueue(push, {"tokens": ["a"], "title": "Complaint 2"})
+    assert dispatcher.enqueue(push, {"tokens": ["b", "a"], "title": "Complaint 2"})
+    assert dispatcher.enqueue(push, {"tokens": ["c"], "title": "Complaint 2"})
+    assert dispatcher.enqueue(push, {"tokens": ["d"], "title": "Complaint 2"})  # batch is full
+    assert dispatcher.enqueue(push, {"tokens": ["e"], "title": "Complaint 3"})
+    release.set()
+    dispatcher.stop()
+
+    assert [(p["title"], p["tokens"]) for _, p in session.posts] == [
+        ("Complaint 1", ["x"]),
+        ("Complaint 2", ["a", "b", "c"]),
+        ("Complaint 2", ["d"]),
+        ("Complaint 3", ["e"]),
+    ]
+    metrics = dispatcher.metrics()
+    assert (metrics["queued"], metrics["coalesced"], metrics["sent"]) == (4, 2, 4)
+
+
+def test_combined_send_queues_push_and_in_app(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(notification_utils.notification_dispatcher, "enqueue",
+                        lambda url, payload, label="": submitted.append((url, payload)) or True)
+
+    assert notification_utils.send_passenger_complaint_push_and_in_app_in_thread(
+        ["token-a", "", "token-b"], {"complain_id": 42, "train_no": "12345"}, product_name="railops"
+    )
+    urls = [url for url, _ in submitted]
+    assert urls[0].endswith("/notification/push/") and urls[1].endswith("/notification/in-app/")
+    assert submitted[0][1]["tokens"] == ["token-a", "token-b"]
+    assert submitted[1][1]["extra_data"]["complaint_id"] == "42"
@@ -0,0 +1,68 @@
+"""Unit Test Cases For the bulk support-contact lookup endpoint."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+
+from main import app
+from services.user_profile_services import get_current_user
+import services.support_contact_services as support_contacts
+from utils import train_assignment_index as tai
+
+ROWS = [
+    {"id": 1, "first_name": "Esha", "last_name": "K", "phone": "900001",
+     "train_no": "12345", "origin_date": "2026-10-18", "role": "EHK", "coach": ""},
+    {"id": 3, "first_name": "Cara", "last_name": "", "phone": "900003",
+     "train_no": "12345", "origin_date": "2026-10-19", "role": "CA", "coach": "A1"},
+]
+
+
+@pytest.fixture
+def loaded_index(monkeypatch):
+    monkeypatch.setattr(tai, "execute_query", lambda conn, query, params=None: ROWS)
+    monkeypatch.setattr(tai, "get_journey_details_map",
+                        lambda trains: {train: {"journey_duration_days": 2} for train in trains})
+    index = tai.TrainAssignmentIndex()
+    index.ensure_fresh(conn=object())
+    monkeypatch.setattr(support_contacts, "train_assignment_index", index)
+    return index
+
+
+async def lookup_request(payload):
+    app.dependency_overrides[get_current_user] = lambda: {"username": "railops_service"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            return await ac.post("/rs_microservice/v2/support-contacts/lookup", json=payload)
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.asyncio
+async def test_lookup_resolves_batch_in_order(loaded_index):
+    res = await lookup_request({"lookups": [
+        {"train_no": "012345", "coach": "a1", "date": "2026-10-19"},
+        {"train_no": "12345", "coach": "S4", "date": "2026-10-19"},
+        {"train_no": "99999", "coach": "B1", "date": "2026-10-19"},
+    ]})
+    assert res.status_code == status.HTTP_200_OK
+    results = res.json()["results"]
+    assert [result["train_no"] for result in results] == ["012345", "12345", "99999"]
+    assert results[0]["support_contact"] == {
+        "ehk_name": "Esha K", "ehk_phone": "900001", "ca_name": "Cara", "ca_phone": "900003"
+    }
+    # CA fields only for exact-match coaches, as in the complaint listings
+    assert results[1]["support_contact"] == {"ehk_name": "Esha K", "ehk_phone": "900001"}
+    assert results[2]["support_contact"] == {"ehk_name": "", "ehk_phone": "", "ca_name": "", "ca_phone": ""}
+
+
+@pytest.mark.asyncio
+async def test_lookup_rejects_oversized_batch(loaded_index, monkeypatch):
+    monkeypatch.setattr(support_contacts, "SUPPORT_CONTACT_LOOKUP_MAX", 2)
+    lookup = {"train_no": "12345", "coach": "A1", "date": "2026-10-19"}
+    res = await lookup_request({"lookups": [lookup] * 3})
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    res = await lookup_request({"lookups": []})
+    assert res.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,121 @@
+"""Unit Test Cases For the charting-time support contact snapshots."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+import json
+from datetime import date, datetime, time
+
+import pytest
+from utils import support_contact_snapshot as scs
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        self.conn.statements.append((query, params))
+
+
+class FakeConn:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeIndex:
+    def __init__(self):
+        self.lookups = []
+
+    def ensure_fresh(self, conn=None):
+        pass
+
+    def lookup_many(self, lookups):
+        lookups = list(lookups)
+        self.lookups.extend(lookups)
+        return [
+            {"ehk_name": "Esha", "ehk_phone": "900001",
+             "ca_name": "Cara" if coach == "A1" else "", "ca_phone": "900003" if coach == "A1" else ""}
+            for train_no, coach, query_date in lookups
+        ]
+
+
+def test_schedule_parsing():
+    assert scs.running_weekdays("[1, 3]") == {1, 3}
+    assert scs.running_weekdays('["Mon", "FRIDAY"]') == {1, 5}
+    assert scs.running_weekdays("Daily") is None
+    assert scs.running_weekdays(None) is None
+
+    assert scs.charted_at(date(2026, 10, 19), "-1", "20:30:00") == datetime(2026, 10, 18, 20, 30)
+    assert scs.charted_at(date(2026, 10, 19), "NA", time(6, 0)) == datetime(2026, 10, 19, 6, 0)
+    assert scs.coach_sequence('["a1", {"coach_no": "B1"}, "A1", ""]') == ["A1", "B1"]
+
+
+def test_due_runs_after_charting_grace():
+    train = {"train_no": "012345", "frequency": "[1, 2]", "charting_day": "-1",
+             "charting_time": "20:00:00", "journey_duration_days": 2}
+    now = datetime(2026, 10, 19, 20, 20)  # Monday evening
+    runs = [(origin, charted) for _, origin, charted in scs.due_runs([train], set(), now)]
+    # Tuesday's run charted at 20:00 today; Sunday's run does not exist; Monday's is on the move
+    assert runs == [(date(2026, 10, 20), datetime(2026, 10, 19, 20, 0)),
+                    (date(2026, 10, 19), datetime(2026, 10, 18, 20, 0))]
+
+    computed = {("12345", date(2026, 10, 19))}
+    assert [origin for _, origin, _ in scs.due_runs([train], computed, datetime(2026, 10, 19, 20, 10))] == []
+
+
+def test_compute_run_snapshots_each_coach_and_day(monkeypatch):
+    assignments = [
+        {"user_id": 7, "coach": "A1", "origin_date": "2026-10-18"},
+        {"user_id": 8, "coach": "A1", "origin_date": "2026-10-19"},
+        {"user_id": 9, "coach": "S4", "origin_date": "2026-10-19"},
+    ]
+    monkeypatch.setattr(scs, "execute_query", lambda conn, query, params=None: [dict(row) for row in assignments])
+    written = []
+    monkeypatch.setattr(scs, "execute_values", lambda cursor, query, values: written.extend(values))
+    conn, index = FakeConn(), FakeIndex()
+
+    train = {"train_no": "12345", "journey_duration_days": 2, "coaches_in_sequence": '["A1", "B1"]'}
+    rows = scs.compute_run(conn, train, date(2026, 10, 19), datetime(2026, 10, 18, 20, 0), index)
+
+    # Sequence coaches first, then assigned coaches missing from the sequence
+    assert rows == 6 == len(written)
+    assert [(row[0], row[2]) for row in written[:3]] == [
+        (date(2026, 10, 19), "A1"), (date(2026, 10, 19), "B1"), (date(2026, 10, 19), "S4")
+    ]
+    by_key = {(row[0], row[2]): row for row in written}
+    assert by_key[(date(2026, 10, 19), "A1")][3:7] == ("Esha", "900001", "Cara", "900003")
+    assert [r["user_id"] for r in json.loads(by_key[(date(2026, 10, 19), "A1")][7])] == [7, 8]
+    # The run that left on the 18th has ended by the 20th
+    assert [r["user_id"] for r in json.loads(by_key[(date(2026, 10, 20), "A1")][7])] == [8]
+    assert json.loads(by_key[(date(2026, 10, 20), "B1")][7]) == []
+
+    assert conn.statements[-1][1] == ("12345", date(2026, 10, 19), datetime(2026, 10, 18, 20, 0), 3)
+    assert conn.commits == 1
+
+
+def test_snapshot_recipients_distinguishes_missing_and_empty(monkeypatch):
+    results = {"S1": [], "S2": [{"id": None, "email": None, "origin_date": None}]}
+    monkeypatch.setattr(scs, "execute_query", lambda conn, query, params=None: results[params[2]])
+    assert scs.snapshot_recipients(FakeConn(), date(2026, 10, 19), "12345", "s1") is None
+    assert scs.snapshot_recipients(FakeConn(), date(2026, 10, 19), "12345", "s2") == []
+
+    def failing(conn, query, params=None):
+        raise RuntimeError("relation rs_support_contact_snapshot does not exist")
+
+    monkeypatch.setattr(scs, "execute_query", failing)
+    conn = FakeConn()
+    assert scs.snapshot_recipients(conn, date(2026, 10, 19), "12345", "A1") is None
+    assert scs.snapshot_contacts(conn, date(2026, 10, 19), [("12345", "A1")]) == {}
+    assert conn.rollbacks == 2
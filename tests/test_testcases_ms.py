@@ -475,3 +475,154 @@ async def test_replace_complaint_internal_error(monkeypatch):
     res = await make_request("PUT", "/rs_microservice/complaint/update/1", data={"name": "Jane Doe", "mobile_number": "9998887776"})
     assert res.status_code == 500
     assert "Internal server error" in res.json()["detail"]
+
+
+# Complaint Microservice - GET complaints by date with keyset pagination
+@pytest.mark.asyncio
+async def test_get_complaints_by_date_paginated(monkeypatch):
+    calls = []
+    def mock_listing(d, mobile, limit=None, after=None):
+        calls.append((limit, after))
+        return [
+            mock_complaint(2, {"complain_id": 2, "created_at": "2024-09-01T11:00:00"}),
+            mock_complaint(1, {"complain_id": 1, "created_at": "2024-09-01T10:00:00"}),
+        ]
+    monkeypatch.setattr("main.get_complaints_by_date_and_mobile", mock_listing)
+    monkeypatch.setattr("main.get_complaint_listing_version", lambda d, m: None)
+    res = await make_request("GET", "/rs_microservice/complaint/get/date/2024-09-01", params={"limit": 2})
+    assert res.status_code == status.HTTP_200_OK
+    assert len(res.json()) == 2
+    assert calls == [(2, None)]
+
+    from services.unauth_api_services import decode_complaint_cursor
+    created_at, complain_id = decode_complaint_cursor(res.headers["X-Next-Cursor"])
+    assert complain_id == 1
+    assert created_at.isoformat() == "2024-09-01T10:00:00"
+
+@pytest.mark.asyncio
+async def test_get_complaints_by_date_last_page(monkeypatch):
+    calls = []
+    def mock_listing(d, mobile, limit=None, after=None):
+        calls.append(after)
+        return []
+    monkeypatch.setattr("main.get_complaints_by_date_and_mobile", mock_listing)
+    monkeypatch.setattr("main.get_complaint_listing_version", lambda d, m: None)
+    res = await make_request("GET", "/rs_microservice/complaint/get/date/2024-09-01", params={"limit": 2, "cursor": "WyIyMDI0LTA5LTAxVDEwOjAwOjAwIiwxXQ"})
+    assert res.status_code == status.HTTP_200_OK
+    assert calls[0][1] == 1 and calls[0][0].isoformat() == "2024-09-01T10:00:00"
+    assert res.json() == []
+    assert "X-Next-Cursor" not in res.headers
+
+@pytest.mark.asyncio
+async def test_get_complaints_by_date_invalid_cursor(monkeypatch):
+    # Rejected before any lookup runs
+    never = lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("must not be called"))
+    monkeypatch.setattr("main.get_complaints_by_date_and_mobile", never)
+    monkeypatch.setattr("main.get_complaint_listing_version", never)
+    res = await make_request("GET", "/rs_microservice/complaint/get/date/2024-09-01", params={"limit": 2, "cursor": "not-a-cursor"})
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert res.json()["detail"] == "Invalid cursor."
+
+@pytest.mark.asyncio
+async def test_get_complaints_by_date_value_error_is_not_a_cursor_error(monkeypatch):
+    monkeypatch.setattr("main.get_complaints_by_date_and_mobile", lambda d, m, limit=None, after=None: (_ for _ in ()).throw(ValueError("bad row")))
+    monkeypatch.setattr("main.get_complaint_listing_version", lambda d, m: None)
+    res = await make_request("GET", "/rs_microservice/complaint/get/date/2024-09-01")
+    assert res.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+# Complaint Microservice - conditional GETs
+MOCK_VERSION = {
+    "complaint_count": 1, "complain_id_sum": 1, "complaints_updated_at": "2024-09-01T10:00:00",
+    "media_count": 0, "media_id_sum": 0, "media_updated_at": None, "last_modified": "2024-09-01T10:00:00",
+}
+
+@pytest.mark.asyncio
+async def test_get_complaint_returns_etag(monkeypatch):
+    monkeypatch.setattr("main.get_complaint_version", lambda cid: dict(MOCK_VERSION))
+    monkeypatch.setattr("main.get_complaint_by_id", mock_get_complaint_by_id)
+    res = await make_request("GET", "/rs_microservice/complaint/get/1")
+    assert res.status_code == status.HTTP_200_OK
+    assert res.headers["ETag"].startswith('W/"')
+    assert res.headers["Last-Modified"] == "Sun, 01 Sep 2024 10:00:00 GMT"
+
+@pytest.mark.asyncio
+async def test_get_complaint_not_modified(monkeypatch):
+    monkeypatch.setattr("main.get_complaint_version", lambda cid: dict(MOCK_VERSION))
+    monkeypatch.setattr("main.get_complaint_by_id", mock_get_complaint_by_id)
+    first = await make_request("GET", "/rs_microservice/complaint/get/1")
+    etag = first.headers.get("ETag")
+    monkeypatch.setattr("main.get_complaint_by_id", lambda cid: (_ for _ in ()).throw(AssertionError("document must not be assembled")))
+    res = await make_request("GET", "/rs_microservice/complaint/get/1", headers={"If-None-Match": etag})
+    assert res.status_code == status.HTTP_304_NOT_MODIFIED
+    assert res.content == b""
+    assert res.headers["ETag"] == etag
+
+@pytest.mark.asyncio
+async def test_get_complaint_if_modified_since(monkeypatch):
+    monkeypatch.setattr("main.get_complaint_version", lambda cid: dict(MOCK_VERSION))
+    monkeypatch.setattr("main.get_complaint_by_id", mock_get_complaint_by_id)
+    res = await make_request("GET", "/rs_microservice/complaint/get/1", headers={"If-Modified-Since": "Sun, 01 Sep 2024 10:00:00 GMT"})
+    assert res.status_code == status.HTTP_304_NOT_MODIFIED
+    res = await make_request("GET", "/rs_microservice/complaint/get/1", headers={"If-Modified-Since": "Sun, 01 Sep 2024 09:59:59 GMT"})
+    assert res.status_code == status.HTTP_200_OK
+
+@pytest.mark.asyncio
+async def test_get_complaint_changed_etag_returns_body(monkeypatch):
+    monkeypatch.setattr("main.get_complaint_version", lambda cid: {**MOCK_VERSION, "media_count": 1, "media_id_sum": 9})
+    monkeypatch.setattr("main.get_complaint_by_id", mock_get_complaint_by_id)
+    res = await make_request("GET", "/rs_microservice/complaint/get/1", headers={"If-None-Match": 'W/"stale"'})
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()["data"]["complain_id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_complaint_reloads_stale_cached_document(monkeypatch):
+    # The version row sees a write this worker's cache missed: reload before labelling the body
+    monkeypatch.setattr("main.get_complaint_version", lambda cid: {**MOCK_VERSION, "complaints_updated_at": "2024-09-02T08:00:00"})
+    documents = [mock_complaint(1), mock_complaint(1, {"updated_at": "2024-09-02T08:00:00", "complain_status": "resolved"})]
+    invalidated = []
+    monkeypatch.setattr("main.get_complaint_by_id", lambda cid: documents.pop(0))
+    monkeypatch.setattr("main.invalidate_complaint", invalidated.append)
+    res = await make_request("GET", "/rs_microservice/complaint/get/1")
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()["data"]["complain_status"] == "resolved"
+    assert invalidated == [1]
+
+@pytest.mark.asyncio
+async def test_get_complaint_matching_cached_document_served(monkeypatch):
+    monkeypatch.setattr("main.get_complaint_version", lambda cid: dict(MOCK_VERSION))
+    monkeypatch.setattr("main.get_complaint_by_id", mock_get_complaint_by_id)
+    monkeypatch.setattr("main.invalidate_complaint", lambda cid: (_ for _ in ()).throw(AssertionError("cache must be kept")))
+    res = await make_request("GET", "/rs_microservice/complaint/get/1")
+    assert res.status_code == status.HTTP_200_OK
+
+
+# Complaint Microservice - response encoding
+@pytest.mark.asyncio
+async def test_get_complaints_by_date_gzip(monkeypatch):
+    complaints = [mock_complaint(i, {"complain_id": i}) for i in range(1, 21)]
+    monkeypatch.setattr("main.get_complaints_by_date_and_mobile", lambda d, m, limit=None, after=None: complaints)
+    monkeypatch.setattr("main.get_complaint_listing_version", lambda d, m: None)
+    res = await make_request("GET", "/rs_microservice/complaint/get/date/2024-09-01", headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == status.HTTP_200_OK
+    assert res.headers["content-encoding"] == "gzip"
+    assert [item["data"]["complain_id"] for item in res.json()] == list(range(1, 21))
+
+@pytest.mark.asyncio
+async def test_small_response_not_compressed():
+    res = await make_request("GET", "/rs_microservice", headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == status.HTTP_200_OK
+    assert "content-encoding" not in res.headers
+
+@pytest.mark.asyncio
+async def test_get_complaints_by_date_drops_invalid_items(monkeypatch):
+    broken = mock_complaint(2, {"complain_id": 2})
+    del broken["complain_status"]
+    complaints = [mock_complaint(1, {"complain_id": 1}), broken, mock_complaint(3, {"complain_id": 3})]
+    monkeypatch.setattr("main.get_complaints_by_date_and_mobile", lambda d, m, limit=None, after=None: complaints)
+    monkeypatch.setattr("main.get_complaint_listing_version", lambda d, m: None)
+    res = await make_request("GET", "/rs_microservice/complaint/get/date/2024-09-01")
+    assert res.status_code == status.HTTP_200_OK
+    assert [item["data"]["complain_id"] for item in res.json()] == [1, 3]
+    assert res.json()[0]["data"]["support_contact"]["ehk_name"] == ""
@@ -0,0 +1,93 @@
+"""Unit Test Cases For the in-memory train assignment (support contact) index."""
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+from datetime import date
+
+import pytest
+from utils import train_assignment_index as tai
+
+
+def user(user_id, first_name, phone, assignments):
+    """Rows as ASSIGNED_USERS_QUERY returns them: (train_no, origin_date, role, coach)"""
+    return [
+        {"id": user_id, "first_name": first_name, "last_name": "", "phone": phone,
+         "train_no": train_no, "origin_date": origin_date, "role": role, "coach": coach}
+        for train_no, origin_date, role, coach in assignments
+    ]
+
+
+USERS = {
+    1: user(1, "Esha", "900001", [("12345", "2026-10-18", "EHK", "")]),
+    # One EHK row per coach of the assignment collapses into one entry
+    2: user(2, "Eli", "900002", [("12345", "2026-10-19", "EHK", ""), ("12345", "2026-10-19", "EHK", "")]),
+    # Multi-coach CA assignments come back with coach ''
+    3: user(3, "Cara", "900003", [("12345", date(2026, 10, 19), "CA", "A1"), ("12345", "2026-10-19", "CA", "")]),
+}
+
+
+class FakeDb:
+    def __init__(self, users):
+        self.users = users
+        self.queries = []
+
+    def __call__(self, conn, query, params=None):
+        self.queries.append((query, params))
+        ids = params[0] if params else sorted(self.users)
+        return [row for user_id in ids if user_id in self.users for row in self.users[user_id]]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDb(dict(USERS))
+    monkeypatch.setattr(tai, "execute_query", db)
+    monkeypatch.setattr(tai, "get_train_journey_details",
+                        lambda train_no: {"journey_duration_days": 2 if train_no == "12345" else 1})
+    return db
+
+
+def test_lookup_picks_latest_ehk_and_exact_ca(fake_db):
+    index = tai.TrainAssignmentIndex()
+    index.ensure_fresh(conn=object())
+
+    contact = index.lookup("12345", "A1", date(2026, 10, 19))
+    assert contact == {"ehk_name": "Eli", "ehk_phone": "900002", "ca_name": "Cara", "ca_phone": "900003"}
+
+    # Day two of the journey that left on the 18th; no CA for multi-coach assignments
+    assert index.lookup("012345", "b1", date(2026, 10, 18))["ehk_name"] == "Esha"
+    assert index.lookup("12345", "B1", date(2026, 10, 19))["ca_phone"] == ""
+    # Sleeper coaches never get a CA; journeys over two days do not cover the 21st
+    assert index.lookup("12345", "S1", date(2026, 10, 19))["ca_name"] == ""
+    assert index.lookup("12345", "A1", date(2026, 10, 21))["ehk_phone"] == ""
+
+
+def test_changed_users_refresh_incrementally(fake_db):
+    index = tai.TrainAssignmentIndex()
+    index.ensure_fresh(conn=object())
+    full_load_queries = len(fake_db.queries)
+
+    fake_db.users[2] = user(2, "Eli", "900002", [("22222", "2026-10-19", "EHK", "")])
+    del fake_db.users[3]  # disabled users drop out of the query
+    index._on_change({"user_id": 2})
+    index._on_change({"user_id": 3})
+    index.ensure_fresh(conn=object())
+
+    assert len(fake_db.queries) == full_load_queries + 1
+    assert fake_db.queries[-1][1] == ([2, 3],)
+    assert index.lookup("12345", "A1", date(2026, 10, 19)) == {
+        "ehk_name": "Esha", "ehk_phone": "900001", "ca_name": "", "ca_phone": ""
+    }
+    assert index.lookup("22222", "A1", date(2026, 10, 19))["ehk_name"] == "Eli"
+
+    # Nothing pending: no queries at all
+    index.ensure_fresh(conn=object())
+    assert len(fake_db.queries) == full_load_queries + 1
+
+
+def test_stale_index_rebuilds(fake_db):
+    index = tai.TrainAssignmentIndex()
+    index.ensure_fresh(conn=object())
+    index.mark_stale()
+    index.ensure_fresh(conn=object())
+    assert [params for _, params in fake_db.queries] == [None, None]
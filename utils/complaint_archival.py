@@ -0,0 +1,378 @@
+# utils/complaint_archival.py
+#
+# Archival of monthly complaint partitions (migrations/006). Months older than the
+# retention window are exported to gzip-compressed JSONL and detached from the live
+# tables; single complaints are rehydrated from the export on demand.
+#
+# Archive layout, one pair of files per month:
+#   complaints_y2024m01.jsonl.gz   complaint documents ordered by complain_id, written as
+#                                  independent gzip members of ARCHIVE_CHUNK_SIZE lines
+#   complaints_y2024m01.idx.json   [[first_id, last_id, offset, length], ...] per member
+# so a lookup decompresses one member instead of the whole month.
+#
+# COMPLAINT_ARCHIVE_DIR must be an absolute path on storage every API host can read (the
+# archive job refuses to start otherwise); rs_complaint_archive stores file paths relative
+# to it, so the root can be mounted at the same path on each host or moved as a whole.
+#
+#   python -m utils.complaint_archival ensure-partitions
+#   python -m utils.complaint_archival archive [--dry-run] [--drop]
+
+import argparse
+import bisect
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cachetools import LRUCache, TTLCache
+
+from utils.json_response import dumps
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv("COMPLAINT_ARCHIVE_DIR", "")
+ARCHIVE_RETENTION_MONTHS = int(os.getenv("COMPLAINT_ARCHIVE_RETENTION_MONTHS", 24))
+ARCHIVE_CHUNK_SIZE = int(os.getenv("COMPLAINT_ARCHIVE_CHUNK_SIZE", 1000))
+PARTITIONS_AHEAD_MONTHS = int(os.getenv("COMPLAINT_PARTITIONS_AHEAD_MONTHS", 3))
+ARCHIVE_FETCH_SIZE = 2000
+
+COMPLAINT_TABLE = "rail_sathi_railsathicomplain"
+MEDIA_TABLE = "rail_sathi_railsathicomplainmedia"
+PARTITION_SUFFIX = re.compile(r"_y(\d{4})m(\d{2})$")
+
+# Media of the month's complaints that sits in another month's media partition, i.e. was
+# written with a complaint_created_at that is not its complaint's created_at
+MISPLACED_MEDIA_QUERY = """
+    SELECT COUNT(*)
+    FROM rail_sathi_railsathicomplainmedia m
+    JOIN "{complaint_partition}" c ON c.complain_id = m.complain_id
+    WHERE m.complaint_created_at <> c.created_at
+"""
+
+# Rehydrated documents are immutable; the index files are small and reused across lookups
+_archived_documents = TTLCache(maxsize=1000, ttl=3600)
+_archive_indexes = LRUCache(maxsize=64)
+_lock = threading.Lock()
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def require_archive_dir(archive_dir: Optional[str] = None) -> str:
+    """Return the archive root, or raise ValueError unless it is set and absolute"""
+    root = archive_dir or ARCHIVE_DIR
+    if not root:
+        raise ValueError("COMPLAINT_ARCHIVE_DIR is not set; point it at the shared archive location")
+    if not os.path.isabs(root):
+        raise ValueError(f"COMPLAINT_ARCHIVE_DIR must be an absolute path, got {root!r}")
+    return root
+
+
+def archive_paths(month: date, archive_dir: Optional[str] = None) -> Tuple[str, str]:
+    base = os.path.join(archive_dir or ARCHIVE_DIR, f"complaints_y{month.year:04d}m{month.month:02d}")
+    return f"{base}.jsonl.gz", f"{base}.idx.json"
+
+
+def retention_cutoff(today: Optional[date] = None, retention_months: int = ARCHIVE_RETENTION_MONTHS) -> date:
+    """First day of the oldest month that is kept live"""
+    today = today or date.today()
+    return add_months(date(today.year, today.month, 1), -retention_months)
+
+
+# ------------------------------------------------------------------ archive files
+
+def write_archive(path: str, index_path: str, documents: Iterable[Dict],
+                  chunk_size: int = ARCHIVE_CHUNK_SIZE) -> Dict:
+    """
+    Write documents (ordered by complain_id) as chunked gzip JSONL plus its index.
+
+    Files are written under a temporary name and renamed, so a crashed export never
+    leaves a partial archive behind. Returns count/min_id/max_id of what was written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    index: List[List[int]] = []
+    stats = {"count": 0, "min_id": None, "max_id": None}
+    chunk: List[bytes] = []
+    chunk_ids: List[int] = []
+
+    def _flush(out):
+        offset = out.tell()
+        out.write(gzip.compress(b"".join(chunk)))
+        index.append([chunk_ids[0], chunk_ids[-1], offset, out.tell() - offset])
+        chunk.clear()
+        chunk_ids.clear()
+
+    tmp_path, tmp_index_path = f"{path}.tmp", f"{index_path}.tmp"
+    with open(tmp_path, "wb") as out:
+        for document in documents:
+            complain_id = int(document["complain_id"])
+            if chunk_ids and complain_id < chunk_ids[-1]:
+                raise ValueError(f"Archive documents must be ordered by complain_id ({complain_id} after {chunk_ids[-1]})")
+            chunk.append(dumps(document) + b"\n")
+            chunk_ids.append(complain_id)
+            stats["count"] += 1
+            stats["min_id"] = complain_id if stats["min_id"] is None else stats["min_id"]
+            stats["max_id"] = complain_id
+            if len(chunk) >= chunk_size:
+                _flush(out)
+        if chunk:
+            _flush(out)
+
+    with open(tmp_index_path, "w") as out:
+        json.dump(index, out, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    os.replace(tmp_index_path, index_path)
+    return stats
+
+
+def _load_index(index_path: str) -> List[List[int]]:
+    with _lock:
+        index = _archive_indexes.get(index_path)
+    if index is None:
+        with open(index_path) as f:
+            index = json.load(f)
+        with _lock:
+            _archive_indexes[index_path] = index
+    return index
+
+
+def read_archived_document(path: str, complain_id: int) -> Optional[Dict]:
+    """Decompress the one chunk that can hold complain_id and return its document"""
+    index_path = path[:-len(".jsonl.gz")] + ".idx.json" if path.endswith(".jsonl.gz") else f"{path}.idx.json"
+    index = _load_index(index_path)
+    position = bisect.bisect_right([entry[0] for entry in index], complain_id) - 1
+    if position < 0 or complain_id > index[position][1]:
+        return None
+
+    _, _, offset, length = index[position]
+    with open(path, "rb") as f:
+        f.seek(offset)
+        lines = gzip.decompress(f.read(length)).splitlines()
+    for line in lines:
+        document = json.loads(line)
+        if document.get("complain_id") == complain_id:
+            return document
+    return None
+
+
+def rehydrate_complaint(conn, complain_id: int, archive_dir: Optional[str] = None) -> Optional[Dict]:
+    """Look an archived complaint up through the rs_complaint_archive catalog"""
+    with _lock:
+        cached = _archived_documents.get(complain_id)
+    if cached is not None:
+        return cached
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT file_path FROM rs_complaint_archive
+            WHERE %s BETWEEN min_complain_id AND max_complain_id
+            ORDER BY partition_month DESC
+            """,
+            (complain_id,)
+        )
+        paths = [row["file_path"] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
+
+    # Id ranges of neighbouring months overlap when complaints were backdated
+    for path in paths:
+        if not os.path.isabs(path):
+            try:
+                path = os.path.join(require_archive_dir(archive_dir), path)
+            except ValueError as e:
+                logger.error(f"Cannot read archived complaint {complain_id}: {str(e)}")
+                return None
+        try:
+            document = read_archived_document(path, complain_id)
+        except FileNotFoundError:
+            logger.error(f"Archive file {path} listed in rs_complaint_archive is missing")
+            continue
+        if document is not None:
+            with _lock:
+                _archived_documents[complain_id] = document
+            return document
+    return None
+
+
+# ------------------------------------------------------------------ partition maintenance
+
+def ensure_partitions(conn, months_ahead: int = PARTITIONS_AHEAD_MONTHS) -> int:
+    """Create month partitions up to months_ahead; returns the number of tables created"""
+    today = date.today()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT rs_ensure_complaint_partitions(%s, %s) AS created",
+            (date(today.year, today.month, 1), add_months(today, months_ahead))
+        )
+        row = cursor.fetchone()
+    conn.commit()
+    return row["created"] if isinstance(row, dict) else row[0]
+
+
+def list_partition_months(conn, table: str = COMPLAINT_TABLE) -> List[date]:
+    """Months that still have an attached partition of table (the DEFAULT partition is skipped)"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            (table,)
+        )
+        names = [row["relname"] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _export_documents(conn, month: date) -> Iterable[Dict]:
+    # Imported here: the complaint services import this module for rehydration
+    from services.unauth_api_services import build_complaint_documents_query, _finalize_complaint_document
+    from psycopg2.extras import RealDictCursor
+
+    query, params = build_complaint_documents_query(
+        "c.created_at >= %s AND c.created_at < %s",
+        [month, add_months(month, 1)],
+        order_by="c.complain_id"
+    )
+    # Named cursor: the month is streamed from the server instead of loaded at once
+    with conn.cursor(name=f"rs_archive_{month:%Y%m}", cursor_factory=RealDictCursor) as cursor:
+        cursor.itersize = ARCHIVE_FETCH_SIZE
+        cursor.execute(query, params)
+        for row in cursor:
+            yield _finalize_complaint_document(dict(row))
+
+
+def archive_month(conn, month: date, archive_dir: Optional[str] = None, drop: bool = False) -> Dict:
+    """
+    Export one month, record it in rs_complaint_archive and detach its partitions.
+
+    Both partitions are locked against writes (SHARE) for the whole transaction, so no
+    update can land between the export and the DETACH; writers touching the month wait
+    until it is detached. The catalog row and the DETACH commit together; the export files
+    are written first, so a failure anywhere leaves the month attached and the job can
+    simply be rerun.
+
+    The month is refused (ValueError, nothing detached) unless the exported media is
+    exactly the media partition of that month, so no media row is detached without being
+    archived and none is left behind in the live tables.
+    """
+    root = require_archive_dir(archive_dir)
+    path, index_path = archive_paths(month, root)
+    complaint_partition = partition_name(COMPLAINT_TABLE, month)
+    media_partition = partition_name(MEDIA_TABLE, month)
+
+    with conn.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{complaint_partition}", "{media_partition}" IN SHARE MODE')
+    exported = {"media": 0}
+
+    def _count_media(documents):
+        for document in documents:
+            exported["media"] += len(document.get("rail_sathi_complain_media_files") or [])
+            yield document
+
+    stats = write_archive(path, index_path, _count_media(_export_documents(conn, month)))
+
+    with conn.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM "{media_partition}"')
+        row = cursor.fetchone()
+        media_count = row["count"] if isinstance(row, dict) else row[0]
+        cursor.execute(MISPLACED_MEDIA_QUERY.format(complaint_partition=complaint_partition))
+        row = cursor.fetchone()
+        misplaced = row["count"] if isinstance(row, dict) else row[0]
+        if media_count != exported["media"] or misplaced:
+            for leftover in (path, index_path):
+                os.remove(leftover)
+            raise ValueError(
+                f"Media of {month:%Y-%m} does not line up with its complaints: exported "
+                f"{exported['media']}, partition holds {media_count}, {misplaced} in other months"
+            )
+        cursor.execute(
+            """
+            INSERT INTO rs_complaint_archive
+                (partition_month, file_path, complaint_count, media_count, min_complain_id, max_complain_id)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (partition_month) DO UPDATE SET
+                file_path = EXCLUDED.file_path,
+                complaint_count = EXCLUDED.complaint_count,
+                media_count = EXCLUDED.media_count,
+                min_complain_id = EXCLUDED.min_complain_id,
+                max_complain_id = EXCLUDED.max_complain_id,
+                archived_at = now()
+            """,
+            (month, os.path.relpath(path, root), stats["count"], media_count, stats["min_id"], stats["max_id"])
+        )
+        cursor.execute(f'ALTER TABLE {COMPLAINT_TABLE} DETACH PARTITION "{complaint_partition}"')
+        cursor.execute(f'ALTER TABLE {MEDIA_TABLE} DETACH PARTITION "{media_partition}"')
+        if drop:
+            cursor.execute(f'DROP TABLE "{media_partition}", "{complaint_partition}"')
+    conn.commit()
+
+    logger.info(
+        f"Archived {month:%Y-%m}: {stats['count']} complaints, {media_count} media rows -> {path}"
+        f"{' (partitions dropped)' if drop else ' (partitions detached)'}"
+    )
+    return {"month": month.isoformat(), "file_path": path, "media_count": media_count, **stats}
+
+
+def archive_old_partitions(conn, today: Optional[date] = None, archive_dir: Optional[str] = None,
+                           dry_run: bool = False, drop: bool = False) -> List[Dict]:
+    """Archive every attached month older than the retention window, oldest first"""
+    archive_dir = require_archive_dir(archive_dir)
+    cutoff = retention_cutoff(today)
+    months = [month for month in list_partition_months(conn) if month < cutoff]
+    if dry_run:
+        return [{"month": month.isoformat(), "file_path": archive_paths(month, archive_dir)[0]} for month in months]
+
+    archived = []
+    for month in months:
+        try:
+            archived.append(archive_month(conn, month, archive_dir, drop=drop))
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Archiving {month:%Y-%m} failed: {str(e)}")
+            break
+    return archived
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Complaint partition maintenance")
+    parser.add_argument("command", choices=["ensure-partitions", "archive"])
+    parser.add_argument("--dry-run", action="store_true", help="list the months that would be archived")
+    parser.add_argument("--drop", action="store_true", help="drop partitions after detaching them")
+    args = parser.parse_args(argv)
+    if args.command == "archive":
+        try:
+            require_archive_dir()
+        except ValueError as e:
+            parser.error(str(e))
+
+    from database import get_db_connection
+    conn = get_db_connection()
+    try:
+        if args.command == "ensure-partitions":
+            print(f"Created {ensure_partitions(conn)} partition tables")
+        else:
+            for result in archive_old_partitions(conn, dry_run=args.dry_run, drop=args.drop):
+                print(json.dumps(result, default=str))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
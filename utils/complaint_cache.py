@@ -0,0 +1,145 @@
+# utils/complaint_cache.py
+
+import os
+import copy
+import json
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+from cachetools import TTLCache
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+# In-process tier (per worker)
+COMPLAINT_CACHE_TTL = int(os.getenv("COMPLAINT_CACHE_TTL", 60))
+COMPLAINT_CACHE_MAXSIZE = int(os.getenv("COMPLAINT_CACHE_MAXSIZE", 5000))
+
+# Optional Redis tier shared across workers. When it is enabled the local tier
+# only absorbs bursts (a few seconds), so an invalidation issued by another
+# worker is observed quickly.
+COMPLAINT_CACHE_REDIS_ENABLED = os.getenv("COMPLAINT_CACHE_REDIS_ENABLED", "False") == "True"
+COMPLAINT_CACHE_LOCAL_TTL = int(os.getenv("COMPLAINT_CACHE_LOCAL_TTL", 3))
+COMPLAINT_CACHE_KEY_PREFIX = "rs_complaint:"
+
+# Invalidation only reaches this process (and Redis). With several uvicorn workers and no
+# Redis tier, other workers would serve a stale document for the full TTL, so the process
+# tier falls back to the short burst TTL instead.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+if COMPLAINT_CACHE_REDIS_ENABLED or WEB_CONCURRENCY > 1:
+    _local_ttl = COMPLAINT_CACHE_LOCAL_TTL
+    if not COMPLAINT_CACHE_REDIS_ENABLED:
+        logger.warning(
+            f"Complaint cache: {WEB_CONCURRENCY} workers without Redis, "
+            f"process tier limited to {COMPLAINT_CACHE_LOCAL_TTL}s (set COMPLAINT_CACHE_REDIS_ENABLED=True)"
+        )
+else:
+    _local_ttl = COMPLAINT_CACHE_TTL
+
+_local_cache = TTLCache(maxsize=COMPLAINT_CACHE_MAXSIZE, ttl=_local_ttl)
+_lock = threading.Lock()
+_redis_client = None
+_redis_checked = False
+
+
+def _get_redis():
+    """Lazily connect to Redis; returns None when the shared tier is disabled or unreachable."""
+    global _redis_client, _redis_checked
+    if not COMPLAINT_CACHE_REDIS_ENABLED:
+        return None
+    if _redis_checked:
+        return _redis_client
+    _redis_checked = True
+    try:
+        import redis
+        client = redis.Redis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            db=int(os.getenv("REDIS_DB", 0)),
+            decode_responses=True,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5
+        )
+        client.ping()
+        _redis_client = client
+        logger.info("Complaint cache connected to Redis")
+    except Exception as e:
+        logger.warning(f"Complaint cache Redis tier unavailable, using in-process cache only: {e}")
+        _redis_client = None
+    return _redis_client
+
+
+def _redis_key(complain_id: int) -> str:
+    return f"{COMPLAINT_CACHE_KEY_PREFIX}{complain_id}"
+
+
+def get_cached_complaint(complain_id: int) -> Optional[Dict[str, Any]]:
+    """Return a private copy of the cached complaint document, or None on a miss."""
+    with _lock:
+        complaint = _local_cache.get(complain_id)
+    if complaint is not None:
+        return copy.deepcopy(complaint)
+
+    client = _get_redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(_redis_key(complain_id))
+    except Exception as e:
+        logger.warning(f"Complaint cache Redis read failed for {complain_id}: {e}")
+        return None
+    if not raw:
+        return None
+
+    complaint = json.loads(raw)
+    with _lock:
+        _local_cache[complain_id] = complaint
+    return copy.deepcopy(complaint)
+
+
+def set_cached_complaint(complain_id: int, complaint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Store the assembled complaint + media document in every enabled tier.
+
+    The document is stored in its JSON form (the encoder FastAPI uses for responses), so a
+    cache hit from either tier has the same value types as the copy returned here; callers
+    serve the returned copy rather than the raw row.
+    """
+    if complaint is None:
+        return None
+    snapshot = jsonable_encoder(complaint)
+    if complain_id is None:
+        return snapshot
+    with _lock:
+        _local_cache[complain_id] = snapshot
+
+    client = _get_redis()
+    if client is not None:
+        try:
+            client.setex(_redis_key(complain_id), COMPLAINT_CACHE_TTL, json.dumps(snapshot))
+        except Exception as e:
+            logger.warning(f"Complaint cache Redis write failed for {complain_id}: {e}")
+    return copy.deepcopy(snapshot)
+
+
+def invalidate_complaint(complain_id: int) -> None:
+    """Drop a complaint from every tier. Call after any committed write to it or its media."""
+    if complain_id is None:
+        return
+    with _lock:
+        _local_cache.pop(complain_id, None)
+
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        client.delete(_redis_key(complain_id))
+    except Exception as e:
+        logger.warning(f"Complaint cache Redis invalidation failed for {complain_id}: {e}")
+
+
+def clear_complaint_cache() -> None:
+    """Flush the in-process tier (used by tests and admin tooling)."""
+    with _lock:
+        _local_cache.clear()
@@ -0,0 +1,211 @@
+# utils/complaint_feed.py
+
+import os
+import json
+import select
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+COMPLAINT_CHANNEL = "rs_complaint_changes"
+FEED_QUEUE_SIZE = int(os.getenv("COMPLAINT_FEED_QUEUE_SIZE", 256))
+
+# Subscription keys: ("train", "12345"), ("mobile", "9876543210")
+FeedKey = Tuple[str, str]
+
+
+class PgNotifyListener:
+    """
+    One dedicated LISTEN connection per worker, read on a daemon thread.
+
+    Handlers registered per channel are called on the listener thread with the decoded
+    payload; they must hand work off (e.g. call_soon_threadsafe) rather than block.
+    """
+
+    def __init__(self, poll_timeout: float = 5.0):
+        self.poll_timeout = poll_timeout
+        self._handlers: Dict[str, List[Callable[[Any], None]]] = {}
+        self._reconnect_hooks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def listen(self, channel: str, handler: Callable[[Any], None]) -> None:
+        with self._lock:
+            self._handlers.setdefault(channel, []).append(handler)
+        self.start()
+
+    def on_reconnect(self, hook: Callable[[], None]) -> None:
+        """Called after the connection is re-established; notifications may have been missed"""
+        with self._lock:
+            self._reconnect_hooks.append(hook)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="pg-notify-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _dispatch(self, channel: str, raw_payload: str) -> None:
+        try:
+            payload = json.loads(raw_payload) if raw_payload else None
+        except ValueError:
+            payload = raw_payload
+        with self._lock:
+            handlers = list(self._handlers.get(channel, ()))
+        for handler in handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"Notify handler for {channel} failed: {str(e)}")
+
+    def _run(self) -> None:
+        backoff = 1
+        connected_before = False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = get_db_connection()
+                conn.autocommit = True
+                listening: Set[str] = set()
+                if connected_before:
+                    with self._lock:
+                        hooks = list(self._reconnect_hooks)
+                    for hook in hooks:
+                        hook()
+                connected_before = True
+                backoff = 1
+
+                while not self._stop.is_set():
+                    with self._lock:
+                        new_channels = set(self._handlers) - listening
+                    if new_channels:
+                        with conn.cursor() as cursor:
+                            for channel in new_channels:
+                                cursor.execute(f'LISTEN "{channel}"')
+                        listening |= new_channels
+                        logger.info(f"Listening on {sorted(new_channels)}")
+
+                    if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._dispatch(notify.channel, notify.payload)
+            except Exception as e:
+                logger.error(f"LISTEN connection lost, retrying in {backoff}s: {str(e)}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+class FeedSubscription:
+    """A bounded per-connection queue owned by the event loop that created it"""
+
+    def __init__(self, keys: Iterable[FeedKey], maxsize: int = FEED_QUEUE_SIZE):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.keys = frozenset(keys)
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        """Thread-safe hand-off into the subscriber's loop"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # loop closed, the unsubscribe is on its way
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            # Slow consumer: drop the backlog and ask the client to reload once
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {"type": "resync"}
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+
+class ComplaintFeed:
+    """Fans complaint change notifications out to subscribers by train and mobile number"""
+
+    def __init__(self, listener: PgNotifyListener, channel: str = COMPLAINT_CHANNEL):
+        self.listener = listener
+        self.channel = channel
+        self._subscribers: Dict[FeedKey, Set[FeedSubscription]] = {}
+        self._lock = threading.Lock()
+        self._listening = False
+        listener.on_reconnect(self.resync_all)
+
+    @staticmethod
+    def event_keys(event: Dict[str, Any]) -> List[FeedKey]:
+        keys = []
+        if event.get("train_number"):
+            keys.append(("train", str(event["train_number"]).strip()))
+        if event.get("mobile_number"):
+            keys.append(("mobile", str(event["mobile_number"]).strip()))
+        return keys
+
+    def subscribe(self, keys: Iterable[FeedKey]) -> FeedSubscription:
+        """Register from inside the request's event loop"""
+        subscription = FeedSubscription(keys)
+        with self._lock:
+            for key in subscription.keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+            start_listening = not self._listening
+            self._listening = True
+        if start_listening:
+            self.listener.listen(self.channel, self.publish)
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription) -> None:
+        with self._lock:
+            for key in subscription.keys:
+                subscribers = self._subscribers.get(key)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({subscription for subscribers in self._subscribers.values() for subscription in subscribers})
+
+    def publish(self, event: Dict[str, Any]) -> int:
+        """Deliver one change to every matching subscriber (once each); returns the fan-out"""
+        if not isinstance(event, dict):
+            return 0
+        event.setdefault("type", "complaint")
+        with self._lock:
+            targets = set()
+            for key in self.event_keys(event):
+                targets |= self._subscribers.get(key, set())
+        for subscription in targets:
+            subscription.deliver(event)
+        return len(targets)
+
+    def resync_all(self) -> None:
+        with self._lock:
+            targets = {subscription for subscribers in self._subscribers.values() for subscription in subscribers}
+        for subscription in targets:
+            subscription.deliver({"type": "resync"})
+
+
+notify_listener = PgNotifyListener()
+complaint_feed = ComplaintFeed(notify_listener)
@@ -0,0 +1,125 @@
+# utils/complaint_rollup.py
+
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_DIMENSIONS = ("rollup_date", "depot_code", "train_number", "coach_prefix", "complain_type", "complain_status")
+
+RollupKey = Tuple
+
+# Dimensions come from the same view the rebuild function aggregates (migrations/005)
+ROLLUP_KEY_QUERY = """
+    SELECT rollup_date, depot_code, train_number, coach_prefix, complain_type, complain_status
+    FROM rs_complaint_rollup_keys
+    WHERE complain_id = %s
+"""
+
+ROLLUP_DELTA_QUERY = """
+    INSERT INTO rs_complaint_daily_rollup
+        (rollup_date, depot_code, train_number, coach_prefix, complain_type, complain_status, complaint_count)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (rollup_date, depot_code, train_number, coach_prefix, complain_type, complain_status)
+    DO UPDATE SET complaint_count = rs_complaint_daily_rollup.complaint_count + EXCLUDED.complaint_count
+"""
+
+
+def _run_in_savepoint(cursor, action: str, fn, *args):
+    """
+    Rollup maintenance must never fail the complaint write it rides along with; a failed
+    delta is rolled back to a savepoint and logged (rs_rebuild_complaint_rollup repairs it).
+    """
+    cursor.execute("SAVEPOINT rs_rollup")
+    try:
+        result = fn(cursor, *args)
+        cursor.execute("RELEASE SAVEPOINT rs_rollup")
+        return result
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT rs_rollup")
+        logger.error(f"Complaint rollup {action} failed: {str(e)}")
+        return None
+
+
+def _read_key(cursor, complain_id: int) -> Optional[RollupKey]:
+    cursor.execute(ROLLUP_KEY_QUERY, (complain_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    if isinstance(row, dict):
+        return tuple(row[dimension] for dimension in ROLLUP_DIMENSIONS)
+    return tuple(row)
+
+
+def _apply_delta(cursor, key: RollupKey, delta: int) -> None:
+    cursor.execute(ROLLUP_DELTA_QUERY, (*key, delta))
+
+
+def _lock_and_read_key(cursor, complain_id: int) -> Optional[RollupKey]:
+    # Row lock so concurrent updates of the same complaint apply their deltas in order
+    cursor.execute("SELECT 1 FROM rail_sathi_railsathicomplain WHERE complain_id = %s FOR UPDATE", (complain_id,))
+    return _read_key(cursor, complain_id)
+
+
+def rollup_complaint_created(cursor, complain_id: int) -> None:
+    """Count a freshly inserted complaint; call inside the inserting transaction"""
+    def _created(cursor, complain_id):
+        key = _read_key(cursor, complain_id)
+        if key is not None:
+            _apply_delta(cursor, key, 1)
+    _run_in_savepoint(cursor, f"insert of {complain_id}", _created, complain_id)
+
+
+def rollup_key_before_change(cursor, complain_id: int) -> Optional[RollupKey]:
+    """Lock the complaint and return its current dimensions; pass them to the *_updated/_deleted hook"""
+    return _run_in_savepoint(cursor, f"read of {complain_id}", _lock_and_read_key, complain_id)
+
+
+def rollup_complaint_updated(cursor, complain_id: int, old_key: Optional[RollupKey]) -> None:
+    """Move the complaint between rollup cells if any of its dimensions changed"""
+    def _updated(cursor, complain_id, old_key):
+        new_key = _read_key(cursor, complain_id)
+        if new_key == old_key:
+            return
+        if old_key is not None:
+            _apply_delta(cursor, old_key, -1)
+        if new_key is not None:
+            _apply_delta(cursor, new_key, 1)
+    _run_in_savepoint(cursor, f"update of {complain_id}", _updated, complain_id, old_key)
+
+
+def rollup_complaint_deleted(cursor, old_key: Optional[RollupKey]) -> None:
+    if old_key is not None:
+        _run_in_savepoint(cursor, "delete", _apply_delta, old_key, -1)
+
+
+# ---------------------------------------------------------------- reporting
+
+REPORT_GROUPS = {
+    "date": "rollup_date",
+    "depot": "depot_code",
+    "train": "train_number",
+    "coach_prefix": "coach_prefix",
+    "complain_type": "complain_type",
+    "status": "complain_status",
+}
+
+
+def build_rollup_report_query(depot_codes: Sequence[str], date_from, date_to,
+                              group_by: Sequence[str]) -> Tuple[str, List]:
+    """SUM the rollup cells for the given depots/date range, grouped by whitelisted dimensions"""
+    unknown = [group for group in group_by if group not in REPORT_GROUPS]
+    if unknown:
+        raise ValueError(f"Unknown group_by: {', '.join(unknown)}")
+    columns = [f"{REPORT_GROUPS[group]} AS {group}" for group in group_by]
+    positions = ", ".join(str(i + 1) for i in range(len(group_by)))
+    select = ", ".join(columns + ["SUM(complaint_count)::int AS complaint_count"])
+    query = f"""
+        SELECT {select}
+        FROM rs_complaint_daily_rollup
+        WHERE depot_code = ANY(%s) AND rollup_date BETWEEN %s AND %s
+        {f"GROUP BY {positions}" if group_by else ""}
+        HAVING SUM(complaint_count) <> 0
+        {f"ORDER BY {positions}" if group_by else ""}
+    """
+    return query, [list(depot_codes), date_from, date_to]
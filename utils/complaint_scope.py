@@ -0,0 +1,125 @@
+# utils/complaint_scope.py
+
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Iterable
+
+from cachetools import TTLCache
+from database import execute_query
+from utils.train_keys import train_key
+
+logger = logging.getLogger(__name__)
+
+# user -> depots changes rarely (onboarding), depot -> trains only when trains are added
+USER_DEPOT_CACHE_TTL = int(os.getenv("USER_DEPOT_CACHE_TTL", 300))
+DEPOT_TRAIN_CACHE_TTL = int(os.getenv("DEPOT_TRAIN_CACHE_TTL", 900))
+
+_user_depot_cache = TTLCache(maxsize=20000, ttl=USER_DEPOT_CACHE_TTL)
+_depot_train_cache = TTLCache(maxsize=5000, ttl=DEPOT_TRAIN_CACHE_TTL)
+_lock = threading.Lock()
+
+USER_DEPOTS_BY_PHONE_QUERY = """
+    SELECT d.depot_code
+    FROM user_onboarding_user u
+    INNER JOIN user_onboarding_user_depots ud ON u.id = ud.user_id
+    INNER JOIN station_depot d ON ud.depot_id = d.depot_id
+    WHERE u.phone = %s
+"""
+
+USER_DEPOTS_BY_USERNAME_QUERY = """
+    SELECT d.depot_code
+    FROM user_onboarding_user u
+    INNER JOIN user_onboarding_user_depots ud ON u.id = ud.user_id
+    INNER JOIN station_depot d ON ud.depot_id = d.depot_id
+    WHERE u.username = %s
+"""
+
+DEPOT_TRAINS_QUERY = """
+    SELECT DISTINCT "Depot" AS depot_code, train_no
+    FROM trains_traindetails
+    WHERE "Depot" = ANY(%s)
+"""
+
+
+def get_user_depots(conn, mobile_number: Optional[str] = None, username: Optional[str] = None) -> Tuple[str, ...]:
+    """Return the depot codes a user belongs to, looked up by phone or username"""
+    if mobile_number:
+        key, query, param = ("phone", str(mobile_number)), USER_DEPOTS_BY_PHONE_QUERY, str(mobile_number)
+    elif username:
+        key, query, param = ("username", str(username)), USER_DEPOTS_BY_USERNAME_QUERY, str(username)
+    else:
+        return ()
+
+    with _lock:
+        depots = _user_depot_cache.get(key)
+    if depots is not None:
+        return depots
+
+    rows = execute_query(conn, query, (param,)) or []
+    depots = tuple(dict.fromkeys(row['depot_code'] for row in rows if row.get('depot_code')))
+    with _lock:
+        _user_depot_cache[key] = depots
+    return depots
+
+
+def get_depot_train_numbers(conn, depot_codes: Iterable[str]) -> List[str]:
+    """Return the canonical train numbers served by the given depots"""
+    depot_codes = list(dict.fromkeys(depot_codes))
+    trains_by_depot: Dict[str, Tuple[str, ...]] = {}
+    missing = []
+    with _lock:
+        for depot in depot_codes:
+            trains = _depot_train_cache.get(depot)
+            if trains is None:
+                missing.append(depot)
+            else:
+                trains_by_depot[depot] = trains
+
+    if missing:
+        loaded: Dict[str, List[str]] = {depot: [] for depot in missing}
+        for row in execute_query(conn, DEPOT_TRAINS_QUERY, (missing,)) or []:
+            loaded.setdefault(row['depot_code'], []).append(train_key(row['train_no']))
+        with _lock:
+            for depot, trains in loaded.items():
+                trains = tuple(dict.fromkeys(trains))
+                _depot_train_cache[depot] = trains
+                trains_by_depot[depot] = trains
+        logger.info(f"Loaded train scope for depots {missing}")
+
+    train_numbers = []
+    for depot in depot_codes:
+        train_numbers.extend(trains_by_depot.get(depot, ()))
+    return list(dict.fromkeys(train_numbers))
+
+
+def resolve_user_train_scope(conn, mobile_number: Optional[str] = None, username: Optional[str] = None) -> List[str]:
+    """
+    Resolve the canonical train numbers (utils/train_keys.py) a user may see complaints for.
+
+    Both hops (user -> depots, depot -> trains) are served from process-wide TTL caches,
+    so on a warm cache the listing needs no queries before the complaint query itself.
+    """
+    depot_codes = get_user_depots(conn, mobile_number=mobile_number, username=username)
+    if not depot_codes:
+        logger.info(f"No depots found for user phone={mobile_number} username={username}")
+        return []
+    return get_depot_train_numbers(conn, depot_codes)
+
+
+def invalidate_user_scope(mobile_number: Optional[str] = None, username: Optional[str] = None) -> None:
+    """Forget a user's cached depot set (call after changing their depot assignments)"""
+    with _lock:
+        if mobile_number:
+            _user_depot_cache.pop(("phone", str(mobile_number)), None)
+        if username:
+            _user_depot_cache.pop(("username", str(username)), None)
+
+
+def invalidate_depot_trains(depot_code: Optional[str] = None) -> None:
+    """Forget cached depot -> trains sets (one depot, or all when depot_code is None)"""
+    with _lock:
+        if depot_code is None:
+            _depot_train_cache.clear()
+        else:
+            _depot_train_cache.pop(depot_code, None)
@@ -0,0 +1,84 @@
+# utils/depot_recipients.py
+#
+# Depot-level recipients of complaint notifications (war room, s2 admin and railway admin
+# users), read with one role-tagged query and cached per depot for a short while: a depot
+# receives many complaints an hour and its staff list rarely changes within minutes.
+
+import os
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from cachetools import TTLCache
+from database import get_db_connection, execute_query
+
+logger = logging.getLogger(__name__)
+
+DEPOT_RECIPIENT_CACHE_TTL = int(os.getenv("DEPOT_RECIPIENT_CACHE_TTL", 120))
+
+# Role name in user_onboarding_roles -> recipient group, in the order recipients are mailed
+# (the first war room user is the TO address, everyone else is CC)
+RECIPIENT_ROLES = {
+    'war room user': 'war_room',
+    'war room user railsathi': 'war_room',
+    's2 admin': 's2_admin',
+    'railway admin': 'railway_admin',
+    'railway officer': 'railway_admin',
+}
+RECIPIENT_GROUPS = ('war_room', 's2_admin', 'railway_admin')
+
+DEPOT_RECIPIENTS_QUERY = """
+    SELECT DISTINCT u.id, u.email, u.first_name, u.last_name, u.fcm_token, u.fcm_token_coachsathi,
+           ut.name AS role_name
+    FROM user_onboarding_user u
+    JOIN user_onboarding_roles ut ON u.user_type_id = ut.id
+    JOIN user_onboarding_user_depots ud ON ud.user_id = u.id
+    JOIN station_depot d ON d.depot_id = ud.depot_id
+    WHERE ut.name = ANY(%s)
+    AND d.depot_code = %s
+    AND u.user_status = 'enabled'
+    ORDER BY u.id
+"""
+
+_depot_recipient_cache = TTLCache(maxsize=2000, ttl=DEPOT_RECIPIENT_CACHE_TTL)
+_lock = threading.Lock()
+
+
+def invalidate_depot_recipients(depot_code: Optional[str] = None) -> None:
+    """Forget one depot's recipients, or every depot's when depot_code is None"""
+    with _lock:
+        if depot_code is None:
+            _depot_recipient_cache.clear()
+        else:
+            _depot_recipient_cache.pop(depot_code, None)
+
+
+def get_depot_recipients(depot_code: str, conn=None) -> Dict[str, List[dict]]:
+    """
+    Enabled notification recipients of a depot grouped by RECIPIENT_GROUPS.
+
+    Each user carries id, email, first_name, last_name, fcm_token, fcm_token_coachsathi and
+    role_name. Without conn a connection is opened only on a cache miss.
+    """
+    if not depot_code:
+        return {group: [] for group in RECIPIENT_GROUPS}
+
+    with _lock:
+        groups = _depot_recipient_cache.get(depot_code)
+    if groups is None:
+        own_conn = conn is None
+        conn = get_db_connection() if own_conn else conn
+        try:
+            rows = execute_query(conn, DEPOT_RECIPIENTS_QUERY, (list(RECIPIENT_ROLES), depot_code)) or []
+        finally:
+            if own_conn:
+                conn.close()
+        loaded = {group: [] for group in RECIPIENT_GROUPS}
+        for row in rows:
+            loaded[RECIPIENT_ROLES[row['role_name']]].append(row)
+        groups = {group: tuple(users) for group, users in loaded.items()}
+        with _lock:
+            _depot_recipient_cache[depot_code] = groups
+        logger.info(f"Loaded {len(rows)} notification recipients for depot {depot_code}")
+
+    return {group: list(users) for group, users in groups.items()}
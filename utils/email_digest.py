@@ -0,0 +1,96 @@
+# utils/email_digest.py
+#
+# Optional digest mode for complaint emails. For depots listed in EMAIL_DIGEST_DEPOTS ('*'
+# for all) the "New Passenger Complaint Submitted" mails are held for
+# EMAIL_DIGEST_WINDOW_SECONDS after the first complaint and then sent as one email per
+# depot and recipient set. A burst of complaints on one train reaches the war room, admins
+# and assigned staff as a single message instead of dozens. Push notifications are not
+# affected; they are still sent per complaint.
+
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import pytz
+
+from utils.mail_sender import mail_sender, build_message
+
+logger = logging.getLogger(__name__)
+
+EMAIL_DIGEST_WINDOW_SECONDS = int(os.getenv("EMAIL_DIGEST_WINDOW_SECONDS", 300))
+EMAIL_DIGEST_DEPOTS = frozenset(
+    depot.strip() for depot in os.getenv("EMAIL_DIGEST_DEPOTS", "").split(",") if depot.strip()
+)
+
+DigestKey = Tuple[str, FrozenSet[str]]
+
+
+class EmailDigest:
+    """Complaint mails collected per (depot, recipient set) until their window closes"""
+
+    def __init__(self, depots=EMAIL_DIGEST_DEPOTS, window_seconds: float = EMAIL_DIGEST_WINDOW_SECONDS, sender=None):
+        self.depots = frozenset(depots)
+        self.window_seconds = window_seconds
+        self.sender = sender or mail_sender
+        self._buckets: Dict[DigestKey, dict] = {}
+        self._lock = threading.Lock()
+
+    def enabled_for(self, depot: Optional[str]) -> bool:
+        return bool(depot) and ('*' in self.depots or depot in self.depots)
+
+    def add(self, depot: str, recipients: List[str], subject: str, message: str, complain_id=None) -> None:
+        """Hold one rendered complaint mail; recipients[0] is the TO address of the digest"""
+        key = (depot, frozenset(recipients))
+        ist = pytz.timezone('Asia/Kolkata')
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                timer = threading.Timer(self.window_seconds, self._flush, args=(key,))
+                timer.daemon = True
+                bucket = self._buckets[key] = {
+                    'recipients': list(recipients), 'mails': [], 'opened_at': datetime.now(ist), 'timer': timer,
+                }
+                timer.start()
+            bucket['mails'].append((complain_id, subject, message))
+        logger.info(f"Complaint {complain_id} mail held for the {depot} digest ({len(bucket['mails'])} pending)")
+
+    def _flush(self, key: DigestKey) -> None:
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            return
+        bucket['timer'].cancel()
+        depot, mails, recipients = key[0], bucket['mails'], bucket['recipients']
+
+        if len(mails) == 1:
+            _, subject, body = mails[0]
+        else:
+            subject, body = self.render(depot, mails, bucket['opened_at'])
+        self.sender.send(build_message(subject, body, recipients[:1], recipients[1:]))
+        logger.info(f"Digest of {len(mails)} complaint mails sent for depot {depot} to {len(recipients)} recipients")
+
+    @staticmethod
+    def render(depot: str, mails: List[Tuple], opened_at: datetime) -> Tuple[str, str]:
+        env = os.getenv('ENV')
+        prefix = "" if env == 'PROD' else ("UAT | " if env == 'UAT' else "LOCAL | ")
+        subject = f"{prefix}{len(mails)} New Passenger Complaints Submitted - Depot: {depot}"
+        closed_at = datetime.now(opened_at.tzinfo)
+        header = (
+            f"{len(mails)} passenger complaints were received for depot {depot} between "
+            f"{opened_at.strftime('%d %b %Y, %H:%M')} and {closed_at.strftime('%H:%M')}.\n"
+            f"Complaint IDs: {', '.join(str(complain_id) for complain_id, _, _ in mails)}\n"
+        )
+        separator = "\n" + "-" * 60 + "\n"
+        return subject, header + separator + separator.join(body.strip() for _, _, body in mails) + "\n"
+
+    def flush_all(self) -> None:
+        """Send every held digest now (shutdown)"""
+        with self._lock:
+            keys = list(self._buckets)
+        for key in keys:
+            self._flush(key)
+
+
+email_digest = EmailDigest()
@@ -1,17 +1,21 @@
 import logging
-import asyncio
-from fastapi_mail import FastMail, MessageSchema
 from config.mail_config import conf
 from jinja2 import Template
 from typing import Dict, List
 import os
 import sys
 from database import get_db_connection, execute_query  # Fixed import
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import pytz
 import json
 from utils.notification_utils import send_passenger_complaint_notification_in_thread , send_passenger_complaint_push_and_in_app_in_thread
-from utils.train_journey_utils import is_user_assigned_on_journey_date
+from utils.train_journey_utils import get_train_journey_details
+from utils.journey_window import journey_assignment_mask, journey_details_arrays, parse_dates
+from utils.support_contact_snapshot import snapshot_recipients
+from utils.train_keys import train_key
+from utils.depot_recipients import get_depot_recipients
+from utils.mail_sender import mail_sender, build_message
+from utils.email_digest import email_digest
 
 EMAIL_SENDER = conf.MAIL_FROM
 
@@ -35,7 +39,11 @@ if not logger.handlers:
     logger.addHandler(file_handler)
 
 def send_plain_mail(subject: str, message: str, from_: str, to: List[str], cc: List[str] = None):
-    """Send plain text email with CC support"""
+    """
+    Queue a plain text email with CC support on the shared SMTP sender (utils/mail_sender.py).
+
+    Returns as soon as the message is queued; False when it could not be queued.
+    """
     try:
         # Filter valid emails
         valid_emails = [email for email in to if email and not email.startswith("noemail")]
@@ -45,46 +53,11 @@ def send_plain_mail(subject: str, message: str, from_: str, to: List[str], cc: L
             logging.info("All emails were skipped - no valid recipients.")
             return True
 
-        # Create email message - only include cc if there are valid CC emails
-        email_params = {
-            "subject": subject,
-            "recipients": valid_emails,
-            "body": message,
-            "subtype": "plain"
-        }
-        
-        # Only add cc parameter if there are valid CC emails
-        if valid_cc_emails:
-            email_params["cc"] = valid_cc_emails
-
-        email = MessageSchema(**email_params)
-
-        # Send email using FastMail
-        fm = FastMail(conf)
+        if not mail_sender.send(build_message(subject, message, valid_emails, valid_cc_emails)):
+            return False
 
-        # Result container shared between threads
-        result = {"success": False, "error": None}
-        
-        # Handle async call when event loop is already running
-        import asyncio
-        import threading
-        
-        def send_email_sync():
-            # Create a new event loop in a separate thread
-            new_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(new_loop)
-            try:
-                new_loop.run_until_complete(fm.send_message(email))
-            finally:
-                new_loop.close()
-        
-        # Run in a separate thread to avoid event loop conflicts
-        thread = threading.Thread(target=send_email_sync)
-        thread.start()
-        thread.join()
-        
         cc_info = f" with CC to: {', '.join(valid_cc_emails)}" if valid_cc_emails else ""
-        logging.info(f"Email sent successfully to: {', '.join(valid_emails)}{cc_info}")
+        logging.info(f"Email queued for: {', '.join(valid_emails)}{cc_info}")
         return True
         
     except Exception as e:
@@ -115,67 +88,15 @@ def send_passenger_complain_notifications(complain_details: Dict):
 
         train_depot_name = train_depo
 
-        # Step 2: Fetch war room users whose depots include the train depot
-        war_room_user_query = f"""
-            SELECT DISTINCT u.* 
-            FROM user_onboarding_user u 
-            JOIN user_onboarding_roles ut ON u.user_type_id = ut.id 
-            JOIN user_onboarding_user_depots ud ON ud.user_id = u.id
-            JOIN station_depot d ON d.depot_id = ud.depot_id
-            WHERE ut.name IN ('war room user', 'war room user railsathi')
-            AND d.depot_code = '{train_depot_name}'
-            AND u.user_status = 'enabled'
-        """
-        conn = get_db_connection()
-        war_room_user_in_depot = execute_query(conn, war_room_user_query)
-        conn.close()
-
-        # S2 Admin users query
-        s2_admin_query = f"""
-            SELECT DISTINCT u.* 
-            FROM user_onboarding_user u 
-            JOIN user_onboarding_roles ut ON u.user_type_id = ut.id 
-            JOIN user_onboarding_user_depots ud ON ud.user_id = u.id
-            JOIN station_depot d ON d.depot_id = ud.depot_id
-            WHERE ut.name = 's2 admin'
-            AND d.depot_code = '{train_depot_name}'
-            AND u.user_status = 'enabled'
-        """
-        conn = get_db_connection()
-        s2_admin_users = execute_query(conn, s2_admin_query)
-        conn.close()
-
-        # Railway admin users query
-        railway_admin_query = f"""
-            SELECT DISTINCT u.* 
-            FROM user_onboarding_user u 
-            JOIN user_onboarding_roles ut ON u.user_type_id = ut.id 
-            JOIN user_onboarding_user_depots ud ON ud.user_id = u.id
-            JOIN station_depot d ON d.depot_id = ud.depot_id
-            WHERE ut.name IN ('railway admin', 'railway officer')
-            AND d.depot_code = '{train_depot_name}'
-            AND u.user_status = 'enabled'
-        """
-        conn = get_db_connection()
-        railway_admin_users = execute_query(conn, railway_admin_query)
-        conn.close()
-
-        # Train access users query (no depot filtering needed here)
-        assigned_users_query = """
-            SELECT u.email, u.id, u.first_name, u.last_name, u.fcm_token, u.fcm_token_coachsathi, ta.train_details
-            FROM user_onboarding_user u
-            JOIN trains_trainaccess ta ON ta.user_id = u.id
-            WHERE ta.train_details IS NOT NULL 
-            AND ta.train_details != '{}'
-            AND ta.train_details != 'null'
-            AND u.user_status = 'enabled'
-        """
-        conn = get_db_connection()
-        assigned_users_raw = execute_query(conn, assigned_users_query)
-        conn.close()
+        # War room, s2 admin and railway admin users of the depot, one cached query per depot
+        depot_recipients = get_depot_recipients(train_depot_name)
+        war_room_user_in_depot = depot_recipients['war_room']
+        s2_admin_users = depot_recipients['s2_admin']
+        railway_admin_users = depot_recipients['railway_admin']
 
         # Get train number and complaint date for filtering
         train_no = str(complain_details.get('train_no', '')).strip()
+        complaint_coach = str(complain_details.get("coach", "") or "").strip().upper()
 
         # Get complaint date and current time
         created_at_raw = date.today().strftime('%Y-%m-%d')
@@ -185,72 +106,57 @@ def send_passenger_complain_notifications(complain_details: Dict):
         logger.info("2. Complaint Date: " + str(complaint_date_str))
         logger.info("3. Complaint Validation Time: " + str(complaint_validation_time))
 
-        if complaint_date_str and train_no:
-            for user in assigned_users_raw:
-                try:
-                    train_details_str = user.get('train_details', '{}')
-                    
-                    # Handle case where train_details might be a string or already parsed
-                    if isinstance(train_details_str, str):
-                        train_details = json.loads(train_details_str)
-                    else:
-                        train_details = train_details_str
-                    
-                    # Check if the train number exists in train_details
-                    if train_no in train_details:
-                        for access in train_details[train_no]:
-                            try:
-                                origin_date_str = access.get('origin_date', '')
-                                
-                                if not origin_date_str:
-                                    continue
-                                
-                                # Validate origin_date format
-                                datetime.strptime(origin_date_str, "%Y-%m-%d")
-                                
-                                # Use the multi-day journey utility function
-                                is_assigned = is_user_assigned_on_journey_date(
-                                    origin_date_str=origin_date_str,
-                                    pnr_journey_date_str=complaint_date_str,
-                                    pnr_validation_time=complaint_validation_time,
-                                    train_no=train_no
-                                )
-                                
-                                if is_assigned:
-                                    logger.info(f"✓ Date criteria matched for user {user.get('email')}, now checking coach assignment...")
-                                    
-                                    # Get coach_numbers from this entry
-                                    coach_numbers = access.get("coach_numbers", [])
-                                    logger.info(f"Assigned coach_numbers: {coach_numbers}")
-                                    
-                                    # Get complaint coach
-                                    complaint_coach = complain_details.get("coach", "")
-                                    logger.info(f"Complaint coach: {complaint_coach}")
-                                    
-                                    # Check if complaint coach matches assigned coaches
-                                    coach_match = False
-                                    if coach_numbers and complaint_coach:
-                                        coach_match = complaint_coach in coach_numbers
-                                    
-                                    if coach_match:
-                                        logger.info(f"✓✓✓ COACH MATCHED! User {user.get('email')} IS assigned.")
-                                        assigned_users_list.append(user)
-                                        
-                                        # Also collect CoachSathi token separately for aggregation
-                                        if user.get("fcm_token_coachsathi"):
-                                            assigned_cs_tokens.append(user.get("fcm_token_coachsathi"))
-                                        
-                                        break  # Only need one match per user
-                                    else:
-                                        logger.info(f"✗ Coach criteria not met - complaint coach '{complaint_coach}' not in assigned coaches {coach_numbers}")
-                                    
-                            except (ValueError, TypeError) as date_error:
-                                logging.warning(f"Date parsing error for user {user.get('id')}: {date_error}")
-                                continue
-                                
-                except (json.JSONDecodeError, TypeError) as json_error:
-                    logging.warning(f"JSON parsing error for user {user.get('id')}: {json_error}")
-                    continue
+        if complaint_date_str and train_no and complaint_coach:
+            # Staff on this train and coach whose run can cover the complaint date, read from
+            # the relational copy of train_details (migrations/009)
+            journey_details = get_train_journey_details(train_no)
+            complaint_day = date.fromisoformat(complaint_date_str)
+            earliest_origin = complaint_day - timedelta(days=max(journey_details["journey_duration_days"], 1) - 1)
+            assigned_users_query = """
+                SELECT DISTINCT u.email, u.id, u.first_name, u.last_name, u.fcm_token, u.fcm_token_coachsathi,
+                       a.origin_date
+                FROM trains_trainaccess_assignment a
+                JOIN user_onboarding_user u ON u.id = a.user_id
+                WHERE a.train_no = %s
+                AND a.coach = %s
+                AND a.origin_date BETWEEN %s AND %s
+                AND u.user_status = 'enabled'
+                ORDER BY u.id, a.origin_date
+            """
+            conn = get_db_connection()
+            try:
+                # Recipients stored at charting time (migrations/010); runs charted before the
+                # snapshot job ran fall back to the assignment table
+                candidates = snapshot_recipients(conn, complaint_day, train_no, complaint_coach)
+                if candidates is None:
+                    candidates = execute_query(
+                        conn, assigned_users_query,
+                        (train_key(train_no), complaint_coach, earliest_origin, complaint_day)
+                    ) or []
+            finally:
+                conn.close()
+
+            if candidates:
+                # The last day of a run only counts until the train's end time
+                durations, end_seconds = journey_details_arrays([train_no], {train_no: journey_details})
+                assigned_mask = journey_assignment_mask(
+                    parse_dates(user.pop('origin_date') for user in candidates),
+                    durations[0], end_seconds[0],
+                    complaint_date_str, complaint_validation_time
+                )
+                logger.info(f"{int(assigned_mask.sum())}/{len(candidates)} assignments of train {train_no} coach {complaint_coach} cover {complaint_date_str}")
+
+                matched_user_ids = set()
+                for user, is_assigned in zip(candidates, assigned_mask):
+                    if not is_assigned or user.get('id') in matched_user_ids:
+                        continue
+                    logger.info(f"✓✓✓ COACH MATCHED! User {user.get('email')} IS assigned.")
+                    matched_user_ids.add(user.get('id'))
+                    assigned_users_list.append(user)
+
+                    # Also collect CoachSathi token separately for aggregation
+                    if user.get("fcm_token_coachsathi"):
+                        assigned_cs_tokens.append(user.get("fcm_token_coachsathi"))
 
 
         # Combine all users and collect unique emails
@@ -412,6 +318,11 @@ def send_passenger_complain_notifications(complain_details: Dict):
             logging.info(f"No users found for depot {train_depo} and train {train_no} in complaint {complain_details['complain_id']}")
             return {"status": "success", "message": "No users found for this depot and train"}
         
+        # Depots in digest mode get one mail per burst instead of one per complaint
+        if email_digest.enabled_for(train_depo):
+            email_digest.add(train_depo, unique_emails, subject, message, complain_details['complain_id'])
+            return {"status": "success", "message": f"Email held for the depot digest ({len(unique_emails)} users)"}
+
         # Send single email with first recipient as TO and rest as CC
         primary_recipient = [unique_emails[0]]
         cc_recipients = unique_emails[1:] if len(unique_emails) > 1 else []
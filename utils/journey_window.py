@@ -0,0 +1,100 @@
+# utils/journey_window.py
+#
+# Batch form of train_journey_utils.is_user_assigned_on_journey_date. A staff member
+# assigned to the run that left on origin_date counts as on board for target_date when
+#
+#   origin_date <= target_date <= origin_date + journey_duration_days - 1
+#
+# and, on the last day of the run, only while validation_time < the train's end time.
+# Whole arrays of assignments are decided at once with NumPy datetime64 arithmetic.
+
+import logging
+from datetime import date, datetime, time
+from typing import Iterable, Mapping, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_END_TIME = "23:59:59"
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def parse_dates(values: Iterable) -> np.ndarray:
+    """'YYYY-MM-DD' strings / dates -> datetime64[D]; unparseable entries become NaT"""
+    values = list(values)
+    try:
+        return np.array(values, dtype="datetime64[D]")
+    except (ValueError, TypeError):
+        parsed = np.empty(len(values), dtype="datetime64[D]")
+        for i, value in enumerate(values):
+            try:
+                parsed[i] = np.datetime64(value, "D") if value else np.datetime64("NaT")
+            except (ValueError, TypeError):
+                parsed[i] = np.datetime64("NaT")
+        return parsed
+
+
+def _time_seconds(value) -> int:
+    if isinstance(value, time):
+        return value.hour * 3600 + value.minute * 60 + value.second
+    try:
+        hours, minutes, seconds = (int(part) for part in str(value).split(":"))
+        return hours * 3600 + minutes * 60 + seconds
+    except (ValueError, TypeError):
+        # Same fallback as the scalar check: an unreadable end time keeps the last day
+        return SECONDS_PER_DAY
+
+
+def end_time_seconds(values: Iterable) -> np.ndarray:
+    """'HH:MM:SS' strings / time objects -> seconds after midnight (int32)"""
+    return np.fromiter((_time_seconds(value) for value in values), dtype=np.int32)
+
+
+def journey_assignment_mask(
+    origin_dates,
+    journey_durations,
+    end_times,
+    target_date: Union[date, str],
+    validation_time: Union[datetime, time],
+) -> np.ndarray:
+    """
+    Boolean mask of assignments whose run covers target_date at validation_time.
+
+    origin_dates are datetime64[D] (see parse_dates) or anything NumPy converts to it;
+    journey_durations are days (values below 1 count as 1); end_times are seconds after
+    midnight (see end_time_seconds). Durations and end times may be scalars shared by
+    every assignment, e.g. when all of them are on one train.
+    """
+    origins = np.asarray(origin_dates, dtype="datetime64[D]")
+    durations = np.maximum(np.asarray(journey_durations, dtype=np.int64), 1)
+    end_seconds = np.asarray(end_times, dtype=np.int32)
+    target = np.datetime64(target_date, "D")
+    if isinstance(validation_time, datetime):
+        validation_time = validation_time.time()
+    validation_seconds = _time_seconds(validation_time)
+
+    last_days = origins + (durations - 1).astype("timedelta64[D]")
+    # NaT compares False everywhere, so unparseable origins are never assigned
+    within = (origins <= target) & (target <= last_days)
+    return within & ((target < last_days) | (validation_seconds < end_seconds))
+
+
+def journey_details_arrays(train_numbers: Sequence[str], journey_details: Mapping[str, dict]):
+    """
+    Per-assignment duration and end-time arrays from a {train_no: journey details} map
+    (the dicts get_train_journey_details returns); unknown trains use the 1 day defaults.
+    """
+    defaults = {"journey_duration_days": 1, "end_time": DEFAULT_END_TIME}
+    per_train = {}
+    for train_no in set(train_numbers):
+        details = journey_details.get(train_no) or defaults
+        per_train[train_no] = (
+            details.get("journey_duration_days") or 1,
+            _time_seconds(details.get("end_time") or DEFAULT_END_TIME),
+        )
+    durations = np.fromiter((per_train[train_no][0] for train_no in train_numbers), dtype=np.int64,
+                            count=len(train_numbers))
+    end_seconds = np.fromiter((per_train[train_no][1] for train_no in train_numbers), dtype=np.int32,
+                              count=len(train_numbers))
+    return durations, end_seconds
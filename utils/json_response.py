@@ -0,0 +1,44 @@
+# utils/json_response.py
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+# datetime/date/time, UUID and numpy arrays are encoded natively by orjson
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not know; raw DB rows may carry NUMERIC columns and sets"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """App-wide JSON response: orjson rendering straight from dicts, models or DB rows"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_bytes_response(body: bytes, response: Response = None, status_code: int = 200) -> Response:
+    """
+    Send an already-serialized JSON body, skipping response_model validation and encoding.
+    Headers set on the endpoint's injected ``response`` (cursor, ETag, ...) are carried over.
+    """
+    headers = None
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key.lower() != "content-length"}
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
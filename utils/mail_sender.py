@@ -0,0 +1,201 @@
+# utils/mail_sender.py
+#
+# Long-lived SMTP sender. A background thread runs one event loop with MAIL_POOL_SIZE
+# workers; each worker keeps its own authenticated SMTP session (connect + STARTTLS + login
+# once, then one MAIL/RCPT/DATA exchange per message) and reconnects when the server
+# drops it. send() only queues the message, so neither request handlers nor the
+# notification threads wait for the SMTP round trips.
+#
+# The app lifespan (main.py) starts the sender and drains it on shutdown; outside the app
+# (scripts, one-off jobs) the first send() starts it.
+
+import os
+import asyncio
+import logging
+import random
+import threading
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Dict, List, Optional
+
+from aiosmtplib import SMTP, SMTPException
+
+from config.mail_config import conf
+
+logger = logging.getLogger(__name__)
+
+MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", 2))
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", 1000))
+MAIL_SEND_ATTEMPTS = int(os.getenv("MAIL_SEND_ATTEMPTS", 3))
+# Servers drop idle sessions anyway (Gmail after a few minutes); close ours first
+MAIL_SESSION_IDLE_SECONDS = int(os.getenv("MAIL_SESSION_IDLE_SECONDS", 60))
+MAIL_DRAIN_SECONDS = int(os.getenv("MAIL_DRAIN_SECONDS", 10))
+
+
+def build_message(subject: str, body: str, to: List[str], cc: Optional[List[str]] = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((conf.MAIL_FROM_NAME or "", str(conf.MAIL_FROM)))
+    message["To"] = ", ".join(to)
+    if cc:
+        message["Cc"] = ", ".join(cc)
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+class MailSender:
+    """Queue of outgoing messages served by a small pool of persistent SMTP sessions"""
+
+    def __init__(self, config=conf, pool_size: int = MAIL_POOL_SIZE, queue_size: int = MAIL_QUEUE_SIZE,
+                 max_attempts: int = MAIL_SEND_ATTEMPTS, idle_seconds: float = MAIL_SESSION_IDLE_SECONDS):
+        self.config = config
+        self.pool_size = pool_size
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.idle_seconds = idle_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.stats: Dict[str, int] = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0, "connects": 0}
+
+    # ---------------------------------------------------------------- lifecycle
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run, name="mail-sender", daemon=True)
+            self._thread.start()
+        self._ready.wait(5)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._workers = [loop.create_task(self._worker(number)) for number in range(self.pool_size)]
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+            self._loop = None
+
+    def stop(self, timeout: float = MAIL_DRAIN_SECONDS) -> None:
+        """Send what is queued (up to timeout seconds), then close the sessions"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or thread is None or not thread.is_alive():
+                return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(timeout), loop)
+        try:
+            future.result(timeout + 5)
+        except Exception as e:
+            logger.error(f"Mail sender did not shut down cleanly: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+
+    async def _shutdown(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Mail sender stopped with {self._queue.qsize()} messages unsent")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    # ---------------------------------------------------------------- sending
+
+    def send(self, message: EmailMessage) -> bool:
+        """Queue a message; False when the queue is full (the message is dropped)"""
+        self.start()
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self.stats["dropped"] += 1
+                logger.error(f"Mail queue full ({self.queue_size}), dropped mail to {message['To']}")
+                return False
+            self._pending += 1
+            self.stats["queued"] += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+        return True
+
+    async def _connect(self) -> SMTP:
+        config = self.config
+        smtp = SMTP(
+            hostname=config.MAIL_SERVER,
+            port=config.MAIL_PORT,
+            use_tls=config.MAIL_SSL_TLS,
+            start_tls=config.MAIL_STARTTLS,
+            validate_certs=config.VALIDATE_CERTS,
+        )
+        await smtp.connect()
+        if config.USE_CREDENTIALS:
+            password = config.MAIL_PASSWORD
+            password = password.get_secret_value() if hasattr(password, "get_secret_value") else password
+            await smtp.login(config.MAIL_USERNAME, password)
+        with self._lock:
+            self.stats["connects"] += 1
+        return smtp
+
+    @staticmethod
+    async def _close(smtp: Optional[SMTP]) -> None:
+        if smtp is None:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def _deliver(self, smtp: Optional[SMTP], message: EmailMessage) -> Optional[SMTP]:
+        """Send one message, reconnecting between attempts; returns the session to keep"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if smtp is None or not smtp.is_connected:
+                    smtp = await self._connect()
+                await smtp.send_message(message)
+                with self._lock:
+                    self.stats["sent"] += 1
+                return smtp
+            except (SMTPException, OSError, asyncio.TimeoutError) as e:
+                await self._close(smtp)
+                smtp = None
+                if attempt == self.max_attempts:
+                    with self._lock:
+                        self.stats["failed"] += 1
+                    logger.error(f"Mail to {message['To']} failed after {attempt} attempts: {repr(e)}")
+                    return None
+                await asyncio.sleep(random.uniform(0.5, 1.5) * attempt)
+        return smtp
+
+    async def _worker(self, number: int) -> None:
+        smtp: Optional[SMTP] = None
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), self.idle_seconds)
+                except asyncio.TimeoutError:
+                    await self._close(smtp)
+                    smtp = None
+                    continue
+                try:
+                    smtp = await self._deliver(smtp, message)
+                except Exception as e:
+                    logger.exception(f"Mail worker {number} failed on mail to {message['To']}: {repr(e)}")
+                finally:
+                    with self._lock:
+                        self._pending -= 1
+                    self._queue.task_done()
+        finally:
+            await self._close(smtp)
+
+
+mail_sender = MailSender()
@@ -0,0 +1,257 @@
+# utils/notification_dispatcher.py
+#
+# One dispatcher for every push / in-app request to the notification service. Requests
+# are queued on a bounded queue and posted by NOTIFICATION_WORKERS worker threads through
+# one pooled requests.Session, so a complaint spike reuses a handful of keep-alive
+# connections instead of opening one thread and one connection per notification.
+# Failed posts (connection errors, timeouts, 429/5xx) are retried with jittered
+# exponential backoff.
+#
+# enqueue() splits token lists longer than NOTIFICATION_TOKEN_BATCH into service-sized
+# chunks that the workers post in parallel. It also coalesces without any timer: while a
+# POST still waits in the queue, an identical notification (same URL and payload apart from
+# tokens) adds its tokens to that POST instead of queuing another one, up to the batch size.
+# Only identical notifications merge; every complaint carries its own payload, and the
+# service takes one notification per call.
+#
+# metrics() reports queue depth and queue-wait / end-to-end latency percentiles; a summary
+# is also logged every NOTIFICATION_METRICS_LOG_EVERY requests.
+
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", 2000))
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", 4))
+NOTIFICATION_SEND_ATTEMPTS = int(os.getenv("NOTIFICATION_SEND_ATTEMPTS", 3))
+NOTIFICATION_RETRY_BASE_SECONDS = float(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", 0.5))
+NOTIFICATION_TIMEOUT_SECONDS = int(os.getenv("NOTIFICATION_TIMEOUT_SECONDS", 10))
+NOTIFICATION_METRICS_LOG_EVERY = int(os.getenv("NOTIFICATION_METRICS_LOG_EVERY", 200))
+NOTIFICATION_TOKEN_BATCH = int(os.getenv("NOTIFICATION_TOKEN_BATCH", 500))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+LATENCY_SAMPLES = 1000
+
+
+def build_session(pool_size: int = NOTIFICATION_WORKERS) -> requests.Session:
+    """Session with a keep-alive pool large enough for every worker"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 1))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class NotificationDispatcher:
+    """Bounded queue of notification-service POSTs served by a fixed pool of workers"""
+
+    def __init__(self, workers: int = NOTIFICATION_WORKERS, queue_size: int = NOTIFICATION_QUEUE_SIZE,
+                 max_attempts: int = NOTIFICATION_SEND_ATTEMPTS, retry_base: float = NOTIFICATION_RETRY_BASE_SECONDS,
+                 timeout: int = NOTIFICATION_TIMEOUT_SECONDS, session: Optional[requests.Session] = None,
+                 token_batch: int = NOTIFICATION_TOKEN_BATCH):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.timeout = timeout
+        self.token_batch = token_batch
+        self.session = session or build_session(workers)
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # Queued jobs no worker has taken yet, by notification content (see _content_key)
+        self._waiting: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._counters = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0, "retries": 0, "coalesced": 0}
+        self._max_depth = 0
+        self._wait_times = deque(maxlen=LATENCY_SAMPLES)
+        self._total_times = deque(maxlen=LATENCY_SAMPLES)
+
+    # ---------------------------------------------------------------- lifecycle
+
+    def start(self) -> None:
+        with self._lock:
+            if any(thread.is_alive() for thread in self._threads):
+                return
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"notification-dispatcher-{number}", daemon=True)
+                for number in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Let the workers finish what is queued (up to timeout seconds), then end them"""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks and time.monotonic() < deadline:
+                self._queue.all_tasks_done.wait(deadline - time.monotonic())
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0.1))
+        logger.info(f"Notification dispatcher stopped: {self.metrics()}")
+
+    # ---------------------------------------------------------------- sending
+
+    def post(self, url: str, payload: Dict[str, Any], timeout: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Synchronous POST through the shared session (no queue, no retries)"""
+        resp = self.session.post(url, json=payload, timeout=timeout or self.timeout)
+        resp.raise_for_status()
+        try:
+            return resp.json()
+        except ValueError:
+            logger.warning("Notification service returned non-JSON response")
+            return {"status": resp.status_code, "text": resp.text}
+
+    def submit(self, url: str, payload: Dict[str, Any], label: str = "") -> bool:
+        """Queue a POST; False when the queue is full (the notification is dropped)"""
+        return self._submit({"url": url, "payload": payload, "label": label, "key": None})
+
+    def _submit(self, job: Dict[str, Any]) -> bool:
+        self.start()
+        job.update(enqueued_at=time.monotonic(), taken=False)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._counters["dropped"] += 1
+            logger.error(f"[Dispatcher] Queue full ({self._queue.maxsize}), dropped {job['label']}")
+            return False
+        with self._lock:
+            self._counters["queued"] += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+            # A worker may already have taken it; only a waiting job can absorb more tokens
+            if job["key"] is not None and not job["taken"]:
+                self._waiting[job["key"]] = job
+        return True
+
+    @staticmethod
+    def _content_key(url: str, payload: Dict[str, Any]) -> Tuple[str, str]:
+        content = {field: value for field, value in payload.items() if field != "tokens"}
+        return url, json.dumps(content, sort_keys=True, default=str)
+
+    def enqueue(self, url: str, payload: Dict[str, Any], label: str = "") -> bool:
+        """
+        Queue a POST, split into NOTIFICATION_TOKEN_BATCH-sized token chunks.
+
+        When an identical notification is still waiting in the queue and has room, the
+        tokens are added to it instead and no new POST is queued. Returns True only if
+        every chunk was queued or merged; False means at least part of the recipients were
+        dropped on a full queue.
+        """
+        tokens = list(payload.get("tokens") or [])
+        key = self._content_key(url, payload) if tokens else None
+        if key is not None:
+            with self._lock:
+                waiting = self._waiting.get(key)
+                if waiting is not None and not waiting["taken"]:
+                    merged = waiting["payload"]["tokens"]
+                    present = set(merged)
+                    new_tokens = [token for token in dict.fromkeys(tokens) if token not in present]
+                    if self.token_batch <= 0 or len(merged) + len(new_tokens) <= self.token_batch:
+                        merged.extend(new_tokens)
+                        self._counters["coalesced"] += 1
+                        return True
+
+        if self.token_batch <= 0 or len(tokens) <= self.token_batch:
+            chunks = [tokens]
+        else:
+            chunks = [tokens[i:i + self.token_batch] for i in range(0, len(tokens), self.token_batch)]
+        results = [
+            self._submit({
+                "url": url,
+                "payload": {**payload, "tokens": chunk} if tokens else payload,
+                "label": label if len(chunks) == 1 else f"{label} [batch {number}/{len(chunks)}]",
+                "key": key,
+            })
+            for number, chunk in enumerate(chunks, start=1)
+        ]
+        return all(results)
+
+    def _send_with_retries(self, url: str, payload: Dict[str, Any], label: str) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                resp = self.session.post(url, json=payload, timeout=self.timeout)
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    resp.raise_for_status()
+                    logger.info(f"[Dispatcher] {label} sent | status={resp.status_code}")
+                    return True
+                error = f"HTTP {resp.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = repr(e)
+            except requests.RequestException as e:
+                # 4xx other than 429: the payload will not get better by resending it
+                logger.error(f"[Dispatcher] {label} rejected: {e}")
+                return False
+
+            if attempt == self.max_attempts:
+                logger.error(f"[Dispatcher] {label} failed after {attempt} attempts: {error}")
+                return False
+            with self._lock:
+                self._counters["retries"] += 1
+            # Full jitter: sleep a random share of the exponential step
+            time.sleep(random.uniform(0, self.retry_base * 2 ** (attempt - 1)))
+        return False
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                with self._lock:
+                    # From here on no enqueue can add tokens to this job
+                    job["taken"] = True
+                    if self._waiting.get(job["key"]) is job:
+                        del self._waiting[job["key"]]
+                started = time.monotonic()
+                ok = self._send_with_retries(job["url"], job["payload"], job["label"])
+                with self._lock:
+                    self._counters["sent" if ok else "failed"] += 1
+                    self._wait_times.append(started - job["enqueued_at"])
+                    self._total_times.append(time.monotonic() - job["enqueued_at"])
+                    done = self._counters["sent"] + self._counters["failed"]
+                if NOTIFICATION_METRICS_LOG_EVERY and done % NOTIFICATION_METRICS_LOG_EVERY == 0:
+                    logger.info(f"[Dispatcher] metrics {self.metrics()}")
+            except Exception as e:
+                logger.exception(f"[Dispatcher] Worker error: {e}")
+            finally:
+                self._queue.task_done()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            wait_times, total_times = list(self._wait_times), list(self._total_times)
+            return {
+                **self._counters,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_depth,
+                "wait_p50_ms": round(_percentile(wait_times, 0.5) * 1000, 1),
+                "wait_p95_ms": round(_percentile(wait_times, 0.95) * 1000, 1),
+                "latency_p50_ms": round(_percentile(total_times, 0.5) * 1000, 1),
+                "latency_p95_ms": round(_percentile(total_times, 0.95) * 1000, 1),
+            }
+
+
+notification_dispatcher = NotificationDispatcher()
@@ -1,9 +1,8 @@
 import os
 import logging
 from typing import List, Dict, Any, Optional
-import requests
 from datetime import datetime
-import threading  # Added for threaded (non-blocking) push send
+from utils.notification_dispatcher import notification_dispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +21,14 @@ def get_notification_base_url() -> str:
     return ENV_NOTIFICATION_BASE.get(env, ENV_NOTIFICATION_BASE["LOCAL"])  # fallback local
 
 
+def get_push_url() -> str:
+    return f"{get_notification_base_url().rstrip('/')}/notification/push/"
+
+
+def get_in_app_url() -> str:
+    return f"{get_notification_base_url().rstrip('/')}/notification/in-app/"
+
+
 def build_passenger_complaint_notification(
     tokens: List[str],
     complaint: Dict[str, Any],
@@ -123,16 +130,8 @@ def send_push_notification(payload: Dict[str, Any], timeout: int = 10) -> Option
     """POST the push notification payload to notification service.
     Returns response JSON or None.
     """
-    base_url = get_notification_base_url()
-    url = f"{base_url.rstrip('/')}/notification/push/"
     try:
-        resp = requests.post(url, json=payload, timeout=timeout)
-        resp.raise_for_status()
-        try:
-            return resp.json()
-        except ValueError:
-            logger.warning("Notification service returned non-JSON response")
-            return {"status": resp.status_code, "text": resp.text}
+        return notification_dispatcher.post(get_push_url(), payload, timeout=timeout)
     except Exception as e:
         logger.error(f"Failed to send push notification: {e}")
         return None
@@ -144,29 +143,14 @@ def send_passenger_complaint_notification(tokens: List[str], complaint: Dict[str
 
 
 def send_passenger_complaint_notification_in_thread(tokens: List[str], complaint: Dict[str, Any], product_name: str = "railops") -> bool:
-    """Fire-and-forget threaded sender for passenger complaint notifications.
-    Returns True if thread started. Logs result inside thread.
+    """Fire-and-forget sender for passenger complaint notifications.
+    Returns True if the notification was queued on the dispatcher, which logs the result.
     """
     payload = build_passenger_complaint_notification(tokens, complaint, product_name)
-
-    def _worker():
-        try:
-            resp = send_push_notification(payload)
-            logger.info(
-                f"[Push][Thread][{product_name}] Complaint {payload['data'].get('complaint_id')} notification sent | resp={resp}"
-            )
-        except Exception as e:
-            logger.error(
-                f"[Push][Thread][{product_name}] Failed to send complaint {payload['data'].get('complaint_id')} notification: {e}"
-            )
-
-    try:
-        t = threading.Thread(target=_worker, daemon=True)
-        t.start()
-        return True
-    except Exception as e:
-        logger.error(f"[Push][Thread][{product_name}] Could not start push notification thread: {e}")
-        return False
+    return notification_dispatcher.enqueue(
+        get_push_url(), payload,
+        label=f"[Push][{product_name}] Complaint {payload['data'].get('complaint_id')} notification"
+    )
 
 
 
@@ -205,16 +189,8 @@ def send_in_app_notification(payload: Dict[str, Any], timeout: int = 10) -> Opti
     Mirrors send_push_notification but targets the in-app route and expects the payload
     schema defined in build_passenger_complaint_in_app_notification.
     """
-    base_url = get_notification_base_url()
-    url = f"{base_url.rstrip('/')}/notification/in-app/"
     try:
-        resp = requests.post(url, json=payload, timeout=timeout)
-        resp.raise_for_status()
-        try:
-            return resp.json()
-        except ValueError:
-            logger.warning("In-app notification service returned non-JSON response")
-            return {"status": resp.status_code, "text": resp.text}
+        return notification_dispatcher.post(get_in_app_url(), payload, timeout=timeout)
     except Exception as e:
         logger.error(f"Failed to send in-app notification: {e}")
         return None
@@ -227,27 +203,12 @@ def send_passenger_complaint_in_app_notification(tokens: List[str], complaint: D
 
 
 def send_passenger_complaint_in_app_notification_in_thread(tokens: List[str], complaint: Dict[str, Any], product_name: str = "railops") -> bool:
-    """Threaded fire-and-forget variant for in-app passenger complaint notification."""
+    """Fire-and-forget variant for in-app passenger complaint notification (queued on the dispatcher)."""
     payload = build_passenger_complaint_in_app_notification(tokens, complaint, product_name)
-
-    def _worker():
-        try:
-            resp = send_in_app_notification(payload)
-            logger.info(
-                f"[InApp][Thread][{product_name}] Complaint {payload['extra_data'].get('complaint_id')} in-app notification sent | resp={resp}"
-            )
-        except Exception as e:
-            logger.error(
-                f"[InApp][Thread][{product_name}] Failed to send complaint {payload['extra_data'].get('complaint_id')} in-app notification: {e}"
-            )
-
-    try:
-        t = threading.Thread(target=_worker, daemon=True)
-        t.start()
-        return True
-    except Exception as e:
-        logger.error(f"[InApp][Thread][{product_name}] Could not start in-app notification thread: {e}")
-        return False
+    return notification_dispatcher.enqueue(
+        get_in_app_url(), payload,
+        label=f"[InApp][{product_name}] Complaint {payload['extra_data'].get('complaint_id')} in-app notification"
+    )
 
 
 
@@ -283,27 +244,12 @@ def send_passenger_complaint_push_and_in_app(tokens: List[str], complaint: Dict[
 
 
 def send_passenger_complaint_push_and_in_app_in_thread(tokens: List[str], complaint: Dict[str, Any], product_name: str = "railops") -> bool:
-    """Threaded variant: dispatch both push and in-app notifications in background.
-    Returns True if thread started.
+    """Background variant: queue both push and in-app notifications on the dispatcher.
+    Returns True if at least one of them was queued.
     """
-    def _worker():
-        try:
-            result = send_passenger_complaint_push_and_in_app(tokens, complaint, product_name)
-            logger.info(
-                f"[Combined][Thread][{product_name}] Complaint notification dispatched result={result}"  # noqa: E501
-            )
-        except Exception as e:
-            logger.error(
-                f"[Combined][Thread][{product_name}] Failed to send combined notifications: {e}"
-            )
-
-    try:
-        t = threading.Thread(target=_worker, daemon=True)
-        t.start()
-        return True
-    except Exception as e:
-        logger.error(f"[Combined][Thread][{product_name}] Could not start combined notification thread: {e}")
-        return False
+    pushed = send_passenger_complaint_notification_in_thread(tokens, complaint, product_name)
+    in_app = send_passenger_complaint_in_app_notification_in_thread(tokens, complaint, product_name)
+    return pushed or in_app
 
 __all__ = [
     "build_passenger_complaint_notification",
@@ -318,5 +264,7 @@ __all__ = [
     # Combined helpers
     "send_passenger_complaint_push_and_in_app",
     "send_passenger_complaint_push_and_in_app_in_thread",
-    "get_notification_base_url"
+    "get_notification_base_url",
+    "get_push_url",
+    "get_in_app_url"
 ]
\ No newline at end of file
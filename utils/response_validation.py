@@ -0,0 +1,46 @@
+# utils/response_validation.py
+
+import logging
+from typing import Any, Dict, List, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+logger = logging.getLogger(__name__)
+
+_list_adapters: Dict[Type[BaseModel], TypeAdapter] = {}
+
+
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    adapter = _list_adapters.get(model)
+    if adapter is None:
+        adapter = _list_adapters[model] = TypeAdapter(List[model])
+    return adapter
+
+
+def serialize_response_list(model: Type[BaseModel], complaints: List[Dict[str, Any]],
+                            message: str = "Complaint retrieved successfully") -> bytes:
+    """
+    Wrap each complaint as ``model(message=..., data=complaint)``, validate the whole list in
+    one pass and return the JSON body.
+
+    Endpoints send the bytes as-is (see utils.json_response.json_bytes_response), so the
+    response_model is not validated a second time. Complaints that fail validation are
+    logged and left out instead of failing the whole listing.
+    """
+    adapter = _list_adapter(model)
+    items = [{"message": message, "data": complaint} for complaint in complaints]
+    try:
+        validated = adapter.validate_python(items)
+    except ValidationError as e:
+        bad_indexes = {error["loc"][0] for error in e.errors() if error["loc"] and isinstance(error["loc"][0], int)}
+        for index in sorted(bad_indexes):
+            logger.error(f"Dropping complaint {complaints[index].get('complain_id')} from response: {e}")
+        validated = []
+        for index, item in enumerate(items):
+            if index in bad_indexes:
+                continue
+            try:
+                validated.append(model.model_validate(item))
+            except ValidationError as item_error:
+                logger.error(f"Dropping complaint {complaints[index].get('complain_id')} from response: {item_error}")
+    return adapter.dump_json(validated)
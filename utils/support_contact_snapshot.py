@@ -0,0 +1,319 @@
+# utils/support_contact_snapshot.py
+#
+# Charting-time precomputation of support contacts (migrations/010). Staffing of a run is
+# final once its chart is prepared, so shortly after charting (trains_traindetails
+# charting_day / charting_time, plus SNAPSHOT_CHARTING_GRACE_MINUTES) every coach of the
+# run gets one snapshot row per day the run is on the move, holding
+#   - the EHK/CA support contacts, resolved through the assignment index, and
+#   - the staff assigned to the coach, i.e. the notification recipients,
+# so complaint notifications read one row instead of resolving assignments.
+#
+# Runs are taken from frequency (running weekdays, 1 = Monday); charting_day is the day
+# offset of charting relative to the origin date (0 = same day, -1 = day before).
+#
+#   python -m utils.support_contact_snapshot run
+#   python -m utils.support_contact_snapshot loop [--interval 300]
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from psycopg2.extras import execute_values
+
+from database import get_db_connection, execute_query
+from utils.train_assignment_index import train_assignment_index
+from utils.train_keys import train_key
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CHARTING_GRACE_MINUTES = int(os.getenv("SNAPSHOT_CHARTING_GRACE_MINUTES", 15))
+SNAPSHOT_RETENTION_DAYS = int(os.getenv("SNAPSHOT_RETENTION_DAYS", 7))
+SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("SNAPSHOT_INTERVAL_SECONDS", 300))
+
+WEEKDAYS = {"MON": 1, "TUE": 2, "WED": 3, "THU": 4, "FRI": 5, "SAT": 6, "SUN": 7}
+
+TRAIN_SCHEDULE_QUERY = """
+    SELECT train_no, frequency, charting_time, charting_day, journey_duration_days, coaches_in_sequence
+    FROM trains_traindetails
+"""
+
+COMPUTED_RUNS_QUERY = """
+    SELECT train_no, origin_date FROM rs_support_contact_snapshot_run
+    WHERE origin_date BETWEEN %s AND %s
+"""
+
+# Coach-wise staff of the train whose runs can cover any day of the computed run
+RUN_ASSIGNMENTS_QUERY = """
+    SELECT DISTINCT a.user_id, a.coach, a.origin_date
+    FROM trains_trainaccess_assignment a
+    JOIN user_onboarding_user u ON u.id = a.user_id
+    WHERE a.train_no = %s
+    AND a.origin_date BETWEEN %s AND %s
+    AND a.coach != ''
+    AND u.user_status = 'enabled'
+    ORDER BY a.user_id, a.origin_date
+"""
+
+UPSERT_SNAPSHOT = """
+    INSERT INTO rs_support_contact_snapshot
+        (service_date, train_no, coach, ehk_name, ehk_phone, ca_name, ca_phone, recipients)
+    VALUES %s
+    ON CONFLICT (service_date, train_no, coach) DO UPDATE SET
+        ehk_name = EXCLUDED.ehk_name, ehk_phone = EXCLUDED.ehk_phone,
+        ca_name = EXCLUDED.ca_name, ca_phone = EXCLUDED.ca_phone,
+        recipients = EXCLUDED.recipients, computed_at = now()
+"""
+
+RECORD_RUN = """
+    INSERT INTO rs_support_contact_snapshot_run (train_no, origin_date, charted_at, coach_count)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (train_no, origin_date) DO UPDATE SET
+        charted_at = EXCLUDED.charted_at, coach_count = EXCLUDED.coach_count, computed_at = now()
+"""
+
+# No row: the run was not snapshotted. One row with a NULL id: snapshotted, nobody assigned.
+SNAPSHOT_RECIPIENTS_QUERY = """
+    SELECT u.email, u.id, u.first_name, u.last_name, u.fcm_token, u.fcm_token_coachsathi, u.origin_date
+    FROM rs_support_contact_snapshot s
+    LEFT JOIN LATERAL (
+        SELECT usr.email, usr.id, usr.first_name, usr.last_name, usr.fcm_token, usr.fcm_token_coachsathi,
+               r.origin_date
+        FROM jsonb_to_recordset(s.recipients) AS r(user_id integer, origin_date date)
+        JOIN user_onboarding_user usr ON usr.id = r.user_id
+        WHERE usr.user_status = 'enabled'
+    ) u ON TRUE
+    WHERE s.service_date = %s AND s.train_no = %s AND s.coach = %s
+    ORDER BY u.id, u.origin_date
+"""
+
+SNAPSHOT_CONTACTS_QUERY = """
+    SELECT s.train_no, s.coach, s.ehk_name, s.ehk_phone, s.ca_name, s.ca_phone
+    FROM rs_support_contact_snapshot s
+    JOIN unnest(%s::text[], %s::text[]) AS k(train_no, coach)
+      ON k.train_no = s.train_no AND k.coach = s.coach
+    WHERE s.service_date = %s
+"""
+
+
+def _json_list(value) -> list:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return [part.strip() for part in value.split(',') if part.strip()]
+        return parsed if isinstance(parsed, list) else [parsed]
+    return []
+
+
+def running_weekdays(frequency) -> Optional[Set[int]]:
+    """ISO weekdays the train leaves its origin on; None when it runs daily (or unknown)"""
+    weekdays = set()
+    for day in _json_list(frequency):
+        if isinstance(day, int) or (isinstance(day, str) and day.strip().isdigit()):
+            if 1 <= int(day) <= 7:
+                weekdays.add(int(day))
+        elif isinstance(day, str) and day.strip()[:3].upper() in WEEKDAYS:
+            weekdays.add(WEEKDAYS[day.strip()[:3].upper()])
+    return weekdays or None
+
+
+def charted_at(origin_date: date, charting_day, charting_time) -> datetime:
+    """When the chart of the run leaving on origin_date is prepared"""
+    try:
+        offset = int(str(charting_day).strip())
+    except (TypeError, ValueError):
+        offset = 0
+    if isinstance(charting_time, str):
+        try:
+            charting_time = dt_time.fromisoformat(charting_time.strip())
+        except ValueError:
+            charting_time = None
+    if not isinstance(charting_time, dt_time):
+        charting_time = dt_time(0, 0)
+    return datetime.combine(origin_date + timedelta(days=offset), charting_time)
+
+
+def coach_sequence(coaches_in_sequence) -> List[str]:
+    coaches = []
+    for coach in _json_list(coaches_in_sequence):
+        if isinstance(coach, dict):
+            coach = coach.get('coach') or coach.get('coach_no') or coach.get('coach_number')
+        coach = str(coach or '').strip().upper()
+        if coach and coach not in coaches:
+            coaches.append(coach)
+    return coaches
+
+
+def due_runs(trains: Iterable[dict], computed: Set[Tuple[str, date]], now: datetime) -> List[Tuple[dict, date, datetime]]:
+    """(train row, origin date, charted at) of charted runs still on the move and not computed yet"""
+    grace = timedelta(minutes=SNAPSHOT_CHARTING_GRACE_MINUTES)
+    today = now.date()
+    runs = []
+    for train in trains:
+        train_no = train_key(train['train_no'])
+        duration = max(train.get('journey_duration_days') or 1, 1)
+        weekdays = running_weekdays(train.get('frequency'))
+        # Charting can be on the day before departure, so tomorrow's run may already be due
+        for days_back in range(-1, duration):
+            origin_date = today - timedelta(days=days_back)
+            if (train_no, origin_date) in computed:
+                continue
+            if weekdays is not None and origin_date.isoweekday() not in weekdays:
+                continue
+            charted = charted_at(origin_date, train.get('charting_day'), train.get('charting_time'))
+            if charted + grace <= now:
+                runs.append((train, origin_date, charted))
+    return runs
+
+
+def compute_run(conn, train: dict, origin_date: date, charted: datetime, index=None) -> int:
+    """Snapshot every coach of one run for each day it is on the move; returns rows written"""
+    index = index or train_assignment_index
+    train_no = train_key(train['train_no'])
+    duration = max(train.get('journey_duration_days') or 1, 1)
+    service_dates = [origin_date + timedelta(days=day) for day in range(duration)]
+
+    assignments = execute_query(conn, RUN_ASSIGNMENTS_QUERY, (
+        train_no, origin_date - timedelta(days=duration - 1), service_dates[-1]
+    )) or []
+    for row in assignments:
+        if isinstance(row['origin_date'], str):
+            row['origin_date'] = date.fromisoformat(row['origin_date'])
+
+    coaches = coach_sequence(train.get('coaches_in_sequence'))
+    coaches += sorted({row['coach'] for row in assignments} - set(coaches))
+
+    keys = [(service_date, coach) for service_date in service_dates for coach in coaches]
+    contacts = index.lookup_many((train_no, coach, service_date) for service_date, coach in keys)
+
+    values = []
+    for (service_date, coach), contact in zip(keys, contacts):
+        earliest_origin = service_date - timedelta(days=duration - 1)
+        recipients = [
+            {'user_id': row['user_id'], 'origin_date': row['origin_date'].isoformat()}
+            for row in assignments
+            if row['coach'] == coach and earliest_origin <= row['origin_date'] <= service_date
+        ]
+        values.append((
+            service_date, train_no, coach, contact['ehk_name'], contact['ehk_phone'],
+            contact['ca_name'], contact['ca_phone'], json.dumps(recipients),
+        ))
+
+    cursor = conn.cursor()
+    if values:
+        execute_values(cursor, UPSERT_SNAPSHOT, values)
+    cursor.execute(RECORD_RUN, (train_no, origin_date, charted, len(coaches)))
+    conn.commit()
+    return len(values)
+
+
+def prune_snapshots(conn, today: date) -> None:
+    cutoff = today - timedelta(days=SNAPSHOT_RETENTION_DAYS)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM rs_support_contact_snapshot WHERE service_date < %s", (cutoff,))
+    cursor.execute("DELETE FROM rs_support_contact_snapshot_run WHERE origin_date < %s", (cutoff,))
+    conn.commit()
+
+
+def run_due_snapshots(conn, now: Optional[datetime] = None, index=None) -> List[Dict]:
+    """Compute every run charted since the last pass; one failing run does not stop the others"""
+    now = now or datetime.now()
+    index = index or train_assignment_index
+    index.ensure_fresh(conn)
+
+    trains = execute_query(conn, TRAIN_SCHEDULE_QUERY) or []
+    longest = max([train.get('journey_duration_days') or 1 for train in trains] or [1])
+    computed = {
+        (train_key(row['train_no']), date.fromisoformat(str(row['origin_date'])))
+        for row in execute_query(conn, COMPUTED_RUNS_QUERY, (
+            now.date() - timedelta(days=longest), now.date() + timedelta(days=1)
+        )) or []
+    }
+
+    results = []
+    for train, origin_date, charted in due_runs(trains, computed, now):
+        try:
+            rows = compute_run(conn, train, origin_date, charted, index)
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Support contact snapshot failed for train {train['train_no']} run {origin_date}: {str(e)}")
+            continue
+        results.append({'train_no': train_key(train['train_no']), 'origin_date': origin_date, 'rows': rows})
+    prune_snapshots(conn, now.date())
+
+    logger.info(f"Support contact snapshots computed for {len(results)} charted runs")
+    return results
+
+
+def snapshot_recipients(conn, service_date: date, train_no: str, coach: str) -> Optional[List[Dict]]:
+    """
+    Staff assigned to the coach on service_date as stored at charting, each with the origin
+    date of their run, or None when the run has no snapshot
+    """
+    try:
+        rows = execute_query(conn, SNAPSHOT_RECIPIENTS_QUERY, (
+            service_date, train_key(train_no), (coach or '').strip().upper()
+        ))
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Support contact snapshot unavailable: {str(e)}")
+        return None
+    if not rows:
+        return None
+    return [row for row in rows if row.get('id') is not None]
+
+
+def snapshot_contacts(conn, service_date: date, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, str]]:
+    """Stored support contacts keyed by (canonical train, upper-case coach); missing pairs are absent"""
+    pairs = sorted({(train_key(train_no), (coach or '').strip().upper()) for train_no, coach in pairs})
+    if not pairs:
+        return {}
+    try:
+        rows = execute_query(conn, SNAPSHOT_CONTACTS_QUERY, (
+            [train_no for train_no, _ in pairs], [coach for _, coach in pairs], service_date
+        )) or []
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Support contact snapshot unavailable: {str(e)}")
+        return {}
+    return {
+        (row['train_no'], row['coach']): {
+            'ehk_name': row['ehk_name'], 'ehk_phone': row['ehk_phone'],
+            'ca_name': row['ca_name'], 'ca_phone': row['ca_phone'],
+        }
+        for row in rows
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Charting-time support contact snapshots")
+    parser.add_argument("command", choices=["run", "loop"])
+    parser.add_argument("--interval", type=int, default=SNAPSHOT_INTERVAL_SECONDS,
+                        help="seconds between passes in loop mode")
+    args = parser.parse_args(argv)
+
+    while True:
+        conn = get_db_connection()
+        try:
+            for result in run_due_snapshots(conn):
+                print(json.dumps(result, default=str))
+        except Exception as e:
+            if args.command == "run":
+                raise
+            logger.error(f"Support contact snapshot pass failed: {str(e)}")
+        finally:
+            conn.close()
+        if args.command == "run":
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,225 @@
+# utils/train_assignment_index.py
+#
+# Per-process index of staff train assignments (trains_trainaccess_assignment, the relational
+# copy of trains_trainaccess.train_details) used to attach EHK/CA support contacts to
+# complaint listings. The index is built once and then refreshed per user from
+# rs_trainaccess_changes notifications (migrations/007), with a periodic full rebuild as a
+# safety net for missed notifications.
+#
+# Entries are keyed by canonical train number (utils/train_keys.py) and origin date:
+#   EHK: (train, origin_date)        -> [(user_id, name, phone), ...]
+#   CA:  (train, origin_date, coach) -> [(user_id, name, phone), ...]
+# A lookup probes the journey_duration_days origin dates whose journey covers the day.
+
+import os
+import time
+import bisect
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from database import get_db_connection, execute_query
+from utils.complaint_feed import notify_listener
+from utils.train_journey_utils import get_train_journey_details, get_journey_details_map
+from utils.train_keys import train_key
+
+logger = logging.getLogger(__name__)
+
+TRAIN_ASSIGNMENT_CHANNEL = "rs_trainaccess_changes"
+TRAIN_ASSIGNMENT_INDEX_MAX_AGE = int(os.getenv("TRAIN_ASSIGNMENT_INDEX_MAX_AGE", 900))
+
+# Coach prefixes whose complaints also get the coach attendant (CA) of that exact coach
+EXACT_MATCH_COACH_PREFIXES = ('A', 'B', 'M', 'G', 'H', 'C')
+
+Contact = Tuple[int, str, str]  # (user_id, name, phone)
+
+# One row per indexed entry; the assignment rows come from the relational copy of
+# train_details (migrations/009), so no JSON is parsed here
+ASSIGNED_USERS_QUERY = """
+    SELECT DISTINCT u.id, u.phone, u.first_name, u.last_name, a.train_no, a.origin_date, a.role,
+           CASE WHEN a.role = 'CA' AND a.coach_count = 1 THEN a.coach ELSE '' END AS coach
+    FROM trains_trainaccess_assignment a
+    JOIN user_onboarding_user u ON u.id = a.user_id
+    WHERE a.role IN ('EHK', 'CA')
+    AND u.user_status = 'enabled'
+    AND u.phone IS NOT NULL
+    AND u.phone != ''
+    {user_filter}
+    ORDER BY u.id
+"""
+
+
+class TrainAssignmentIndex:
+    """Support contacts by (train, origin date[, coach]), kept current per changed user"""
+
+    def __init__(self, listener=None, max_age: int = TRAIN_ASSIGNMENT_INDEX_MAX_AGE):
+        self.listener = listener
+        self.max_age = max_age
+        self._ehk: Dict[Tuple[str, date], List[Contact]] = {}
+        self._ca: Dict[Tuple[str, date, str], List[Contact]] = {}
+        self._user_keys: Dict[int, List[Tuple]] = {}
+        self._loaded_at: Optional[float] = None
+        self._dirty_users: Set[int] = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._listening = False
+
+    # ---------------------------------------------------------------- change tracking
+
+    def _on_change(self, payload) -> None:
+        user_id = payload.get('user_id') if isinstance(payload, dict) else None
+        if user_id is None:
+            self.mark_stale()
+            return
+        with self._lock:
+            self._dirty_users.add(int(user_id))
+
+    def mark_stale(self) -> None:
+        """Force a full rebuild on the next lookup (e.g. after the LISTEN connection dropped)"""
+        with self._lock:
+            self._loaded_at = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def _start_listening(self) -> None:
+        if self.listener is None or self._listening:
+            return
+        self._listening = True
+        self.listener.on_reconnect(self.mark_stale)
+        self.listener.listen(TRAIN_ASSIGNMENT_CHANNEL, self._on_change)
+
+    # ---------------------------------------------------------------- building
+
+    @staticmethod
+    def _index_row(ehk, ca, row, user_keys: Dict[int, List[Tuple]]) -> None:
+        first_name = (row.get('first_name') or '').strip()
+        last_name = (row.get('last_name') or '').strip()
+        contact = (row['id'], f"{first_name} {last_name}".strip(), row['phone'])
+        origin_date = row['origin_date']
+        if isinstance(origin_date, str):
+            origin_date = date.fromisoformat(origin_date)
+        train = train_key(row['train_no'])
+
+        if row['role'] == 'EHK':
+            kind, entries, key = 'ehk', ehk, (train, origin_date)
+        elif row.get('coach'):
+            kind, entries, key = 'ca', ca, (train, origin_date, row['coach'])
+        else:
+            return
+        # Contacts stay sorted by user id, so a refreshed user ranks as after a full rebuild
+        contacts = entries.setdefault(key, [])
+        position = bisect.bisect_left(contacts, contact)
+        if position == len(contacts) or contacts[position] != contact:
+            contacts.insert(position, contact)
+            user_keys.setdefault(row['id'], []).append((kind, key))
+
+    def load_all(self, conn) -> None:
+        """Rebuild from every enabled user's assignments; the old index serves until the swap"""
+        started = time.monotonic()
+        ehk, ca, user_keys = {}, {}, {}
+        for row in execute_query(conn, ASSIGNED_USERS_QUERY.format(user_filter="")) or []:
+            self._index_row(ehk, ca, row, user_keys)
+        with self._lock:
+            self._ehk, self._ca, self._user_keys = ehk, ca, user_keys
+            self._loaded_at = time.monotonic()
+        logger.info(
+            f"Train assignment index loaded: {len(user_keys)} users, {len(ehk)} EHK and "
+            f"{len(ca)} CA entries in {(time.monotonic() - started) * 1000:.0f}ms"
+        )
+
+    def refresh_users(self, conn, user_ids: Iterable[int]) -> None:
+        """Re-read the given users' assignments and replace their entries"""
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        rows = execute_query(conn, ASSIGNED_USERS_QUERY.format(user_filter="AND u.id = ANY(%s)"), (user_ids,)) or []
+        with self._lock:
+            for user_id in user_ids:
+                for kind, key in self._user_keys.pop(user_id, ()):
+                    entries = self._ehk if kind == 'ehk' else self._ca
+                    remaining = [contact for contact in entries.get(key, ()) if contact[0] != user_id]
+                    if remaining:
+                        entries[key] = remaining
+                    else:
+                        entries.pop(key, None)
+            for row in rows:
+                self._index_row(self._ehk, self._ca, row, self._user_keys)
+        logger.info(f"Train assignment index refreshed {len(user_ids)} users")
+
+    def ensure_fresh(self, conn=None) -> None:
+        """
+        Apply pending user changes, or rebuild when never loaded / older than max_age.
+
+        Without conn a connection is opened only when there is something to read.
+        """
+        self._start_listening()
+        with self._refresh_lock:
+            with self._lock:
+                expired = self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+                dirty, self._dirty_users = self._dirty_users, set()
+            if not expired and not dirty:
+                return
+            own_conn = conn is None
+            try:
+                conn = get_db_connection() if own_conn else conn
+                if expired:
+                    self.load_all(conn)
+                else:
+                    self.refresh_users(conn, dirty)
+            except Exception:
+                with self._lock:
+                    self._dirty_users |= dirty
+                raise
+            finally:
+                if own_conn and conn is not None:
+                    conn.close()
+
+    # ---------------------------------------------------------------- lookups
+
+    @staticmethod
+    def _latest(entries: Dict, train: str, duration: int, query_date: date, *key_suffix) -> Optional[Contact]:
+        # Newest origin date first: a train running on query_date left at most duration-1 days earlier
+        for days_back in range(duration):
+            contacts = entries.get((train, query_date - timedelta(days=days_back), *key_suffix))
+            if contacts:
+                return contacts[0]
+        return None
+
+    def _resolve(self, train: str, coach: str, query_date: date, duration: int) -> Dict[str, str]:
+        # Caller holds self._lock
+        ehk = self._latest(self._ehk, train, duration, query_date)
+        ca = self._latest(self._ca, train, duration, query_date, coach) if coach.startswith(EXACT_MATCH_COACH_PREFIXES) else None
+        return {
+            'ehk_name': ehk[1] if ehk else '',
+            'ehk_phone': ehk[2] if ehk else '',
+            'ca_name': ca[1] if ca else '',
+            'ca_phone': ca[2] if ca else '',
+        }
+
+    def lookup(self, train_no: str, coach: str, query_date: date) -> Dict[str, str]:
+        """EHK of the train and, for exact-match coaches, the CA of the coach on query_date"""
+        train = train_key(train_no)
+        duration = get_train_journey_details(train)["journey_duration_days"]
+        with self._lock:
+            return self._resolve(train, (coach or '').strip().upper(), query_date, duration)
+
+    def lookup_many(self, lookups: Iterable[Tuple[str, str, date]]) -> List[Dict[str, str]]:
+        """lookup() for a batch of (train_no, coach, date), in order, under one lock acquisition"""
+        keys = [(train_key(train_no), (coach or '').strip().upper(), query_date)
+                for train_no, coach, query_date in lookups]
+        durations = {
+            train: details["journey_duration_days"]
+            for train, details in get_journey_details_map({train for train, _, _ in keys}).items()
+        }
+        resolved: Dict[Tuple[str, str, date], Dict[str, str]] = {}
+        with self._lock:
+            for key in keys:
+                if key not in resolved:
+                    resolved[key] = self._resolve(*key, durations[key[0]])
+        return [resolved[key] for key in keys]
+
+
+train_assignment_index = TrainAssignmentIndex(notify_listener)
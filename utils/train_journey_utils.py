@@ -1,12 +1,131 @@
 # utils/train_journey_utils.py
 
-from datetime import datetime, timedelta
+import os
+import time
 import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Set
 from database import get_db_connection, execute_query
+from utils.complaint_feed import notify_listener
+from utils.train_keys import train_key
 
 logger = logging.getLogger(__name__)
 
 
+# Journey metadata of every train, shared by all callers in the process. The whole table
+# is small, so it is loaded in one query and refreshed every TRAIN_JOURNEY_CACHE_TTL
+# seconds; rs_traindetails_changes notifications (migrations/008) invalidate single trains.
+TRAIN_JOURNEY_CACHE_TTL = int(os.getenv("TRAIN_JOURNEY_CACHE_TTL", 3600))
+TRAIN_JOURNEY_CHANNEL = "rs_traindetails_changes"
+DEFAULT_JOURNEY_DETAILS = {"journey_duration_days": 1, "end_time": "23:59:59"}
+
+TRAIN_JOURNEY_QUERY = """
+    SELECT train_no, journey_duration_days, end_time
+    FROM trains_traindetails
+    {where_clause}
+"""
+
+_journey_details: Dict[str, dict] = {}
+_journey_loaded_at: Optional[float] = None
+_stale_trains: Set[str] = set()
+_journey_lock = threading.Lock()
+_journey_listening = False
+
+
+def _journey_row_details(row: dict) -> dict:
+    journey_duration = row.get("journey_duration_days")
+    end_time = row.get("end_time")
+
+    # Convert end_time to string format if it's a time object
+    if end_time and hasattr(end_time, 'strftime'):
+        end_time = end_time.strftime("%H:%M:%S")
+
+    return {
+        "journey_duration_days": journey_duration if journey_duration else 1,
+        "end_time": end_time if end_time else "23:59:59"
+    }
+
+
+def _fetch_journey_details(where_clause: str = "", params=None) -> Dict[str, dict]:
+    conn = get_db_connection()
+    try:
+        rows = execute_query(conn, TRAIN_JOURNEY_QUERY.format(where_clause=where_clause), params) or []
+    finally:
+        conn.close()
+    return {train_key(row.get("train_no")): _journey_row_details(row) for row in rows}
+
+
+def _on_traindetails_change(payload) -> None:
+    train_no = payload.get("train_no") if isinstance(payload, dict) else None
+    invalidate_train_journey_details(train_no)
+
+
+def _start_journey_listener() -> None:
+    global _journey_listening
+    if _journey_listening:
+        return
+    _journey_listening = True
+    notify_listener.on_reconnect(invalidate_train_journey_details)
+    notify_listener.listen(TRAIN_JOURNEY_CHANNEL, _on_traindetails_change)
+
+
+def invalidate_train_journey_details(train_no=None) -> None:
+    """Drop one train (re-read on its next lookup), or everything when train_no is None"""
+    global _journey_loaded_at
+    with _journey_lock:
+        if train_no is None:
+            _journey_loaded_at = None
+        else:
+            _stale_trains.add(train_key(train_no))
+
+
+def preload_train_journey_details() -> int:
+    """Load journey details of every train in one query; returns the number of trains"""
+    global _journey_details, _journey_loaded_at
+    details = _fetch_journey_details()
+    with _journey_lock:
+        _journey_details = details
+        _journey_loaded_at = time.monotonic()
+        _stale_trains.clear()
+    logger.info(f"Train journey cache loaded {len(details)} trains")
+    return len(details)
+
+
+def get_journey_details_map(train_numbers: Iterable) -> Dict[str, dict]:
+    """
+    Journey details for many trains at once, keyed by the train numbers as given.
+
+    Served from the process-wide cache; trains unknown to trains_traindetails get the
+    1 day / 23:59:59 defaults.
+    """
+    _start_journey_listener()
+    with _journey_lock:
+        expired = _journey_loaded_at is None or time.monotonic() - _journey_loaded_at > TRAIN_JOURNEY_CACHE_TTL
+    if expired:
+        preload_train_journey_details()
+
+    train_numbers = [str(train_no).strip() for train_no in train_numbers]
+    with _journey_lock:
+        stale = {train_key(train_no) for train_no in train_numbers} & _stale_trains
+    if stale:
+        # Changed trains are re-read individually (train_no is an integer column)
+        refreshed = _fetch_journey_details("WHERE train_no = ANY(%s)", ([int(key) for key in stale if key.isdigit()],))
+        with _journey_lock:
+            for key in stale:
+                if key in refreshed:
+                    _journey_details[key] = refreshed[key]
+                else:
+                    _journey_details.pop(key, None)
+            _stale_trains.difference_update(stale)
+
+    with _journey_lock:
+        return {
+            train_no: dict(_journey_details.get(train_key(train_no), DEFAULT_JOURNEY_DETAILS))
+            for train_no in train_numbers
+        }
+
+
 def get_train_journey_details(train_no: str) -> dict:
     """
     Fetch journey duration and end time for a train from TrainDetails model.
@@ -18,43 +137,10 @@ def get_train_journey_details(train_no: str) -> dict:
         dict with keys: journey_duration_days (int), end_time (str in HH:MM:SS format)
     """
     try:
-        conn = get_db_connection()
-        result = execute_query(
-            conn,
-            """
-            SELECT journey_duration_days, end_time 
-            FROM trains_traindetails 
-            WHERE train_no = %s 
-            LIMIT 1
-            """,
-            (train_no,)
-        )
-        conn.close()
-        
-        if result and len(result) > 0:
-            journey_duration = result[0].get("journey_duration_days")
-            end_time = result[0].get("end_time")
-            
-            # Convert end_time to string format if it's a time object
-            if end_time and hasattr(end_time, 'strftime'):
-                end_time = end_time.strftime("%H:%M:%S")
-            
-            return {
-                "journey_duration_days": journey_duration if journey_duration else 1,
-                "end_time": end_time if end_time else "23:59:59"
-            }
-        else:
-            logger.warning(f"No train details found for train {train_no}, using defaults")
-            return {
-                "journey_duration_days": 1,
-                "end_time": "23:59:59"
-            }
+        return get_journey_details_map([train_no])[str(train_no).strip()]
     except Exception as e:
         logger.error(f"Error fetching train journey details for {train_no}: {e}")
-        return {
-            "journey_duration_days": 1,
-            "end_time": "23:59:59"
-        }
+        return dict(DEFAULT_JOURNEY_DETAILS)
 
 
 def is_user_assigned_on_journey_date(
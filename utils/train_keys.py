@@ -0,0 +1,30 @@
+# utils/train_keys.py
+#
+# Canonical train-number key. Train numbers arrive as '12333', '012333', ' 12333' or as the
+# integer trains_traindetails.train_no; the service stores and compares them in one spelling:
+# trimmed, with leading zeros stripped from numeric values ('0' for all zeros). That is
+# exactly trains_traindetails.train_no::text, and rs_train_key() in migrations/011 applies
+# the same rule inside Postgres.
+#
+# Keys are interned, so the per-process maps (assignment index, journey cache, depot train
+# scope) share one string object per train.
+
+import sys
+from functools import lru_cache
+from typing import NewType
+
+TrainKey = NewType("TrainKey", str)
+
+
+@lru_cache(maxsize=8192)
+def _canonical(train_no: str) -> str:
+    if train_no.isdigit():
+        train_no = train_no.lstrip('0') or '0'
+    return sys.intern(train_no)
+
+
+def train_key(train_no) -> TrainKey:
+    """Canonical spelling of a train number; '' for missing values"""
+    if train_no is None:
+        return TrainKey('')
+    return TrainKey(_canonical(str(train_no).strip()))